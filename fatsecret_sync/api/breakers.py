@@ -0,0 +1,156 @@
+"""
+Circuit breakers and bulkheads: a degraded endpoint fails fast instead of eating the time budget,
+and slow writes cannot take every connection from reads.
+"""
+import asyncio
+import dataclasses
+import logging
+import time
+from enum import Enum
+from typing import Collection, Optional
+
+import aiohttp
+
+from .concurrency import is_overload_error
+from .errors import CircuitOpenError, DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+
+def is_endpoint_failure(error: BaseException, throttling_error_codes: Collection[int] = ()) -> bool:
+    """
+    Whether `error` means that the endpoint does not work: it is overloaded (see `is_overload_error`)
+    or cannot be reached at all (connection refused or reset). Any other error is an answer of a working endpoint.
+    """
+    if isinstance(error, DeadlineExceededError):
+        # The run ran out of time, the endpoint did not necessarily
+        return not error.run_deadline
+    return is_overload_error(error, throttling_error_codes) or isinstance(error, (aiohttp.ClientConnectionError, OSError))
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"  # calls go through
+    OPEN = "open"  # calls fail immediately
+    HALF_OPEN = "half_open"  # a few probe calls decide whether to close or open again
+
+
+@dataclasses.dataclass
+class CircuitStats:
+    key: str
+    state: CircuitState
+    failures: int
+    retry_after: float
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` failures in a row. After `reset_timeout` it lets `probes` calls through:
+    the first successful one closes the circuit, a failed one opens it again.
+
+    Usage:
+        breaker.check()  # raises CircuitOpenError
+        success = None
+        try:
+            ...
+            success = True
+        except Exception:
+            success = False
+        finally:
+            breaker.record(success)
+    """
+
+    def __init__(self, key: str, *, failure_threshold: int = 5, reset_timeout: float = 30.0, probes: int = 1):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+
+    @property
+    def retry_after(self) -> float:
+        if self.state != CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def check(self):
+        """
+        Raises:
+            CircuitOpenError: the circuit is open, or half-open with every probe already in flight.
+        """
+        if self.state == CircuitState.OPEN:
+            if self.retry_after > 0:
+                raise CircuitOpenError(f"Circuit {self.key} is open", call_name=self.key, retry_after=self.retry_after)
+            self.state = CircuitState.HALF_OPEN
+            self._probes_in_flight = 0
+            logger.info("Circuit %s is half-open, probing", self.key)
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes_in_flight >= self.probes:
+                raise CircuitOpenError(f"Circuit {self.key} is being probed", call_name=self.key, retry_after=0.0)
+            self._probes_in_flight += 1
+
+    def record(self, success: Optional[bool]):
+        """
+        Args:
+            success:
+                Call outcome, None if the call was not made or has no verdict (e.g. cancelled).
+        """
+        if self.state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+        if success is None:
+            return
+        if success:
+            if self.state != CircuitState.CLOSED:
+                logger.info("Circuit %s is closed", self.key)
+            self.state = CircuitState.CLOSED
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                logger.warning("Circuit %s is open after %d failures", self.key, self.failures)
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> CircuitStats:
+        return CircuitStats(key=self.key, state=self.state, failures=self.failures, retry_after=self.retry_after)
+
+
+class CircuitBreakers:
+    """
+    Circuit breaker per API method, or per API method and user if `per_user` is set.
+    """
+
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout: float = 30.0, probes: int = 1, per_user: bool = False):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self.per_user = per_user
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, call_name: str, user_id: Optional[str] = None) -> CircuitBreaker:
+        key = f"{call_name}@{user_id}" if self.per_user and user_id is not None else call_name
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker(
+                key, failure_threshold=self.failure_threshold, reset_timeout=self.reset_timeout, probes=self.probes
+            )
+        return self._breakers[key]
+
+    def stats(self) -> list[CircuitStats]:
+        return [breaker.stats() for breaker in self._breakers.values()]
+
+
+class Bulkheads:
+    """
+    Separate limits of reads (idempotent calls) and writes in flight.
+    """
+
+    def __init__(self, reads: int, writes: int):
+        self.reads = asyncio.Semaphore(reads)
+        self.writes = asyncio.Semaphore(writes)
+
+    def get(self, idempotent: bool) -> asyncio.Semaphore:
+        return self.reads if idempotent else self.writes
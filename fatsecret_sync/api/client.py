@@ -1,9 +1,11 @@
 """
 FatSecret API implementation.
 """
+import asyncio
 import json
 import logging
-from typing import Any, NamedTuple, Optional, Type, TypeVar
+import time
+from typing import Any, Awaitable, Callable, Collection, NamedTuple, Optional, Type, TypeVar
 
 import aiohttp
 import oauthlib.oauth1
@@ -11,14 +13,22 @@ import pydantic
 import yarl
 from pydantic import BaseModel
 
+from ..utils.log import log_fields
 from ..utils.oauth import oauth1_request, oauth1_token_request
-from .errors import APIError, RequestError
-from .models.auth import OAuth1Credentials, OAuth1UserFlowConfig, OAuth2Credentials
+from ..utils.profiling import phase
+from .breakers import Bulkheads, CircuitBreakers, is_endpoint_failure
+from .concurrency import AdaptiveConcurrencyLimiter, is_overload_error
+from .deadlines import effective_timeout
+from .errors import APIError, DeadlineExceededError, RequestError
+from .hedging import HedgeSkipped, HedgingPolicy, LatencyTracker
+from .models.auth import OAUTH2_TOKEN_URL, OAuth1Credentials, OAuth1UserFlowConfig, OAuth2Credentials
 from .models.common import DateInt
 from .models.errors import APIErrorResponse
 from .models.food import FoodInfoV3
 from .models.food_entry import CreateFoodEntryRequest, EditFoodEntryRequest, FoodEntries
 from .models.profile import ProfileStatus
+from .scheduling import PriorityScheduler, current_priority
+from .tokens import OAuth2TokenManager
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +36,12 @@ logger = logging.getLogger(__name__)
 API_URL = "https://platform.fatsecret.com/rest/server.api"
 
 
+# Default per-call timeout, seconds
+DEFAULT_CALL_TIMEOUT = 30.0
+
+
 RetT = TypeVar("RetT", bound=BaseModel)
+T = TypeVar("T")
 
 
 class AuthorizationRequestContext(NamedTuple):
@@ -35,6 +50,33 @@ class AuthorizationRequestContext(NamedTuple):
     request_token_secret: str
 
 
+def decode_response(method: str, call_name: str, response: aiohttp.ClientResponse, content: bytes) -> Any:
+    """
+    Raises:
+        RequestError: the API is overloaded or throttles the client (HTTP 5xx or 429),
+            or the response is not JSON (e.g. an HTML error page of a proxy).
+    """
+    if response.status == 429 or response.status >= 500:
+        raise RequestError(
+            f"HTTP {response.status}",
+            method=method,
+            call_name=call_name,
+            response=response,
+            details=content.decode(errors="replace"),
+        )
+    with phase("parse json"):
+        try:
+            return json.loads(content)
+        except ValueError:
+            raise RequestError(
+                "Response is not JSON",
+                method=method,
+                call_name=call_name,
+                response=response,
+                details=content.decode(errors="replace"),
+            ) from None
+
+
 async def oauth1_api_call(
     method: str,
     api_method: str,
@@ -57,8 +99,64 @@ async def oauth1_api_call(
     )
     if raise_for_status:
         res.raise_for_status()
-    # TODO: maybe do not use this call at all
-    return res, json.loads(data)
+    return res, decode_response(method, api_method, res, data)
+
+
+async def bearer_api_call(
+    method: str,
+    api_method: str,
+    data: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    *,
+    api_url: yarl.URL,
+    access_token: str,
+    session: aiohttp.ClientSession,
+) -> tuple[aiohttp.ClientResponse, Any]:
+    headers = {**(headers or {}), "Authorization": f"Bearer {access_token}"}
+    with phase("http"):
+        async with session.request(
+            method, api_url.update_query(format="json", method=api_method), data=data, headers=headers
+        ) as res:
+            content = await res.read()
+    return res, decode_response(method, api_method, res, content)
+
+
+def make_call_url(api_url: yarl.URL, query: Optional[dict]) -> yarl.URL:
+    if not query:
+        return api_url
+    return api_url.update_query({k: v if not isinstance(v, DateInt) else int(v) for k, v in query.items() if v is not None})
+
+
+def check_api_response(call_name: str, response: aiohttp.ClientResponse, data: dict | list):
+    if response.ok and data and "error" not in data:
+        return
+    if not data:
+        raise RequestError("No data returned", method=response.method, call_name=call_name, response=response, details=data)
+    try:
+        error = APIErrorResponse.validate(data["error"])
+    except (TypeError, ValueError, pydantic.ValidationError):
+        raise RequestError(
+            "Unexpected API response", method=response.method, call_name=call_name, response=response, details=data
+        ) from None
+    raise APIError("Failed API call", method=response.method, call_name=call_name, response=response, error=error)
+
+
+def read_typed_response(
+    method: str,
+    call_name: str,
+    response_type: Type[RetT],
+    response: aiohttp.ClientResponse,
+    data: dict | list,
+    allow_none: bool = False,
+) -> Optional[RetT]:
+    field_name = call_name.split(".", maxsplit=1)[0]
+    ret_data = data[field_name]
+    if ret_data is None:
+        if allow_none:
+            return None
+        raise RequestError("Returned no data", method=method, call_name=call_name, response=response, details=data)
+    with phase("parse model"):
+        return response_type.validate(ret_data)
 
 
 class FatSecretAPI:
@@ -70,7 +168,46 @@ class FatSecretAPI:
         *,
         api_url: yarl.URL | str = API_URL,
         oauth1_user_flow_config: OAuth1UserFlowConfig = OAuth1UserFlowConfig(),
+        call_timeout: Optional[float] = DEFAULT_CALL_TIMEOUT,
+        hedging: Optional[HedgingPolicy] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        concurrency: Optional[AdaptiveConcurrencyLimiter] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        bulkheads: Optional[Bulkheads] = None,
+        throttling_error_codes: Collection[int] = (),
+        oauth2_token_url: yarl.URL | str = OAUTH2_TOKEN_URL,
     ):
+        """
+        Args:
+            oauth1_creds:
+                Application OAuth1 credentials.
+            oauth2_creds:
+                Application OAuth2 credentials.
+            user_credentials:
+                Credentials of the user for `user_api`.
+            api_url:
+                FatSecret REST API URL.
+            oauth1_user_flow_config:
+                URLs used for user authorization.
+            call_timeout:
+                Default timeout of a single API call (seconds). Calls are also bounded by the current deadline,
+                see `deadlines.deadline_scope`.
+            hedging:
+                Hedging policy for idempotent (read) calls. Hedging is disabled if not provided.
+            scheduler:
+                Shares API rate budget between interactive and bulk calls, see `scheduling.request_priority`.
+                Calls are not rate limited if not provided.
+            concurrency:
+                Adaptive limit of calls in flight. Concurrency is not limited if not provided.
+            breakers:
+                Circuit breakers per API method. Calls are always made if not provided.
+            bulkheads:
+                Separate limits of reads and writes in flight, so that slow writes do not block reads.
+            throttling_error_codes:
+                API error codes that mean the client sends too many requests, see `concurrency.is_overload_error`.
+            oauth2_token_url:
+                OAuth2 token endpoint. Public calls use OAuth2 bearer tokens if `oauth2_creds` are provided.
+        """
         self._oauth1_creds = oauth1_creds
         self._oauth2_creds = oauth2_creds
         self._user_credentials = user_credentials
@@ -79,6 +216,21 @@ class FatSecretAPI:
         self.oauth1_user_flow_config = oauth1_user_flow_config
 
         self._user_api: Optional["FatSecretUserAPI"] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.call_timeout = call_timeout
+        self.hedging = hedging
+        self.latencies = hedging.latencies if hedging else LatencyTracker()
+        self.scheduler = scheduler
+        self.concurrency = concurrency
+        self.breakers = breakers
+        self.bulkheads = bulkheads
+        self.throttling_error_codes = frozenset(throttling_error_codes)
+        self.token_manager: Optional[OAuth2TokenManager] = None
+        if oauth2_creds:
+            self.token_manager = OAuth2TokenManager(
+                oauth2_creds, lambda: self.session, token_url=oauth2_token_url, timeout=call_timeout
+            )
 
         if not self._oauth2_creds and not self._oauth1_creds:
             raise ValueError("No credentials were provided, cannot access API")
@@ -87,6 +239,299 @@ class FatSecretAPI:
     def is_user_specified(self):
         return self._user_credentials is not None
 
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Pooled HTTP session shared by every user API created from this instance.
+        Created lazily, so that the instance can be constructed outside of running event loop.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "FatSecretAPI":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _timed_call(self, call_name: str, send: Callable[[], Awaitable[T]]) -> T:
+        started_at = time.monotonic()
+        with phase(f"call {call_name}"):
+            result = await send()
+        duration = time.monotonic() - started_at
+        self.latencies.observe(call_name, duration)
+        logger.debug("[%s] Answered in %.3fs", call_name, duration, extra=log_fields(call_name=call_name, duration=duration))
+        return result
+
+    async def _wait_for_turn(self, call_name: str, bulkhead: Optional[asyncio.Semaphore]) -> Optional[float]:
+        """
+        Waits for the rate budget, then for a bulkhead slot, then for a concurrency slot.
+
+        Slots are taken only after the rate budget is granted, so calls queued for the budget do not hold them,
+        and an interactive call is not stuck behind bulk calls that wait for their turn.
+
+        Returns:
+            Concurrency slot start time, None if concurrency is not limited.
+        """
+        if bulkhead is None and self.scheduler is None and self.concurrency is None:
+            return None
+        timeout = effective_timeout(None)
+        priority = current_priority()
+        in_bulkhead = False
+        try:
+            async with asyncio.timeout(timeout):
+                if self.scheduler is not None:
+                    await self.scheduler.acquire(priority)
+                if bulkhead is not None:
+                    await bulkhead.acquire()
+                    in_bulkhead = True
+                if self.concurrency is not None:
+                    return await self.concurrency.acquire(priority)
+                return None
+        except BaseException as e:
+            if in_bulkhead:
+                bulkhead.release()
+            if isinstance(e, TimeoutError):
+                raise DeadlineExceededError(
+                    "Deadline exceeded in the queue", call_name=call_name, timeout=timeout, run_deadline=True
+                ) from None
+            raise
+
+    async def _try_take_turn(self, bulkhead: Optional[asyncio.Semaphore]) -> Optional[float]:
+        """
+        Takes a bulkhead slot, a concurrency slot and the rate budget without waiting for any of them.
+
+        Returns:
+            Concurrency slot start time, None if concurrency is not limited.
+        Raises:
+            HedgeSkipped: any of them is not available right now, nothing is taken.
+        """
+        if bulkhead is not None:
+            if bulkhead.locked():
+                raise HedgeSkipped("bulkhead is full")
+            # Not locked, so it is taken without waiting
+            await bulkhead.acquire()
+        slot_started_at = None
+        try:
+            if self.concurrency is not None:
+                slot_started_at = self.concurrency.try_acquire()
+                if slot_started_at is None:
+                    raise HedgeSkipped("concurrency limit is reached")
+            if self.scheduler is not None and not self.scheduler.try_acquire(current_priority()):
+                raise HedgeSkipped("rate budget is spent")
+        except HedgeSkipped:
+            self._leave_turn(bulkhead, slot_started_at, None, False)
+            raise
+        return slot_started_at
+
+    def _leave_turn(
+        self, bulkhead: Optional[asyncio.Semaphore], slot_started_at: Optional[float], latency: Optional[float], overloaded: bool
+    ):
+        if bulkhead is not None:
+            bulkhead.release()
+        if slot_started_at is not None:
+            self.concurrency.release(slot_started_at, latency, overloaded)
+
+    async def _hedged_copy(self, call_name: str, send: Callable[[], Awaitable[T]], bulkhead: Optional[asyncio.Semaphore]) -> T:
+        """
+        Sends a hedged copy of a call. The copy is a request of its own: it takes the rate budget, a bulkhead
+        and a concurrency slot, so hedging never sends more than the limits allow. It does not wait for them,
+        since the first attempt may hold the last slot: if any is not available, the copy is skipped.
+
+        Raises:
+            HedgeSkipped: there is no room for the copy.
+        """
+        slot_started_at = await self._try_take_turn(bulkhead)
+        latency, overloaded = None, False
+        try:
+            started_at = time.monotonic()
+            result = await self._timed_call(call_name, send)
+            latency = time.monotonic() - started_at
+            return result
+        except Exception as e:
+            overloaded = is_overload_error(e, self.throttling_error_codes)
+            raise
+        finally:
+            self._leave_turn(bulkhead, slot_started_at, latency, overloaded)
+
+    async def _limited_call(
+        self,
+        call_name: str,
+        send: Callable[[], Awaitable[T]],
+        *,
+        idempotent: bool,
+        timeout: float,
+        run_deadline: bool,
+        bulkhead: Optional[asyncio.Semaphore] = None,
+    ) -> T:
+        try:
+            async with asyncio.timeout(timeout):
+                if idempotent and self.hedging is not None:
+                    return await self.hedging.run(
+                        call_name,
+                        lambda: self._timed_call(call_name, send),
+                        hedge=lambda: self._hedged_copy(call_name, send, bulkhead),
+                    )
+                return await self._timed_call(call_name, send)
+        except TimeoutError:
+            raise DeadlineExceededError(
+                f"No response in {timeout:.3f}s", call_name=call_name, timeout=timeout, run_deadline=run_deadline
+            ) from None
+
+    async def perform_call(
+        self,
+        call_name: str,
+        send: Callable[[], Awaitable[T]],
+        *,
+        idempotent: bool = False,
+        timeout: Optional[float] = None,
+        user_id: Optional[str] = None,
+    ) -> T:
+        """
+        Runs a single API call within its timeout and current deadline.
+
+        Args:
+            call_name:
+                API method name, used for latency statistics.
+            send:
+                Makes the actual request. May be called more than once for idempotent calls.
+            idempotent:
+                Whether it is safe to send the request twice. Only idempotent calls are hedged.
+            timeout:
+                Per-call timeout (seconds), default is `call_timeout`.
+            user_id:
+                User the call is made for, used by per-user circuit breakers.
+        Raises:
+            DeadlineExceededError: call did not finish in time or current deadline has already passed.
+            CircuitOpenError: the endpoint has been failing, the call was not made.
+        """
+        breaker = self.breakers.get(call_name, user_id) if self.breakers is not None else None
+        if breaker is not None:
+            breaker.check()
+        bulkhead = self.bulkheads.get(idempotent) if self.bulkheads is not None else None
+        in_turn, slot_started_at = False, None
+        latency, overloaded, success = None, False, None
+        try:
+            # Waiting in the queue is bounded by current deadline only, per-call timeout is for the call itself
+            with phase("queue"):
+                slot_started_at = await self._wait_for_turn(call_name, bulkhead)
+            in_turn = True
+            call_timeout = timeout if timeout is not None else self.call_timeout
+            timeout = effective_timeout(call_timeout)
+            if timeout is not None and timeout <= 0:
+                raise DeadlineExceededError(
+                    "Deadline exceeded before the call", call_name=call_name, timeout=timeout, run_deadline=True
+                )
+            run_deadline = timeout is not None and (call_timeout is None or timeout < call_timeout)
+            started_at = time.monotonic()
+            try:
+                result = await self._limited_call(
+                    call_name, send, idempotent=idempotent, timeout=timeout, run_deadline=run_deadline, bulkhead=bulkhead
+                )
+            except DeadlineExceededError as e:
+                if e.run_deadline:
+                    # Out of time budget of the run: says nothing about the endpoint
+                    raise
+                overloaded, success = True, False
+                raise
+            except Exception as e:
+                overloaded = is_overload_error(e, self.throttling_error_codes)
+                # A refused connection is no overload, but the endpoint is down all the same
+                success = not is_endpoint_failure(e, self.throttling_error_codes)
+                raise
+            latency = time.monotonic() - started_at
+            success = True
+            return result
+        finally:
+            if in_turn:
+                self._leave_turn(bulkhead, slot_started_at, latency, overloaded)
+            if breaker is not None:
+                breaker.record(success)
+
+    async def public_api_call(
+        self,
+        method: str,
+        call_name: str,
+        *,
+        data: Optional[dict] = None,
+        query: Optional[dict] = None,
+        idempotent: bool = False,
+        timeout: Optional[float] = None,
+    ) -> tuple[aiohttp.ClientResponse, dict | list]:
+        """
+        Calls a method that does not need user access using OAuth2 bearer token, so requests are not signed.
+        """
+        if self.token_manager is None:
+            raise RuntimeError("OAuth2 credentials are not provided. Cannot make public API calls.")
+        logger.debug(
+            "[%s %s] Calling public API with query=%s, data=%s",
+            method,
+            call_name,
+            query,
+            data is not None,
+            extra=log_fields(call_name=call_name),
+        )
+        url = make_call_url(self.api_url, query)
+
+        async def _send() -> tuple[aiohttp.ClientResponse, dict | list]:
+            res, res_data = await bearer_api_call(
+                method,
+                call_name,
+                access_token=await self.token_manager.get_token(),
+                session=self.session,
+                data=data,
+                api_url=url,
+            )
+            logger.debug(
+                "[%s %s] Response code=%s, data=%s",
+                method,
+                call_name,
+                res.status,
+                res_data is not None,
+                extra=log_fields(call_name=call_name),
+            )
+            if res.status == 401:
+                self.token_manager.invalidate()
+            check_api_response(call_name=call_name, response=res, data=res_data)
+            return res, res_data
+
+        return await self.perform_call(call_name, _send, idempotent=idempotent, timeout=timeout)
+
+    async def public_api_call_typed(
+        self,
+        method: str,
+        call_name: str,
+        response_type: Type[RetT],
+        *,
+        data: Optional[dict] = None,
+        query: Optional[dict] = None,
+        allow_none: bool = False,
+        idempotent: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Optional[RetT]:
+        res, data = await self.public_api_call(
+            method, call_name=call_name, data=data, query=query, idempotent=idempotent, timeout=timeout
+        )
+        return read_typed_response(method, call_name, response_type, res, data, allow_none=allow_none)
+
+    @property
+    def has_public_access(self) -> bool:
+        return self.token_manager is not None
+
+    async def get_food_v3(self, food_id: int) -> FoodInfoV3:
+        """
+        Link: https://platform.fatsecret.com/api/Default.aspx?screen=rapiref&method=food.get.v3
+
+        Same as `FatSecretUserAPI.get_food_v3`, but uses OAuth2 bearer token instead of user access.
+        """
+        return await self.public_api_call_typed("GET", "food.get.v3", FoodInfoV3, query={"food_id": food_id}, idempotent=True)
+
     async def make_authorization_url(self) -> AuthorizationRequestContext:
         client = self._make_oauth1_client(self._oauth1_creds, None)
         async with aiohttp.ClientSession() as session:
@@ -98,7 +543,7 @@ class FatSecretAPI:
                 oauth_client=client,
                 session=session,
             )
-            logger.debug(f"User authorization request token: {request_token_data}")
+            logger.debug("User authorization request token: %s", request_token_data)
             request_token = request_token_data.get("oauth_token")
             request_token_secret = request_token_data.get("oauth_token_secret")
             return AuthorizationRequestContext(
@@ -122,7 +567,7 @@ class FatSecretAPI:
                 oauth_client=client,
                 session=session,
             )
-            logger.debug(f"User authorization token: {auth_token_data}")
+            logger.debug("User authorization token: %s", auth_token_data)
         return OAuth2Credentials(client_id=auth_token_data["oauth_token"], client_secret=auth_token_data["oauth_token_secret"])
 
     @classmethod
@@ -149,56 +594,72 @@ class FatSecretAPI:
             )
         return self._user_api
 
-    def get_user_api(self, user_credentials: OAuth2Credentials) -> "FatSecretUserAPI":
+    def get_user_api(self, user_credentials: OAuth2Credentials, user_id: Optional[str] = None) -> "FatSecretUserAPI":
         return FatSecretUserAPI(
             api=self,
             oauth_client=self._make_oauth1_client(app_creds=self._oauth1_creds, user_creds=user_credentials),
             user_credentials=user_credentials,
+            user_id=user_id,
         )
 
 
 class FatSecretUserAPI:
-    def __init__(self, api: FatSecretAPI, oauth_client: oauthlib.oauth1.Client, user_credentials: OAuth2Credentials):
+    def __init__(
+        self,
+        api: FatSecretAPI,
+        oauth_client: oauthlib.oauth1.Client,
+        user_credentials: OAuth2Credentials,
+        user_id: Optional[str] = None,
+    ):
         self.api = api
         self.oauth_client = oauth_client
         self.user_credentials = user_credentials
-
-    @classmethod
-    def _check_api_response(cls, call_name: str, response: aiohttp.ClientResponse, data: dict | list):
-        if response.ok and data and "error" not in data:
-            return
-        if not data:
-            raise RequestError("No data returned", method=response.method, call_name=call_name, response=response, details=data)
-        try:
-            error = APIErrorResponse.validate(data["error"])
-        except (TypeError, ValueError, pydantic.ValidationError):
-            raise RequestError(
-                "Unexpected API response", method=response.method, call_name=call_name, response=response, details=data
-            ) from None
-        raise APIError("Failed API call", method=response.method, call_name=call_name, response=response, error=error)
+        self.user_id = user_id
+        self.profile: Optional[ProfileStatus] = None
 
     async def api_call(
-        self, method: str, call_name: str, *, data: Optional[dict] = None, query: Optional[dict] = None
+        self,
+        method: str,
+        call_name: str,
+        *,
+        data: Optional[dict] = None,
+        query: Optional[dict] = None,
+        idempotent: bool = False,
+        timeout: Optional[float] = None,
     ) -> tuple[aiohttp.ClientResponse, dict | list]:
-        logger.debug(f"[{method} {call_name}] Calling with query={query}, data={data is not None}")
-        url = self.api.api_url
-        if query:
-            url = url.update_query({k: v if not isinstance(v, DateInt) else int(v) for k, v in query.items() if v is not None})
-        # logger.debug(f"[{method} {call_name}] Calling {url}")
-        async with aiohttp.ClientSession() as session:
+        logger.debug(
+            "[%s %s] Calling with query=%s, data=%s",
+            method,
+            call_name,
+            query,
+            data is not None,
+            extra=log_fields(user=self.user_id, call_name=call_name),
+        )
+        url = make_call_url(self.api.api_url, query)
+
+        async def _send() -> tuple[aiohttp.ClientResponse, dict | list]:
             res, res_data = await oauth1_api_call(
                 "GET",
                 call_name,
                 user_oauth_token=self.user_credentials.client_id,
                 oauth_client=self.oauth_client,
-                session=session,
+                session=self.api.session,
                 data=data,
                 api_url=url,
                 raise_for_status=False,
             )
-            logger.debug(f"[{method} {call_name}] Response code={res.status}, data={res_data is not None}")
-            self._check_api_response(call_name=call_name, response=res, data=res_data)
-        return res, res_data
+            logger.debug(
+                "[%s %s] Response code=%s, data=%s",
+                method,
+                call_name,
+                res.status,
+                res_data is not None,
+                extra=log_fields(user=self.user_id, call_name=call_name),
+            )
+            check_api_response(call_name=call_name, response=res, data=res_data)
+            return res, res_data
+
+        return await self.api.perform_call(call_name, _send, idempotent=idempotent, timeout=timeout, user_id=self.user_id)
 
     async def api_call_typed(
         self,
@@ -209,26 +670,26 @@ class FatSecretUserAPI:
         data: Optional[dict] = None,
         query: Optional[dict] = None,
         allow_none: bool = False,
+        idempotent: bool = False,
+        timeout: Optional[float] = None,
     ) -> Optional[RetT]:
-        field_name = call_name.split(".", maxsplit=1)[0]
-        res, data = await self.api_call(method, call_name=call_name, data=data, query=query)
-        ret_data = data[field_name]
-        if ret_data is None:
-            if allow_none:
-                return None
-            raise RequestError("Returned no data", method=method, call_name=call_name, response=res, details=data)
-        return response_type.validate(ret_data)
+        res, data = await self.api_call(
+            method, call_name=call_name, data=data, query=query, idempotent=idempotent, timeout=timeout
+        )
+        return read_typed_response(method, call_name, response_type, res, data, allow_none=allow_none)
 
     async def get_profile(self) -> ProfileStatus:
         """
         Link: https://platform.fatsecret.com/api/Default.aspx?screen=rapiref&method=profile.get
 
         Returns general status information for a nominated user.
+        The last returned profile is kept in `profile`.
 
         Returns:
             ProfileInfo instance
         """
-        return await self.api_call_typed("GET", "profile.get", ProfileStatus)
+        self.profile = await self.api_call_typed("GET", "profile.get", ProfileStatus, idempotent=True)
+        return self.profile
 
     async def get_food_entries_v2(self, date: Optional[DateInt], food_entry_id: Optional[int] = None) -> Optional[FoodEntries]:
         """
@@ -254,6 +715,7 @@ class FatSecretUserAPI:
             FoodEntries,
             query={"date": date.to_int() if date else None, "food_entry_id": food_entry_id},
             allow_none=True,
+            idempotent=True,
         )
 
     async def get_food_v3(self, food_id: int) -> FoodInfoV3:
@@ -269,8 +731,12 @@ class FatSecretUserAPI:
         Returns:
             The food element returned contains general information about the food item
             with detailed nutritional information for each available standard serving size.
+        Note:
+            Food information is not user-specific, so the call is made with application OAuth2 token when available.
         """
-        return await self.api_call_typed("GET", "food.get.v3", FoodInfoV3, query={"food_id": food_id})
+        if self.api.has_public_access:
+            return await self.api.get_food_v3(food_id)
+        return await self.api_call_typed("GET", "food.get.v3", FoodInfoV3, query={"food_id": food_id}, idempotent=True)
 
     async def create_entry(self, request: CreateFoodEntryRequest) -> int:
         """
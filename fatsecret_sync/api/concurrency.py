@@ -0,0 +1,193 @@
+"""
+Adaptive limit of API calls in flight (AIMD, like TCP congestion control).
+
+While calls answer faster than the target latency the limit grows by about `increase` per round trip,
+and every sign of overload (timeout, 5xx, throttling) cuts it by `decrease_factor`.
+So the client runs as fast as the API allows at the moment, without a hand-tuned fixed limit.
+"""
+import asyncio
+import dataclasses
+import logging
+import time
+from collections import deque
+from typing import Collection, Optional
+
+import aiohttp
+
+from .errors import APIError, DeadlineExceededError, RequestError
+from .scheduling import Priority
+
+logger = logging.getLogger(__name__)
+
+
+def is_overload_error(error: BaseException, throttling_error_codes: Collection[int] = ()) -> bool:
+    """
+    Whether `error` means that the API is overloaded or that the client sends too much.
+    Errors caused by the request itself (bad parameters, invalid credentials) are not.
+    """
+    if isinstance(error, DeadlineExceededError):
+        # The run ran out of time, the API did not necessarily
+        return not error.run_deadline
+    if isinstance(error, (TimeoutError, aiohttp.ServerDisconnectedError)):
+        return True
+    if isinstance(error, APIError) and error.error.code in throttling_error_codes:
+        return True
+    if isinstance(error, RequestError) and error.response is not None:
+        return error.response.status == 429 or error.response.status >= 500
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    return False
+
+
+@dataclasses.dataclass
+class ConcurrencyStats:
+    limit: float
+    in_flight: int
+    queued: int
+    increases: int = 0
+    decreases: int = 0
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Usage:
+        started_at = await limiter.acquire()
+        try:
+            ...
+        finally:
+            limiter.release(started_at, latency, overloaded)
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: float = 10.0,
+        min_limit: float = 1.0,
+        max_limit: float = 100.0,
+        target_latency: float = 1.0,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+    ):
+        """
+        Args:
+            initial_limit:
+                Calls in flight allowed at start.
+            min_limit:
+                The limit never goes below it, so that the client still makes progress when the API struggles.
+            max_limit:
+                The limit never goes above it.
+            target_latency:
+                Calls faster than this (seconds) let the limit grow.
+            increase:
+                Limit growth per round trip (every call in flight answering under the target).
+            decrease_factor:
+                The limit is multiplied by this on overload.
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+
+        self._limit = min(max(initial_limit, min_limit), max_limit)
+        self._in_flight = 0
+        # Interactive waiters are served first, see `acquire`
+        self._waiters: dict[Priority, deque[asyncio.Future]] = {priority: deque() for priority in Priority}
+        self._last_decrease_at = 0.0
+        self._increases = 0
+        self._decreases = 0
+
+    @property
+    def limit(self) -> float:
+        """
+        Current limit. May be fractional, the number of calls allowed in flight is its integer part.
+        """
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stats(self) -> ConcurrencyStats:
+        return ConcurrencyStats(
+            limit=self._limit,
+            in_flight=self._in_flight,
+            queued=sum(1 for waiters in self._waiters.values() for waiter in waiters if not waiter.done()),
+            increases=self._increases,
+            decreases=self._decreases,
+        )
+
+    def _has_room(self) -> bool:
+        return self._in_flight < int(self._limit)
+
+    def _wake(self):
+        for waiters in self._waiters.values():
+            while waiters and self._has_room():
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self._in_flight += 1
+                    waiter.set_result(None)
+
+    def _has_waiters(self) -> bool:
+        return any(self._waiters.values())
+
+    async def acquire(self, priority: Priority = Priority.BULK) -> float:
+        """
+        Waits for a free slot. Interactive calls are served before bulk ones, first come first served within a priority.
+
+        Returns:
+            Time the slot was taken (monotonic), to be passed to `release`.
+        """
+        if self._has_room() and not self._has_waiters():
+            self._in_flight += 1
+            return time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over right before cancellation, give it to the next one
+                self._in_flight -= 1
+                self._wake()
+            raise
+        return time.monotonic()
+
+    def try_acquire(self) -> Optional[float]:
+        """
+        Takes a free slot without waiting. Never jumps ahead of waiting calls.
+
+        Returns:
+            Time the slot was taken (monotonic), to be passed to `release`. None if there is no free slot.
+        """
+        if not self._has_room() or self._has_waiters():
+            return None
+        self._in_flight += 1
+        return time.monotonic()
+
+    def release(self, started_at: float, latency: Optional[float], overloaded: bool):
+        """
+        Frees the slot and adjusts the limit.
+
+        Args:
+            started_at:
+                Value returned by `acquire`.
+            latency:
+                Call latency (seconds), None if the call did not finish (failed or was cancelled).
+            overloaded:
+                Whether the call failed because of overload, see `is_overload_error`.
+        """
+        saturated = self._in_flight >= int(self._limit)
+        self._in_flight -= 1
+        if overloaded:
+            # Calls started before the last decrease report the same overload, count it once
+            if started_at >= self._last_decrease_at:
+                self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+                self._last_decrease_at = time.monotonic()
+                self._decreases += 1
+                logger.info("API overloaded, concurrency limit decreased to %.1f", self._limit)
+        elif latency is not None and latency <= self.target_latency and saturated:
+            # Grow only while the limit is actually reached, otherwise it says nothing about capacity
+            self._limit = min(self.max_limit, self._limit + self.increase / self._limit)
+            self._increases += 1
+        self._wake()
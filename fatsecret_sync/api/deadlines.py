@@ -0,0 +1,66 @@
+"""
+Deadlines that propagate from a sync run down to every API call made on its behalf.
+"""
+import contextlib
+import contextvars
+import time
+from typing import Iterator, Optional
+
+_current_deadline: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar("deadline", default=None)
+
+
+class Deadline:
+    """
+    Point in (monotonic) time after which no more API calls should be made.
+    """
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    @classmethod
+    def current(cls) -> Optional["Deadline"]:
+        return _current_deadline.get()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(remaining={self.remaining():.3f}s)"
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """
+    Makes `deadline` current for every API call inside the scope (including tasks spawned from it).
+    Nested scopes can only shorten the deadline, never extend it.
+    """
+    outer = _current_deadline.get()
+    if deadline is None or (outer is not None and outer.expires_at <= deadline.expires_at):
+        yield outer
+        return
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def effective_timeout(timeout: Optional[float]) -> Optional[float]:
+    """
+    Returns:
+        The smallest of per-call `timeout` and the time left until current deadline.
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return timeout
+    if timeout is None:
+        return deadline.remaining()
+    return min(timeout, deadline.remaining())
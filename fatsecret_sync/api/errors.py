@@ -28,3 +28,21 @@ class APIError(RequestError):
     ):
         super().__init__(message=message, method=method, call_name=call_name, response=response, details=error, *args)
         self.error = error
+
+
+class DeadlineExceededError(TimeoutError):
+    def __init__(self, message: str, call_name: str, timeout: float, run_deadline: bool = False):
+        # OSError (base of TimeoutError) treats two or more arguments as errno and strerror
+        super().__init__(message)
+        self.message = message
+        self.call_name = call_name
+        self.timeout = timeout
+        self.run_deadline = run_deadline  # the call was cut short by the deadline of the run, not by its own timeout
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, message: str, call_name: str, retry_after: float):
+        super().__init__(message, call_name, retry_after)
+        self.message = message
+        self.call_name = call_name
+        self.retry_after = retry_after
@@ -0,0 +1,115 @@
+"""
+Hedged requests for idempotent API calls.
+
+If a read call did not answer within its usual (p95) latency, a second copy is sent
+and whichever answers first wins. The loser is cancelled.
+"""
+import asyncio
+import logging
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgeSkipped(Exception):
+    """
+    Raised by a hedged copy that could not be sent right away, e.g. because the client's limits are reached.
+    The first attempt then goes on alone.
+    """
+
+
+class LatencyTracker:
+    """
+    Keeps a sliding window of recent successful call latencies per API call name.
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+
+    def observe(self, call_name: str, seconds: float):
+        self._samples[call_name].append(seconds)
+
+    def count(self, call_name: str) -> int:
+        return len(self._samples.get(call_name, ()))
+
+    def percentile(self, call_name: str, q: float) -> Optional[float]:
+        samples = self._samples.get(call_name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgingPolicy:
+    def __init__(
+        self,
+        latencies: LatencyTracker,
+        *,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        default_delay: float = 1.0,
+        min_delay: float = 0.05,
+    ):
+        """
+        Args:
+            latencies:
+                Latency statistics used to pick hedging delay.
+            percentile:
+                Latency percentile after which a hedged request is sent.
+            min_samples:
+                Number of observed latencies required before trusting the percentile.
+            default_delay:
+                Hedging delay (seconds) used until enough latencies are observed.
+            min_delay:
+                Lower bound for hedging delay (seconds), so that fast endpoints do not get every call doubled.
+        """
+        self.latencies = latencies
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+
+    def delay_for(self, call_name: str) -> float:
+        if self.latencies.count(call_name) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self.latencies.percentile(call_name, self.percentile))
+
+    async def run(
+        self, call_name: str, send: Callable[[], Awaitable[T]], hedge: Optional[Callable[[], Awaitable[T]]] = None
+    ) -> T:
+        """
+        Runs `send`, and runs `hedge` (`send` by default) if the first attempt takes longer than the hedging delay.
+        `hedge` may raise `HedgeSkipped` instead of sending, e.g. when there is no room for another request:
+        it must not wait for room, since the first attempt may be the one holding it.
+
+        Returns:
+            Result of the first attempt that succeeds. If every attempt fails, the last error is raised.
+        """
+        delay = self.delay_for(call_name)
+        tasks = [asyncio.ensure_future(send())]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                logger.debug("[%s] No response after %.3fs, sending hedged request", call_name, delay)
+                tasks.append(asyncio.ensure_future((hedge or send)()))
+                pending.add(tasks[-1])
+            error: Optional[BaseException] = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    if isinstance(task.exception(), HedgeSkipped):
+                        logger.debug("[%s] Hedged request skipped: %s", call_name, task.exception())
+                        continue
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
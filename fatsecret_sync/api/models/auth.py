@@ -11,6 +11,16 @@ class OAuth2Credentials(BaseModel):
     client_secret: str
 
 
+class OAuth2Token(BaseModel):
+    access_token: str
+    token_type: str = "Bearer"
+    expires_in: int  # seconds
+    scope: str | None = None
+
+
+OAUTH2_TOKEN_URL = "https://oauth.fatsecret.com/connect/token"
+OAUTH2_DEFAULT_SCOPE = "basic"
+
 OAUTH1_REQUEST_TOKEN_URL = "https://www.fatsecret.com/oauth/request_token"
 OAUTH1_AUTHORIZE_URL = "https://www.fatsecret.com/oauth/authorize"
 OAUTH1_ACCESS_TOKEN_URL = "https://www.fatsecret.com/oauth/access_token"
@@ -73,7 +73,7 @@ class DateInt(datetime.date):
         return (self - self.EPOCH_START).days
 
 
-# TODO: add measuring system that supports conversion and multiplication factors
+# Nutrient amounts are scaled with per-food factor tables, see `core.units`
 class BasicNutritionalInfoMixin(BaseModel):
     # Metric units can be seen here
     # https://platform.fatsecret.com/api/Default.aspx?screen=rapiref&method=food.get.v3
@@ -105,3 +105,14 @@ class FullNutritionalInfoMixin(BasicNutritionalInfoMixin):
     vitamin_c: Optional[float] = None  # mg
     calcium: Optional[float] = None  # mg
     iron: Optional[float] = None  # mg
+
+    def nutrient_vector(self) -> tuple[float, ...]:
+        """
+        Returns:
+            Values of `NUTRIENT_FIELDS`, missing values are zero.
+        """
+        return tuple(float(getattr(self, name) or 0.0) for name in NUTRIENT_FIELDS)
+
+
+# Order of values in nutrient vectors
+NUTRIENT_FIELDS: tuple[str, ...] = tuple(FullNutritionalInfoMixin.__fields__)
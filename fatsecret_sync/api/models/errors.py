@@ -27,6 +27,9 @@ KNOWN_ERROR_CODES = {
     108: "Invalid Type",
 }
 
+# Errors meaning that user credentials are no longer valid (revoked or broken token)
+INVALID_USER_CREDENTIALS_ERROR_CODES = {9}
+
 
 class APIErrorResponse(BaseModel):
     code: int
@@ -35,3 +38,7 @@ class APIErrorResponse(BaseModel):
     @property
     def code_text(self) -> Optional[str]:
         return KNOWN_ERROR_CODES.get(self.code)
+
+    @property
+    def is_invalid_user_credentials(self) -> bool:
+        return self.code in INVALID_USER_CREDENTIALS_ERROR_CODES
@@ -4,12 +4,29 @@ from pydantic import BaseModel, HttpUrl
 
 from .common import FullNutritionalInfoMixin
 
+# Ounces are converted to grams, mass and volume are converted to each other only with food density
+GRAMS_PER_OUNCE = 28.349523125
+
 
 class ServingMetricUnitType(Enum):
     GRAMS = "g"
     OUNCES = "oz"
     MILLILITERS = "ml"
 
+    @property
+    def base(self) -> "ServingMetricUnitType":
+        """
+        Unit amounts of the same dimension are converted to: grams for mass, milliliters for volume.
+        """
+        return ServingMetricUnitType.MILLILITERS if self == ServingMetricUnitType.MILLILITERS else ServingMetricUnitType.GRAMS
+
+    @property
+    def base_factor(self) -> float:
+        """
+        Amount of the base unit in one unit.
+        """
+        return GRAMS_PER_OUNCE if self == ServingMetricUnitType.OUNCES else 1.0
+
 
 class ServingInfoV3(FullNutritionalInfoMixin):
     serving_id: int
@@ -0,0 +1,148 @@
+"""
+Request priorities: interactive requests (bot commands) preempt bulk ones (background sync)
+while sharing the same API rate budget.
+"""
+import asyncio
+import contextlib
+import contextvars
+import dataclasses
+import time
+from collections import deque
+from enum import Enum
+from typing import Iterator, Optional
+
+from ..utils.rate import TokenBucket
+
+
+class Priority(Enum):
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+
+_current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar("priority", default=Priority.BULK)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+@contextlib.contextmanager
+def request_priority(priority: Priority) -> Iterator[Priority]:
+    """
+    Every API call inside the scope (including tasks spawned from it) goes through the `priority` lane.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        _current_priority.reset(token)
+
+
+@dataclasses.dataclass
+class LaneStats:
+    depth: int = 0
+    granted: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.granted if self.granted else 0.0
+
+
+class _Lane:
+    def __init__(self, share: float):
+        self.share = share
+        self.queue: deque[tuple[asyncio.Future, float]] = deque()
+        self.virtual_time = 0.0
+        self.stats = LaneStats()
+
+    def prune(self):
+        while self.queue and self.queue[0][0].done():
+            self.queue.popleft()
+
+
+class PriorityScheduler:
+    """
+    Hands out the shared rate budget (token bucket) to lanes with weighted fair queueing.
+
+    When several lanes have waiting requests, each lane gets at least its share of the budget,
+    and a lane that is behind its share is served next, so a new interactive request skips
+    the whole bulk backlog. An idle lane's budget is used by the others.
+    """
+
+    def __init__(self, rate: float, burst: float, interactive_share: float = 0.8):
+        """
+        Args:
+            rate:
+                Requests per second, shared by all lanes.
+            burst:
+                Maximum number of requests sent at once after idle time.
+            interactive_share:
+                Minimum share of the budget guaranteed to interactive requests when both lanes are busy.
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self._lanes = {
+            Priority.INTERACTIVE: _Lane(interactive_share),
+            Priority.BULK: _Lane(1.0 - interactive_share),
+        }
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def stats(self) -> dict[Priority, LaneStats]:
+        for lane in self._lanes.values():
+            lane.prune()
+            lane.stats.depth = sum(1 for future, _ in lane.queue if not future.done())
+        return {priority: dataclasses.replace(lane.stats) for priority, lane in self._lanes.items()}
+
+    async def acquire(self, priority: Priority):
+        """
+        Waits until the request may be sent.
+        """
+        lane = self._lanes[priority]
+        lane.prune()
+        if not lane.queue:
+            # Lane was idle: it does not get credit for the time it did not use
+            busy = [other.virtual_time for other in self._lanes.values() if other.queue]
+            lane.virtual_time = max([lane.virtual_time] + busy)
+        future = asyncio.get_running_loop().create_future()
+        lane.queue.append((future, time.monotonic()))
+        self._dispatch()
+        await future
+
+    def try_acquire(self, priority: Priority) -> bool:
+        """
+        Takes the budget without waiting, only if no request is waiting for it.
+
+        Returns:
+            Whether the request may be sent.
+        """
+        lane = self._lanes[priority]
+        if self._pick() is not None or not self.bucket.try_acquire():
+            return False
+        lane.virtual_time += 1.0 / lane.share
+        lane.stats.granted += 1
+        return True
+
+    def _pick(self) -> Optional[_Lane]:
+        waiting = []
+        for lane in self._lanes.values():
+            lane.prune()
+            if lane.queue:
+                waiting.append(lane)
+        return min(waiting, key=lambda lane: lane.virtual_time, default=None)
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while (lane := self._pick()) is not None:
+            if not self.bucket.try_acquire():
+                self._timer = asyncio.get_running_loop().call_later(self.bucket.time_until(), self._dispatch)
+                return
+            future, enqueued_at = lane.queue.popleft()
+            wait = time.monotonic() - enqueued_at
+            lane.virtual_time += 1.0 / lane.share
+            lane.stats.granted += 1
+            lane.stats.total_wait += wait
+            lane.stats.max_wait = max(lane.stats.max_wait, wait)
+            future.set_result(None)
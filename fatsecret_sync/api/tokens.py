@@ -0,0 +1,114 @@
+"""
+OAuth2 access token management for public (non user-specific) API calls.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+import aiohttp
+import yarl
+
+from ..utils.oauth import oauth2_client_credentials_request
+from .errors import DeadlineExceededError
+from .models.auth import OAUTH2_DEFAULT_SCOPE, OAUTH2_TOKEN_URL, OAuth2Credentials, OAuth2Token
+
+logger = logging.getLogger(__name__)
+
+
+class OAuth2TokenManager:
+    """
+    Fetches and caches client credentials access token.
+
+    The token is refreshed in background once it gets within `refresh_margin` of its expiration,
+    so callers keep using the current token meanwhile. Only one refresh request is in flight at a time,
+    every caller that needs a fresh token waits for that same request.
+    """
+
+    def __init__(
+        self,
+        credentials: OAuth2Credentials,
+        session: Callable[[], aiohttp.ClientSession],
+        *,
+        token_url: yarl.URL | str = OAUTH2_TOKEN_URL,
+        scope: Optional[str] = OAUTH2_DEFAULT_SCOPE,
+        refresh_margin: float = 300.0,
+        timeout: Optional[float] = 30.0,
+    ):
+        """
+        Args:
+            credentials:
+                Application OAuth2 credentials.
+            session:
+                Returns HTTP session to request tokens with.
+            token_url:
+                OAuth2 token endpoint.
+            scope:
+                Requested token scope.
+            refresh_margin:
+                How long (seconds) before expiration the token is refreshed.
+            timeout:
+                Timeout of a token request (seconds), so that a hung endpoint does not hold up every waiting call.
+        """
+        self.credentials = credentials
+        self._session = session
+        self.token_url = yarl.URL(token_url)
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self._token: Optional[OAuth2Token] = None
+        self._expires_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    @property
+    def expires_in(self) -> float:
+        return max(0.0, self._expires_at - time.monotonic())
+
+    async def get_token(self) -> str:
+        """
+        Returns:
+            Valid access token. Waits for a refresh only if there is no valid token at hand.
+        """
+        if self._token is None or self.expires_in <= 0:
+            token = await asyncio.shield(self._start_refresh())
+            return token.access_token
+        if self.expires_in <= self.refresh_margin:
+            self._start_refresh()
+        return self._token.access_token
+
+    def invalidate(self):
+        """Forgets current token, e.g. after API rejected it."""
+        self._token = None
+        self._expires_at = 0.0
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._fetch())
+            self._refresh.add_done_callback(self._on_refreshed)
+        return self._refresh
+
+    async def _fetch(self) -> OAuth2Token:
+        requested_at = time.monotonic()
+        try:
+            async with asyncio.timeout(self.timeout):
+                data = await oauth2_client_credentials_request(
+                    self.token_url,
+                    self.credentials.client_id,
+                    self.credentials.client_secret,
+                    self.scope,
+                    session=self._session(),
+                )
+        except TimeoutError:
+            raise DeadlineExceededError(
+                f"No OAuth2 token in {self.timeout:.3f}s", call_name="oauth2.token", timeout=self.timeout
+            ) from None
+        token = OAuth2Token.validate(data)
+        self._token = token
+        self._expires_at = requested_at + token.expires_in
+        logger.debug("Obtained OAuth2 access token, expires in %ss", token.expires_in)
+        return token
+
+    @staticmethod
+    def _on_refreshed(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Failed to refresh OAuth2 access token", exc_info=task.exception())
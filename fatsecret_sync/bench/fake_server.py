@@ -0,0 +1,132 @@
+"""
+Local fake of the FatSecret REST API with in-memory diaries, for benchmarks of the whole client stack.
+
+Only the methods used by sync are implemented. Requests are not checked for valid signatures,
+but are signed by the client as usual, so signing cost is included.
+"""
+import itertools
+import json
+import random
+from collections import defaultdict
+from typing import Optional
+
+from aiohttp import web
+
+MEALS = ("breakfast", "lunch", "dinner", "other")
+
+
+def make_food_entry_data(rnd: random.Random, food_entry_id: int, date_int: int, food_id: Optional[int] = None) -> dict:
+    """
+    Food entry as returned by the API: every value is a string.
+    """
+    food_id = food_id if food_id is not None else rnd.randint(1, 5000)
+    calories = rnd.randint(10, 900)
+    return {
+        "food_entry_id": str(food_entry_id),
+        "food_entry_description": f"{rnd.randint(1, 4)} serving Food {food_id}",
+        "date_int": str(date_int),
+        "meal": rnd.choice(MEALS),
+        "food_id": str(food_id),
+        "serving_id": str(food_id * 10 + rnd.randint(0, 2)),
+        "number_of_units": f"{rnd.randint(1, 8) * 0.5:.3f}",
+        "food_entry_name": f"Food {food_id}",
+        "calories": str(calories),
+        "carbohydrate": f"{calories * 0.1:.2f}",
+        "protein": f"{calories * 0.05:.2f}",
+        "fat": f"{calories * 0.03:.2f}",
+        "saturated_fat": f"{calories * 0.01:.2f}",
+        "sodium": str(rnd.randint(0, 800)),
+        "fiber": f"{rnd.random() * 5:.1f}",
+        "sugar": f"{rnd.random() * 20:.1f}",
+    }
+
+
+class FakeFatSecret:
+    """
+    Diaries are keyed by user OAuth token and date.
+
+    Usage:
+        async with FakeFatSecret() as fake:
+            api = FatSecretAPI(..., api_url=fake.api_url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.host = host
+        self.diaries: dict[tuple[str, int], dict[int, dict]] = defaultdict(dict)
+        self.calls: dict[str, int] = defaultdict(int)
+        self._ids = itertools.count(10_000_000)
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+
+    @property
+    def api_url(self) -> str:
+        return f"http://{self.host}:{self.port}/rest/server.api"
+
+    def set_diary(self, user_token: str, date_int: int, entries: list[dict]):
+        self.diaries[user_token, date_int] = {int(entry["food_entry_id"]): dict(entry) for entry in entries}
+
+    def _find_entry(self, user_token: str, food_entry_id: int) -> Optional[tuple[tuple[str, int], dict]]:
+        for key, diary in self.diaries.items():
+            if key[0] == user_token and food_entry_id in diary:
+                return key, diary[food_entry_id]
+        return None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        query = request.query
+        method = query.get("method", "")
+        token = query.get("oauth_token", "")
+        self.calls[method] += 1
+        match method:
+            case "food_entries.get.v2":
+                entries = list(self.diaries.get((token, int(query["date"])), {}).values())
+                data = {"food_entries": {"food_entry": entries} if entries else None}
+            case "food_entry.create":
+                food_entry_id = next(self._ids)
+                date_int = int(query["date"])
+                entry = make_food_entry_data(random.Random(food_entry_id), food_entry_id, date_int, int(query["food_id"]))
+                entry.update(
+                    serving_id=query["serving_id"],
+                    number_of_units=query["number_of_units"],
+                    meal=query["meal"],
+                    food_entry_name=query["food_entry_name"],
+                )
+                self.diaries[token, date_int][food_entry_id] = entry
+                data = {"food_entry_id": {"value": str(food_entry_id)}}
+            case "food_entry.edit":
+                found = self._find_entry(token, int(query["food_entry_id"]))
+                if found is not None:
+                    found[1].update(
+                        {k: query[k] for k in ("serving_id", "number_of_units", "meal", "food_entry_name") if k in query}
+                    )
+                data = {"success": {"value": 1 if found else 0}}
+            case "food_entry.delete":
+                found = self._find_entry(token, int(query["food_entry_id"]))
+                if found is not None:
+                    del self.diaries[found[0]][int(query["food_entry_id"])]
+                data = {"success": {"value": 1 if found else 0}}
+            case "profile.get":
+                data = {"profile": {"weight_measure": "Kg", "height_measure": "Cm"}}
+            case _:
+                data = {"error": {"code": 10, "message": f"Unknown method: {method}"}}
+        return web.Response(body=json.dumps(data).encode(), content_type="application/json")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route("*", "/rest/server.api", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeFatSecret":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
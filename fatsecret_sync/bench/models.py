@@ -0,0 +1,38 @@
+import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class BenchmarkResult(BaseModel):
+    name: str
+    operations: int = Field(description="Operations in one measured batch")
+    seconds: float = Field(description="Duration of the fastest batch")
+    throughput: float = Field(description="Operations per second in the fastest batch")
+
+
+class BenchmarkReport(BaseModel):
+    created_at: datetime.datetime
+    python: str
+    platform: str
+    results: dict[str, BenchmarkResult]
+
+
+class BenchmarkComparison(BaseModel):
+    name: str
+    baseline: Optional[float] = Field(description="Baseline throughput, None if the benchmark is new")
+    current: Optional[float] = Field(description="Current throughput, None if the benchmark was removed")
+    threshold: float
+
+    @property
+    def change(self) -> Optional[float]:
+        """
+        Relative throughput change, negative if slower.
+        """
+        if not self.baseline or self.current is None:
+            return None
+        return self.current / self.baseline - 1.0
+
+    @property
+    def regressed(self) -> bool:
+        return self.change is not None and self.change < -self.threshold
@@ -0,0 +1,216 @@
+"""
+Benchmarks of the sync hot paths, from request signing to a full `sync_user` over a local fake API.
+
+Every benchmark runs a batch of operations several times and keeps the fastest batch,
+which is the least disturbed by the rest of the machine.
+"""
+import asyncio
+import dataclasses
+import json
+import logging
+import platform
+import random
+import sys
+import time
+from typing import Awaitable, Callable, Iterable, Optional
+
+import yarl
+from kily.common.utils.dt import get_now
+
+from ..api.client import FatSecretAPI
+from ..api.models.auth import OAuth1Credentials, OAuth2Credentials
+from ..api.models.common import DateInt
+from ..api.models.food_entry import FoodEntries, FoodEntry
+from ..core.sync import merge_food_entries, sync_user
+from ..core.utils import make_diary_print
+from ..utils.oauth import sign_oauth1_url
+from .fake_server import FakeFatSecret, make_food_entry_data
+from .models import BenchmarkComparison, BenchmarkReport, BenchmarkResult
+
+logger = logging.getLogger(__name__)
+
+DATE = DateInt(year=2023, month=5, day=1)
+DIARY_SIZES = (10, 100, 1000)
+APP_CREDS = OAuth1Credentials(consumer_key="bench-consumer", consumer_secret="bench-secret")
+
+
+@dataclasses.dataclass
+class Benchmark:
+    name: str
+    run: Callable[[], Awaitable[int]]  # runs one batch, returns the number of operations
+    setup: Optional[Callable[[], Awaitable[None]]] = None
+    teardown: Optional[Callable[[], Awaitable[None]]] = None
+
+
+def make_diary(rnd: random.Random, size: int, first_id: int = 1) -> list[dict]:
+    return [make_food_entry_data(rnd, first_id + i, DATE.to_int()) for i in range(size)]
+
+
+def make_target_diary(rnd: random.Random, origin: list[dict], first_id: int) -> list[dict]:
+    """
+    Target diary that mostly matches origin: 80% same entries, 10% with other amount, 10% missing, plus a few extra.
+    """
+    target = []
+    for i, entry in enumerate(origin):
+        kind = rnd.random()
+        if kind < 0.1:
+            continue
+        copy = dict(entry, food_entry_id=str(first_id + i))
+        if kind < 0.2:
+            copy["number_of_units"] = f"{float(entry['number_of_units']) + 0.5:.3f}"
+        target.append(copy)
+    return target + make_diary(rnd, max(1, len(origin) // 20), first_id + len(origin))
+
+
+def _sign_benchmark(batch: int = 1000) -> Benchmark:
+    api = FatSecretAPI(APP_CREDS, None)
+    oauth_client = api.get_user_api(OAuth2Credentials(client_id="token", client_secret="secret")).oauth_client
+    url = yarl.URL(api.api_url).update_query(format="json", oauth_token="token", method="food_entries.get.v2", date=19478)
+
+    async def run() -> int:
+        for _ in range(batch):
+            sign_oauth1_url("GET", url, oauth_client=oauth_client)
+        return batch
+
+    return Benchmark("oauth1_sign", run)
+
+
+def _parse_benchmark(size: int = 50, batch: int = 200) -> Benchmark:
+    payload = json.dumps({"food_entries": {"food_entry": make_diary(random.Random(1), size)}}).encode()
+
+    async def run() -> int:
+        for _ in range(batch):
+            FoodEntries.validate(json.loads(payload)["food_entries"])
+        return batch
+
+    return Benchmark(f"parse_food_entries[{size}]", run)
+
+
+def _merge_benchmark(size: int) -> Benchmark:
+    rnd = random.Random(size)
+    origin_data = make_diary(rnd, size)
+    origin = [FoodEntry.validate(entry) for entry in origin_data]
+    target = [FoodEntry.validate(entry) for entry in make_target_diary(rnd, origin_data, 1_000_000)]
+    batch = max(1, 20_000 // size)
+
+    async def run() -> int:
+        for _ in range(batch):
+            merge_food_entries(origin, target, keep_unique_target_food=False)
+        return batch
+
+    return Benchmark(f"merge_food_entries[{size}]", run)
+
+
+def _diary_print_benchmark(size: int = 50, batch: int = 500) -> Benchmark:
+    entries = [FoodEntry.validate(entry) for entry in make_diary(random.Random(2), size)]
+
+    async def run() -> int:
+        for _ in range(batch):
+            make_diary_print(entries)
+        return batch
+
+    return Benchmark(f"make_diary_print[{size}]", run)
+
+
+def _sync_user_benchmark(size: int = 20, batch: int = 10) -> Benchmark:
+    fake = FakeFatSecret()
+    rnd = random.Random(3)
+    origin = make_diary(rnd, size)
+    target = make_target_diary(rnd, origin, 1_000_000)
+    state: dict[str, FatSecretAPI] = {}
+
+    async def setup():
+        await fake.start()
+        state["api"] = FatSecretAPI(APP_CREDS, None, api_url=fake.api_url)
+        fake.set_diary("origin", DATE.to_int(), origin)
+
+    async def run() -> int:
+        api = state["api"]
+        origin_api = api.get_user_api(OAuth2Credentials(client_id="origin", client_secret="secret"), user_id="origin")
+        target_api = api.get_user_api(OAuth2Credentials(client_id="target", client_secret="secret"), user_id="target")
+        for _ in range(batch):
+            fake.set_diary("target", DATE.to_int(), target)
+            await sync_user(origin_api, target_api, DATE, keep_unique_target_food=False)
+        return batch
+
+    async def teardown():
+        await state["api"].close()
+        await fake.stop()
+
+    return Benchmark(f"sync_user[{size}]", run, setup, teardown)
+
+
+def make_benchmarks() -> list[Benchmark]:
+    return [
+        _sign_benchmark(),
+        _parse_benchmark(),
+        *(_merge_benchmark(size) for size in DIARY_SIZES),
+        _diary_print_benchmark(),
+        _sync_user_benchmark(),
+    ]
+
+
+async def run_benchmark(benchmark: Benchmark, repeat: int = 5) -> BenchmarkResult:
+    """
+    Runs a warm-up batch, then `repeat` measured batches, and keeps the fastest one.
+    Logging below WARNING is disabled meanwhile, so that results do not depend on log configuration.
+    """
+    if benchmark.setup is not None:
+        await benchmark.setup()
+    logging.disable(logging.INFO)
+    try:
+        await benchmark.run()
+        best: Optional[tuple[int, float]] = None
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            operations = await benchmark.run()
+            seconds = time.perf_counter() - started_at
+            if best is None or operations / seconds > best[0] / best[1]:
+                best = (operations, seconds)
+    finally:
+        logging.disable(logging.NOTSET)
+        if benchmark.teardown is not None:
+            await benchmark.teardown()
+    operations, seconds = best
+    return BenchmarkResult(name=benchmark.name, operations=operations, seconds=seconds, throughput=operations / seconds)
+
+
+async def run_benchmarks(names: Iterable[str] = (), repeat: int = 5) -> BenchmarkReport:
+    """
+    Args:
+        names:
+            Substrings of benchmark names to run, every benchmark is run if empty.
+        repeat:
+            Measured batches per benchmark.
+    """
+    names = list(names)
+    results = {}
+    for benchmark in make_benchmarks():
+        if names and not any(name in benchmark.name for name in names):
+            continue
+        result = await run_benchmark(benchmark, repeat)
+        logger.info("%s: %.1f ops/s", result.name, result.throughput)
+        results[result.name] = result
+    return BenchmarkReport(
+        created_at=get_now(),
+        python=sys.version.split()[0],
+        platform=platform.platform(),
+        results=results,
+    )
+
+
+def compare_reports(baseline: BenchmarkReport, current: BenchmarkReport, threshold: float = 0.1) -> list[BenchmarkComparison]:
+    """
+    Args:
+        threshold:
+            Relative throughput drop (0.1 is 10%) after which a benchmark is considered regressed.
+    """
+    return [
+        BenchmarkComparison(
+            name=name,
+            baseline=baseline.results[name].throughput if name in baseline.results else None,
+            current=current.results[name].throughput if name in current.results else None,
+            threshold=threshold,
+        )
+        for name in list(baseline.results) + [name for name in current.results if name not in baseline.results]
+    ]
@@ -0,0 +1,99 @@
+"""
+Telegram bot running in webhook mode on an aiohttp server.
+"""
+import asyncio
+import contextlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from ..core.models.config import AppConfig
+from ..core.reload import HotReloader
+from .handlers import router
+from .services import BotServices
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def _make_secret_token_middleware(path: str, secret_token: str):
+    @web.middleware
+    async def _check_secret_token(request: web.Request, handler):
+        if request.path == path and request.headers.get(SECRET_TOKEN_HEADER) != secret_token:
+            raise web.HTTPUnauthorized()
+        return await handler(request)
+
+    return _check_secret_token
+
+
+class BotApp:
+    def __init__(self, config: AppConfig, services: Optional[BotServices] = None, config_path: Optional[Path] = None):
+        """
+        Args:
+            config:
+                Application config.
+            services:
+                Services shared by handlers, created from `config` if not provided.
+            config_path:
+                Config file to watch: changes of it and of user credentials are applied without restart.
+        """
+        if config.telegram.webhook.url is None:
+            raise ValueError("Telegram webhook URL is not configured, cannot start the bot")
+        self.config = config
+        self.services = services or BotServices.create(config)
+        self.bot = Bot(config.telegram.bot_token)
+        self.dispatcher = Dispatcher(services=self.services)
+        self.dispatcher.include_router(router)
+        self.dispatcher.startup.register(self._on_startup)
+        self.dispatcher.shutdown.register(self._on_shutdown)
+        self.reloader: Optional[HotReloader] = None
+        if config_path is not None:
+            self.reloader = HotReloader(config_path, config, self.services.creds, listeners=[self.services])
+        self._reloader_task: Optional[asyncio.Task] = None
+        self._weights_task: Optional[asyncio.Task] = None
+
+    @property
+    def webhook_url(self) -> str:
+        webhook = self.config.telegram.webhook
+        return webhook.url if webhook.url.endswith(webhook.path) else webhook.url.rstrip("/") + webhook.path
+
+    def make_app(self) -> web.Application:
+        webhook = self.config.telegram.webhook
+        middlewares = [_make_secret_token_middleware(webhook.path, webhook.secret_token)] if webhook.secret_token else []
+        app = web.Application(middlewares=middlewares)
+        SimpleRequestHandler(dispatcher=self.dispatcher, bot=self.bot).register(app, path=webhook.path)
+        setup_application(app, self.dispatcher, bot=self.bot)
+        return app
+
+    async def _on_startup(self, bot: Bot):
+        await bot.set_webhook(self.webhook_url, secret_token=self.config.telegram.webhook.secret_token)
+        me = await bot.get_me()
+        logger.info("Successfully logged in as @%s (https://t.me/%s)", me.username, me.username)
+        await self.services.warm_up()
+        # Credentials were just checked by warm-up
+        self.services.start_daemon(check_credentials=False)
+        if self.reloader is not None:
+            self._reloader_task = asyncio.create_task(self.reloader.run())
+        if self.config.weights.enabled:
+            self._weights_task = asyncio.create_task(self.services.refresh_weights_periodically())
+
+    async def _on_shutdown(self, bot: Bot):
+        if self._weights_task is not None:
+            self._weights_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._weights_task
+        if self._reloader_task is not None:
+            self.reloader.stop()
+            await self._reloader_task
+        await self.services.stop_daemon()
+        await self.services.api.close()
+        await bot.session.close()
+
+    def run(self):
+        webhook = self.config.telegram.webhook
+        web.run_app(self.make_app(), host=webhook.host, port=webhook.port)
@@ -0,0 +1,351 @@
+"""
+Telegram bot command handlers.
+"""
+import datetime
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+import yarl
+from aiogram import BaseMiddleware, Bot, F, Router
+from aiogram.filters import Command, CommandObject, Filter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import Message, TelegramObject
+from kily.common.utils.dt import get_now
+
+from ..api.breakers import CircuitState
+from ..api.client import AuthorizationRequestContext
+from ..api.scheduling import Priority, request_priority
+from ..core.events import SyncListeners
+from ..core.health import CredentialState
+from ..core.models.creds import UserAuthInfo, UserBasicInfo, UserCreds
+from ..core.models.summary import DailySummary, PeriodSummary
+from ..core.models.weights import GoalProgress, WeightTrend
+from ..core.sync import sync_range
+from .progress import ProgressReporter
+from .services import BotServices, get_today
+
+logger = logging.getLogger(__name__)
+
+router = Router(name=__name__)
+
+WEIGHT_TREND_DAYS = 30
+
+
+class IsAdmin(Filter):
+    async def __call__(self, message: Message, services: BotServices) -> bool:
+        return message.from_user is not None and str(message.from_user.id) == str(services.config.telegram.admin_id)
+
+
+class InteractivePriorityMiddleware(BaseMiddleware):
+    """
+    API calls made while handling a message go through the interactive lane, ahead of background sync.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        with request_priority(Priority.INTERACTIVE):
+            return await handler(event, data)
+
+
+router.message.filter(IsAdmin())
+router.message.middleware(InteractivePriorityMiddleware())
+
+
+class RegistrationStates(StatesGroup):
+    waiting_for_pin = State()
+
+
+def format_food_grams(food_grams: dict[int, float], names: dict[int, str], limit: int = 5) -> Optional[str]:
+    """
+    Returns:
+        Heaviest foods, None if no food could be converted to grams.
+    """
+    if not food_grams:
+        return None
+    heaviest = sorted(food_grams.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return "  ⚖️ " + ", ".join(f"{names.get(food_id, food_id)} {grams:.0f}g" for food_id, grams in heaviest)
+
+
+def format_day(summary: DailySummary, names: Optional[dict[int, str]] = None) -> str:
+    lines = [
+        f"{summary.user_id}, {summary.date.isoformat()}: {summary.calories}kCal "
+        f"(P={summary.protein:.1f}g, F={summary.fat:.1f}g, C={summary.carbohydrate:.1f}g)"
+    ]
+    lines += [f"  - {meal}: {calories}kCal" for meal, calories in summary.meals.items()]
+    if (foods := format_food_grams(summary.food_grams, names or {})) is not None:
+        lines.append(foods)
+    return "\n".join(lines)
+
+
+def format_period(summary: PeriodSummary, names: Optional[dict[int, str]] = None) -> str:
+    lines = [
+        f"{summary.user_id}, {summary.from_date.isoformat()} - {summary.to_date.isoformat()}: {summary.calories}kCal "
+        f"(P={summary.protein:.1f}g, F={summary.fat:.1f}g, C={summary.carbohydrate:.1f}g), "
+        f"{summary.average_calories:.0f}kCal per day"
+    ]
+    lines += [f"  - {day.date.isoformat()}: {day.calories}kCal" for day in summary.days]
+    if (foods := format_food_grams(summary.food_grams, names or {})) is not None:
+        lines.append(foods)
+    if summary.missing_days:
+        lines.append(f"  Not synced yet: {', '.join(d.isoformat() for d in summary.missing_days)}")
+    return "\n".join(lines)
+
+
+def format_weight(user_id: str, trend: Optional[WeightTrend], goal: Optional[GoalProgress]) -> str:
+    if trend is None:
+        return f"{user_id}: no weigh-ins in the last {WEIGHT_TREND_DAYS} days"
+    lines = [
+        f"{user_id}, {trend.from_date.isoformat()} - {trend.to_date.isoformat()}: {trend.last_kg:.1f}kg "
+        f"({trend.change_kg:+.1f}kg over {trend.points} weigh-ins"
+        + (f", {trend.kg_per_week:+.2f}kg per week)" if trend.kg_per_week is not None else ")")
+    ]
+    if goal is not None:
+        lines.append(
+            f"  🎯 Goal {goal.goal_kg:.1f}kg: {goal.progress:.0%} done since {goal.start_date.isoformat()}, "
+            f"{abs(goal.remaining_kg):.1f}kg to go" + (f", expected by {goal.eta.isoformat()}" if goal.eta else "")
+        )
+    return "\n".join(lines)
+
+
+def _select_users(services: BotServices, args: Optional[str]) -> list[str]:
+    if args and args.strip():
+        return [user_id for user_id in args.split() if user_id in services.user_apis]
+    return list(services.user_apis)
+
+
+@router.message(Command("start", "help"))
+async def start(message: Message, services: BotServices):
+    await services.answer(
+        message,
+        "👋 Hi! I sync FatSecret diaries between users.\n"
+        "/status - sync status\n"
+        "/today [user] - today's summary\n"
+        "/week [user] - summary of the last 7 days\n"
+        "/weight [user] - weight trend and goal progress\n"
+        "/food [user] <query> - find foods logged before, the user's favourites first\n"
+        "/sync <from user> <to user> [from date] [to date] - sync diaries now\n"
+        "/check - check credentials of every user\n"
+        "/register <name> - add another user\n"
+        "/cancel - cancel current action",
+    )
+
+
+@router.message(Command("status"))
+async def status(message: Message, services: BotServices):
+    lines = [f"👥 Users: {', '.join(services.user_apis) or 'none'}"]
+    if services.health.invalid_users:
+        lines.append(f"⚠️ Invalid credentials: {', '.join(services.health.invalid_users)}")
+    lines += [f"🔁 {pair.origin} → {pair.target}" for pair in services.config.sync.pairs]
+    if services.daemon is not None:
+        for state in sorted(services.daemon.states.values(), key=lambda s: (s.origin, s.date)):
+            lines.append(
+                f"  {state.origin} {state.date.isoformat()}: synced to {len(state.synced)} targets, "
+                f"unchanged for {state.unchanged_polls} polls"
+            )
+    else:
+        lines.append("Sync daemon is not running: no sync pairs configured")
+    if services.api.scheduler is not None:
+        for priority, stats in services.api.scheduler.stats().items():
+            lines.append(
+                f"🚦 {priority.value}: {stats.depth} queued, {stats.granted} sent, "
+                f"wait avg {stats.average_wait:.2f}s, max {stats.max_wait:.2f}s"
+            )
+    if services.api.concurrency is not None:
+        stats = services.api.concurrency.stats()
+        lines.append(f"📶 Concurrency limit {stats.limit:.1f}: {stats.in_flight} in flight, {stats.queued} queued")
+    if services.api.breakers is not None:
+        for stats in services.api.breakers.stats():
+            if stats.state != CircuitState.CLOSED:
+                lines.append(f"⛔ {stats.key}: {stats.state.value}, retry in {stats.retry_after:.0f}s")
+    await services.answer(message, "\n".join(lines))
+
+
+@router.message(Command("check"))
+async def check(message: Message, services: BotServices):
+    statuses = await services.health.check_all(services.user_apis.values())
+    icons = {CredentialState.OK: "✅", CredentialState.INVALID: "❌", CredentialState.UNKNOWN: "❔"}
+    lines = [
+        f"{icons[status.state]} {user_id}" + (f": {status.error}" if status.error else "") for user_id, status in statuses.items()
+    ]
+    await services.answer(message, "\n".join(lines) or "🤷 No users registered")
+
+
+@router.message(Command("today"))
+async def today(message: Message, command: CommandObject, services: BotServices):
+    users = _select_users(services, command.args)
+    if not users:
+        await services.answer(message, "🤷 No such users")
+        return
+    date = get_today()
+    summaries = [await services.get_day_summary(user_id, date) for user_id in users]
+    await services.answer(message, "\n\n".join(format_day(summary, services.food_index.names) for summary in summaries))
+
+
+@router.message(Command("week"))
+async def week(message: Message, command: CommandObject, services: BotServices):
+    users = _select_users(services, command.args)
+    if not users:
+        await services.answer(message, "🤷 No such users")
+        return
+    date = get_today()
+    await services.answer(
+        message,
+        "\n\n".join(format_period(services.get_week_summary(user_id, date), services.food_index.names) for user_id in users),
+    )
+
+
+@router.message(Command("weight"))
+async def weight(message: Message, command: CommandObject, services: BotServices):
+    if not services.config.weights.enabled:
+        await services.answer(message, "🤷 Weight history is disabled in the config")
+        return
+    users = _select_users(services, command.args)
+    if not users:
+        await services.answer(message, "🤷 No such users")
+        return
+    if services.weights.is_stale(services.config.weights.refresh_interval):
+        await services.refresh_weights()
+    date = get_today()
+    await services.answer(
+        message,
+        "\n\n".join(
+            format_weight(
+                user_id, services.weights.trend(user_id, date, days=WEIGHT_TREND_DAYS), services.weights.goal_progress(user_id)
+            )
+            for user_id in users
+        ),
+    )
+
+
+def _split_food_args(services: BotServices, args: Optional[str]) -> tuple[Optional[str], str]:
+    """
+    Returns:
+        User whose foods are ranked first (named by the first word, or the only registered user) and the query.
+    """
+    words = (args or "").split()
+    if len(words) > 1 and words[0] in services.user_apis:
+        return words[0], " ".join(words[1:])
+    user_id = next(iter(services.user_apis)) if len(services.user_apis) == 1 else None
+    return user_id, " ".join(words)
+
+
+@router.message(Command("food"))
+async def food(message: Message, command: CommandObject, services: BotServices):
+    user_id, query = _split_food_args(services, command.args)
+    if not query:
+        await services.answer(message, "Usage: /food [user] <query>, e.g. /food alice chick bre")
+        return
+    results = services.food_index.search(query, user_id=user_id)
+    if not results:
+        await services.answer(message, f"🤷 No foods matching '{query}' among {len(services.food_index)} known ones")
+        return
+    await services.answer(
+        message, "\n".join(f"🍽 {result.name} (food_id={result.food_id}, logged {result.frequency} times)" for result in results)
+    )
+
+
+@router.message(Command("sync"))
+async def sync(message: Message, command: CommandObject, bot: Bot, services: BotServices):
+    args = (command.args or "").split()
+    if len(args) not in (2, 3, 4):
+        await services.answer(message, "Usage: /sync <from user> <to user> [from date] [to date], dates are YYYY-MM-DD")
+        return
+    origin, target = args[:2]
+    unknown = [user_id for user_id in (origin, target) if user_id not in services.user_apis]
+    if unknown:
+        await services.answer(message, f"🤷 No such users: {', '.join(unknown)}")
+        return
+    try:
+        dates = [datetime.date.fromisoformat(arg) for arg in args[2:]]
+    except ValueError:
+        await services.answer(message, "🤔 Could not parse dates, use YYYY-MM-DD")
+        return
+    from_date = dates[0] if dates else get_today()
+    to_date = dates[1] if len(dates) > 1 else get_today()
+
+    async def _sync():
+        progress = ProgressReporter(
+            bot,
+            message.chat.id,
+            f"Syncing {origin} → {target}, {from_date.isoformat()} - {to_date.isoformat()}",
+            bucket=services.chat_limiter.get(message.chat.id),
+            total_days=(to_date - from_date).days + 1,
+        )
+        # noinspection PyBroadException
+        try:
+            async with progress:
+                # Started by a command, but may take long: do not hold up other commands
+                with request_priority(Priority.BULK):
+                    await sync_range(
+                        services.user_apis[origin],
+                        services.user_apis[target],
+                        from_date,
+                        to_date,
+                        listener=SyncListeners([services.listeners, progress]),
+                        converter=services.converter,
+                    )
+        except Exception:
+            logger.warning("Failed to sync %s -> %s", origin, target, exc_info=True)
+
+    services.run_in_background(_sync())
+
+
+@router.message(Command("cancel"))
+async def cancel(message: Message, state: FSMContext, services: BotServices):
+    await state.clear()
+    await services.answer(message, "👌 Cancelled")
+
+
+@router.message(Command("register"))
+async def register(message: Message, command: CommandObject, state: FSMContext, services: BotServices):
+    user_id = (command.args or "").strip()
+    if not user_id:
+        await services.answer(message, "Please name the user: /register <name>")
+        return
+    if user_id in services.creds.users:
+        await services.answer(message, f"🤔 User {user_id} is already registered")
+        return
+    context = await services.api.make_authorization_url()
+    await state.set_state(RegistrationStates.waiting_for_pin)
+    await state.update_data(
+        user_id=user_id,
+        url=str(context.url),
+        request_token=context.request_token,
+        request_token_secret=context.request_token_secret,
+    )
+    await services.answer(
+        message,
+        f"👼 Okay, let's add another user! Here's the link: {context.url}\n"
+        "Please keep in mind that the link expires in 30 minutes.",
+    )
+
+
+@router.message(RegistrationStates.waiting_for_pin, F.text)
+async def register_pin(message: Message, state: FSMContext, services: BotServices):
+    data = await state.get_data()
+    context = AuthorizationRequestContext(yarl.URL(data["url"]), data["request_token"], data["request_token_secret"])
+    # noinspection PyBroadException
+    try:
+        user_credentials = await services.api.authorize_user(message.text.strip(), context)
+        await services.api.get_user_api(user_credentials, user_id=data["user_id"]).get_profile()
+    except Exception:
+        logger.warning("Failed to register user %s", data["user_id"], exc_info=True)
+        await services.answer(message, "❌ Oh, no! PIN is incorrect or the link is expired.\nTry again?")
+        return
+    services.add_user(
+        UserCreds(
+            info=UserBasicInfo(id=data["user_id"], name=data["user_id"]),
+            auth=UserAuthInfo(
+                obtained_at=get_now(),
+                oauth_token=user_credentials.client_id,
+                oauth_token_secret=user_credentials.client_secret,
+            ),
+        )
+    )
+    await state.clear()
+    await services.answer(message, "✅ Great, registration finished and the user is checked!")
@@ -0,0 +1,132 @@
+"""
+Sync progress streaming to Telegram: one status message, edited periodically.
+"""
+import asyncio
+import contextlib
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+
+from ..api.models.common import DateInt
+from ..api.models.food_entry import FoodEntry
+from ..core.events import SyncListener
+from ..core.models.sync import SyncDelta
+from ..utils.rate import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class ChatRateLimiter:
+    """
+    Token bucket per chat, shared by everything that sends or edits messages in that chat:
+    progress updates and command replies (`BotServices.answer`).
+    Telegram allows about one message per second in a chat, so the default is below that.
+    """
+
+    def __init__(self, rate: float = 0.5, capacity: float = 3.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: dict[int | str, TokenBucket] = {}
+
+    def get(self, chat_id: int | str) -> TokenBucket:
+        if chat_id not in self._buckets:
+            self._buckets[chat_id] = TokenBucket(self.rate, self.capacity)
+        return self._buckets[chat_id]
+
+
+class ProgressReporter(SyncListener):
+    """
+    Collects sync events and coalesces them into edits of a single status message.
+
+    Event handlers only update counters; the message is edited from a background task at most
+    once per `interval` and only if something changed, each edit taking a token from the chat's bucket.
+    So a job with thousands of operations costs a handful of Telegram calls.
+
+    Usage:
+        async with ProgressReporter(bot, chat_id, "Syncing", total_days=30, bucket=limiter.get(chat_id)) as progress:
+            await sync_range(..., listener=progress)
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        chat_id: int | str,
+        title: str,
+        *,
+        bucket: TokenBucket,
+        total_days: Optional[int] = None,
+        interval: float = 3.0,
+    ):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.title = title
+        self.bucket = bucket
+        self.total_days = total_days
+        self.interval = interval
+
+        self.days: set[DateInt] = set()
+        self.planned = 0
+        self.applied = 0
+        self.failed = 0
+        self.status: Optional[str] = None
+
+        self._message_id: Optional[int] = None
+        self._last_text: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def on_entries_fetched(self, user_id: Optional[str], date: DateInt, entries: list[FoodEntry]):
+        self.days.add(date)
+
+    def on_delta_planned(self, date: DateInt, delta: SyncDelta):
+        self.planned += len(delta.delete) + len(delta.create) + len(delta.edit)
+
+    def on_operation_applied(self, date: DateInt, kind: str, error: Optional[BaseException]):
+        if error is None:
+            self.applied += 1
+        else:
+            self.failed += 1
+
+    def render(self) -> str:
+        days = f"{len(self.days)}/{self.total_days}" if self.total_days else str(len(self.days))
+        lines = [
+            f"🔄 {self.title}",
+            f"Days: {days}",
+            f"Planned: {self.planned} operations",
+            f"Applied: {self.applied}, failed: {self.failed}",
+        ]
+        if self.status:
+            lines.append(self.status)
+        return "\n".join(lines)
+
+    async def _flush(self):
+        text = self.render()
+        if text == self._last_text:
+            return
+        await self.bucket.acquire()
+        try:
+            if self._message_id is None:
+                self._message_id = (await self.bot.send_message(self.chat_id, text)).message_id
+            else:
+                await self.bot.edit_message_text(text, chat_id=self.chat_id, message_id=self._message_id)
+            self._last_text = text
+        except TelegramAPIError:
+            logger.debug("Failed to update progress message", exc_info=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._flush()
+
+    async def __aenter__(self) -> "ProgressReporter":
+        await self._flush()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self.status = "✅ Finished" if exc_val is None else f"❌ Failed: {exc_val!r}"
+        await self._flush()
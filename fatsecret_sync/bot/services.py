@@ -0,0 +1,188 @@
+"""
+Long-lived services shared by all bot handlers.
+"""
+import asyncio
+import contextlib
+import dataclasses
+import datetime
+import logging
+from typing import Optional
+
+from aiogram.types import Message
+from kily.common.utils.dt import get_now
+
+from ..api.client import FatSecretAPI, FatSecretUserAPI
+from ..api.models.common import DateInt
+from ..api.scheduling import Priority, request_priority
+from ..core.client import make_api
+from ..core.daemon import SyncDaemon
+from ..core.events import SyncListeners
+from ..core.health import CredentialHealth
+from ..core.history import fetch_diaries
+from ..core.models.config import AppConfig, SyncConfig
+from ..core.models.creds import CredsConfig, UserCreds
+from ..core.models.summary import DailySummary, PeriodSummary
+from ..core.reload import CredsDiff, ReloadListener
+from ..core.search import FoodSearchIndex
+from ..core.summaries import SummaryCache
+from ..core.units import UnitConverter
+from ..core.users import load_creds, make_user_api, save_creds
+from ..core.weights import WeightStore
+from .progress import ChatRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def get_today() -> DateInt:
+    now = get_now()
+    return DateInt(year=now.year, month=now.month, day=now.day)
+
+
+@dataclasses.dataclass
+class BotServices(ReloadListener):
+    config: AppConfig
+    api: FatSecretAPI
+    creds: CredsConfig
+    user_apis: dict[str, FatSecretUserAPI]
+    summaries: SummaryCache
+    food_index: FoodSearchIndex
+    listeners: SyncListeners
+    health: CredentialHealth
+    converter: UnitConverter
+    weights: WeightStore
+    daemon: Optional[SyncDaemon] = None
+    daemon_task: Optional[asyncio.Task] = None
+    chat_limiter: ChatRateLimiter = dataclasses.field(default_factory=ChatRateLimiter)
+    background_tasks: set[asyncio.Task] = dataclasses.field(default_factory=set)
+
+    @classmethod
+    def create(cls, config: AppConfig) -> "BotServices":
+        api = make_api(config)
+        creds = load_creds(config.user_backend)
+        food_index = FoodSearchIndex()
+        # Canonical names of foods loaded for unit conversion go to the search index too
+        converter = UnitConverter(listener=food_index)
+        summaries = SummaryCache(converter=converter)
+        listeners = SyncListeners([summaries, food_index])
+        health = CredentialHealth()
+        return cls(
+            config=config,
+            api=api,
+            creds=creds,
+            user_apis={user_id: make_user_api(api, creds, user_id) for user_id in creds.users},
+            summaries=summaries,
+            food_index=food_index,
+            listeners=listeners,
+            health=health,
+            converter=converter,
+            weights=WeightStore(config.weights.path),
+            daemon=SyncDaemon(api, creds, config.sync, listeners=[listeners], health=health, converter=converter)
+            if config.sync.pairs
+            else None,
+        )
+
+    def on_creds_changed(self, creds: CredsConfig, diff: CredsDiff):
+        self.creds = creds
+        for user_id in diff.removed:
+            self.user_apis.pop(user_id, None)
+        for user_id in diff.rebuilt:
+            self.user_apis[user_id] = make_user_api(self.api, creds, user_id)
+            self.health.statuses.pop(user_id, None)
+        if self.daemon is not None:
+            self.daemon.on_creds_changed(creds, diff)
+
+    def on_sync_config_changed(self, config: SyncConfig):
+        self.config = self.config.copy(update={"sync": config})
+        if self.daemon is not None:
+            self.daemon.on_sync_config_changed(config)
+        elif config.pairs:
+            # No pairs at start, so there was no daemon yet
+            self.daemon = SyncDaemon(
+                self.api,
+                self.creds,
+                config,
+                listeners=[self.listeners],
+                health=self.health,
+                converter=self.converter,
+                strict=False,
+            )
+            self.start_daemon(check_credentials=False)
+
+    def start_daemon(self, check_credentials: bool = True):
+        if self.daemon is not None and self.daemon_task is None:
+            self.daemon_task = asyncio.create_task(self.daemon.run(check_credentials=check_credentials))
+
+    async def stop_daemon(self):
+        if self.daemon_task is not None:
+            self.daemon.stop()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.daemon_task
+            self.daemon_task = None
+
+    def add_user(self, user_creds: UserCreds):
+        self.creds.users[user_creds.info.id] = user_creds
+        save_creds(self.config.user_backend, self.creds)
+        self.user_apis[user_creds.info.id] = make_user_api(self.api, self.creds, user_creds.info.id)
+
+    async def warm_up(self, days: int = 7):
+        """
+        Checks credentials of every user and precomputes summaries of the last `days` days of every user
+        with valid ones, so that commands do not call FatSecret.
+        """
+        await self.health.check_all(self.user_apis.values())
+        user_apis = {user_id: api for user_id, api in self.user_apis.items() if self.health.is_usable(user_id)}
+        if self.config.weights.enabled:
+            # The check has just fetched every profile
+            self.weights.record_profiles(user_apis.values())
+        today = get_today()
+        dates = [DateInt.validate(today - datetime.timedelta(days=offset)) for offset in range(days)]
+        results = await asyncio.gather(
+            *(fetch_diaries(user_api, dates, self.listeners, converter=self.converter) for user_api in user_apis.values()),
+            return_exceptions=True,
+        )
+        for user_id, result in zip(user_apis, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to warm up summaries of %s", user_id, exc_info=result)
+
+    async def get_day_summary(self, user_id: str, date: DateInt) -> DailySummary:
+        """
+        Returns:
+            Cached summary. The diary is fetched only if the day has never been seen by sync or warm-up,
+            or was last seen more than `telegram.summary_max_age` ago.
+        """
+        summary = self.summaries.get_day(user_id, date)
+        if summary is None or get_now() - summary.updated_at > self.config.telegram.summary_max_age:
+            await fetch_diaries(self.user_apis[user_id], [date], self.listeners, converter=self.converter)
+            summary = self.summaries.get_day(user_id, date)
+        return summary
+
+    async def refresh_weights(self):
+        user_apis = [api for user_id, api in self.user_apis.items() if self.health.is_usable(user_id)]
+        await self.weights.refresh(user_apis, concurrency=self.config.weights.concurrency)
+
+    async def refresh_weights_periodically(self):
+        interval = self.config.weights.refresh_interval
+        while True:
+            await asyncio.sleep(interval.total_seconds())
+            # noinspection PyBroadException
+            try:
+                with request_priority(Priority.BULK):
+                    await self.refresh_weights()
+            except Exception:
+                logger.warning("Failed to refresh weights", exc_info=True)
+
+    async def answer(self, message: Message, text: str, **kwargs) -> Message:
+        """
+        Replies in the chat of `message` once the chat's rate limiter allows, like progress updates do.
+        """
+        await self.chat_limiter.get(message.chat.id).acquire()
+        return await message.answer(text, **kwargs)
+
+    def run_in_background(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    def get_week_summary(self, user_id: str, to_date: DateInt) -> PeriodSummary:
+        return self.summaries.get_period(user_id, to_date, days=7)
@@ -0,0 +1,77 @@
+"""
+Benchmark commands
+"""
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from ..bench.models import BenchmarkComparison, BenchmarkReport
+from ..bench.suite import compare_reports, run_benchmarks
+
+option_threshold = click.option(
+    "--threshold",
+    default=0.1,
+    show_default=True,
+    type=click.FloatRange(0.0, 1.0),
+    help="Relative throughput drop considered a regression",
+)
+
+
+@click.group()
+def bench_group():
+    """
+    Benchmarks of sync hot paths and regression checks against stored baselines.
+    """
+
+
+def _print_comparison(comparisons: list[BenchmarkComparison]) -> bool:
+    """
+    Returns:
+        Whether any benchmark regressed.
+    """
+    for comparison in comparisons:
+        baseline = f"{comparison.baseline:.1f}" if comparison.baseline is not None else "-"
+        current = f"{comparison.current:.1f}" if comparison.current is not None else "-"
+        change = f"{comparison.change:+.1%}" if comparison.change is not None else "n/a"
+        mark = "REGRESSION" if comparison.regressed else "ok"
+        click.echo(f"{comparison.name:<32} {baseline:>12} {current:>12} ops/s {change:>8}  {mark}")
+    return any(comparison.regressed for comparison in comparisons)
+
+
+@bench_group.command()
+@click.option("--output", "-o", default=None, type=click.Path(dir_okay=False, path_type=Path), help="Write results here")
+@click.option(
+    "--baseline", "-b", default=None, type=click.Path(exists=True, dir_okay=False, path_type=Path), help="Compare with results"
+)
+@click.option("--only", "names", multiple=True, type=str, help="Run benchmarks whose name contains this")
+@click.option("--repeat", default=5, show_default=True, type=click.IntRange(1), help="Measured batches per benchmark")
+@option_threshold
+def run(output: Optional[Path], baseline: Optional[Path], names: tuple[str], repeat: int, threshold: float):
+    """
+    Runs benchmarks. Fails if any benchmark is slower than the baseline by more than the threshold.
+    """
+    report = asyncio.run(run_benchmarks(names, repeat))
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(report.json(indent=2))
+    if baseline is None:
+        for result in report.results.values():
+            click.echo(f"{result.name:<32} {result.throughput:>12.1f} ops/s")
+        return
+    if _print_comparison(compare_reports(BenchmarkReport.parse_file(baseline), report, threshold)):
+        raise click.exceptions.Exit(1)
+
+
+@bench_group.command()
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("current", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@option_threshold
+def compare(baseline: Path, current: Path, threshold: float):
+    """
+    Compares two stored results. Fails if any benchmark is slower than the baseline by more than the threshold.
+    """
+    comparisons = compare_reports(BenchmarkReport.parse_file(baseline), BenchmarkReport.parse_file(current), threshold)
+    if _print_comparison(comparisons):
+        raise click.exceptions.Exit(1)
@@ -0,0 +1,32 @@
+"""
+Telegram bot commands
+"""
+from pathlib import Path
+
+import click
+from kily.common.utils.config_loader import ConfigLoader
+
+from ..core.models.config import AppConfig
+from .common import option_config, option_reload
+
+
+@click.group()
+def bot_group():
+    """
+    Commands related to Telegram bot.
+    """
+
+
+@bot_group.command()
+@option_reload
+@option_config
+def start(config: Path, reload: bool = True):
+    """
+    Starts Telegram bot in webhook mode. Runs sync daemon too, if there are sync pairs configured.
+    """
+    # aiogram is installed separately (see pre-requirements.txt), import it only when needed
+    from ..bot.app import BotApp
+
+    config_path = config
+    config: AppConfig = ConfigLoader.load(AppConfig, path=config_path)
+    BotApp(config, config_path=config_path if reload else None).run()
@@ -39,3 +39,18 @@ option_to_date = click.option(
         parse_date_option, prefer_incomplete_current_month_dates="future", prefer_incomplete_month_day="last"
     ),
 )
+
+option_profile = click.option(
+    "--profile",
+    "profile_dir",
+    default=None,
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Profile the run and write cProfile stats and a speedscope timeline to this directory",
+)
+
+option_reload = click.option(
+    "--reload/--no-reload",
+    default=True,
+    show_default=True,
+    help="Apply changes of the config and user credentials files without restart",
+)
@@ -0,0 +1,87 @@
+"""
+Food commands
+"""
+import asyncio
+import datetime
+from pathlib import Path
+from typing import Optional
+
+import click
+from kily.common.utils.config_loader import ConfigLoader
+from kily.common.utils.dt import get_now
+
+from ..core.client import make_api
+from ..core.history import fetch_diaries, iter_dates
+from ..core.models.config import AppConfig
+from ..core.search import FoodSearchIndex
+from ..core.units import UnitConverter
+from ..core.users import load_creds, make_user_api
+from .common import option_config, option_from_date, option_to_date
+
+
+@click.group()
+def food_group():
+    """
+    Commands related to foods.
+    """
+
+
+@food_group.command()
+@click.argument("query", type=str)
+@click.option("--user", "-u", "users", required=True, multiple=True, type=str, help="User whose diary to search")
+@click.option("--limit", default=10, show_default=True, type=int, help="Maximum number of results")
+@click.option("--details", is_flag=True, help="Fetch details of found foods to show their canonical names")
+@option_from_date
+@option_to_date
+@option_config
+def search(
+    query: str,
+    users: tuple[str],
+    limit: int,
+    details: bool,
+    from_date: datetime.datetime,
+    config: Path,
+    to_date: Optional[datetime.datetime] = None,
+):
+    """
+    Finds foods that users logged in their diaries by the beginning of their names (typos are tolerated).
+    Foods the first user logged most often come first.
+
+    Args:
+        query:
+            Beginning of the food name, every word may be incomplete.
+        users:
+            Users whose diaries to search.
+        limit:
+            Maximum number of results.
+        details:
+            Fetch details of found foods to show their canonical names.
+        from_date:
+            Start date of diary history.
+        to_date:
+            Inclusive end date of diary history.
+    """
+    if to_date is None:
+        to_date = get_now()
+    config: AppConfig = ConfigLoader.load(AppConfig, path=config)
+    creds = load_creds(config.user_backend)
+    index = FoodSearchIndex()
+    converter = UnitConverter(listener=index)
+
+    async def _search():
+        async with make_api(config) as api:
+            user_apis = [make_user_api(api, creds, user_id) for user_id in users]
+            dates = list(iter_dates(from_date.date(), to_date.date()))
+            await asyncio.gather(*(fetch_diaries(user_api, dates, index) for user_api in user_apis))
+            results = index.search(query, user_id=users[0], limit=limit)
+            if details and results:
+                await converter.ensure_foods(user_apis[0], (result.food_id for result in results))
+                results = index.search(query, user_id=users[0], limit=limit)
+            return results
+
+    results = asyncio.run(_search())
+    if not results:
+        click.echo(f"No foods matching '{query}' among {len(index)} known ones")
+        raise click.exceptions.Exit(1)
+    for result in results:
+        click.echo(f"{result.name} (food_id={result.food_id}, logged {result.frequency} times, score={result.score:.2f})")
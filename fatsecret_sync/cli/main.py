@@ -0,0 +1,34 @@
+"""
+Command-line entrypoint
+"""
+import click
+from kily.common.utils.log import configure_logging
+
+from ..utils.log import configure_queue_logging
+from .bench import bench_group
+from .bot import bot_group
+from .food import food_group
+from .meals import meals_group
+from .sync import sync_group
+from .users import users_group
+
+
+@click.group()
+def cli():
+    """
+    FatSecret API, apps and tools for personal use.
+    """
+    configure_logging()
+    configure_queue_logging()
+
+
+cli.add_command(sync_group, name="sync")
+cli.add_command(meals_group, name="meals")
+cli.add_command(bot_group, name="bot")
+cli.add_command(users_group, name="users")
+cli.add_command(bench_group, name="bench")
+cli.add_command(food_group, name="food")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,76 @@
+"""
+Meal template commands
+"""
+import asyncio
+import datetime
+from pathlib import Path
+from typing import Optional
+
+import click
+from kily.common.utils.config_loader import ConfigLoader
+from kily.common.utils.dt import get_now
+
+from ..core.client import make_api
+from ..core.history import DiaryHistory, iter_dates
+from ..core.meals import mine_meal_templates
+from ..core.models.config import AppConfig
+from ..core.users import load_creds, make_user_api
+from .common import option_config, option_from_date, option_to_date
+
+
+@click.group()
+def meals_group():
+    """
+    Commands related to frequently logged meals.
+    """
+
+
+@meals_group.command()
+@click.option("--user", "-u", "users", required=True, multiple=True, type=str, help="User whose diary to mine")
+@click.option("--min-support", default=3, show_default=True, type=int, help="Minimum number of times a meal was logged")
+@click.option("--min-size", default=2, show_default=True, type=int, help="Minimum number of foods in a meal")
+@option_from_date
+@option_to_date
+@option_config
+def mine(
+    users: tuple[str],
+    min_support: int,
+    min_size: int,
+    from_date: datetime.datetime,
+    config: Path,
+    to_date: Optional[datetime.datetime] = None,
+):
+    """
+    Finds combinations of foods that users often log together in the same meal.
+
+    Args:
+        users:
+            Users whose diaries to mine.
+        min_support:
+            Minimum number of times a meal was logged.
+        min_size:
+            Minimum number of foods in a meal.
+        from_date:
+            Start date of diary history.
+        to_date:
+            Inclusive end date of diary history.
+    """
+    if to_date is None:
+        to_date = get_now()
+    config: AppConfig = ConfigLoader.load(AppConfig, path=config)
+    creds = load_creds(config.user_backend)
+    history = DiaryHistory()
+
+    async def _fetch():
+        async with make_api(config) as api:
+            dates = list(iter_dates(from_date.date(), to_date.date()))
+            await asyncio.gather(*(history.fetch(make_user_api(api, creds, user_id), dates) for user_id in users))
+
+    asyncio.run(_fetch())
+    templates = mine_meal_templates((history.entries(user_id) for user_id in users), min_support=min_support, min_size=min_size)
+    for template in templates:
+        click.echo(f"{template.meal} (logged {template.support} times):")
+        for item in template.items:
+            click.echo(
+                f"  - {item.food_entry_name} x{item.number_of_units} (food_id={item.food_id}, serving_id={item.serving_id})"
+            )
@@ -1,6 +1,8 @@
 """
 Sync commands
 """
+import asyncio
+import contextlib
 import datetime
 from pathlib import Path
 from typing import Optional
@@ -9,9 +11,17 @@ import click
 from kily.common.utils.config_loader import ConfigLoader
 from kily.common.utils.dt import get_now
 
+from ..api.deadlines import Deadline
 from ..api.models.common import DateInt
+from ..core.client import make_api
+from ..core.daemon import SyncDaemon
 from ..core.models.config import AppConfig
-from .common import option_config, option_from_date, option_to_date
+from ..core.reload import HotReloader
+from ..core.sync import sync_range
+from ..core.units import UnitConverter
+from ..core.users import load_creds, make_user_api
+from ..utils.profiling import Profiler
+from .common import option_config, option_from_date, option_profile, option_reload, option_to_date
 
 
 @click.group()
@@ -26,8 +36,16 @@ def sync_group():
 @click.option("--to-user", "-t", required=True, type=str, help="User to sync entries to")
 @option_from_date
 @option_to_date
+@option_profile
 @option_config
-def sync_diary(from_user: str, to_user: str, from_date: str, config: Path, to_date: Optional[str] = None):
+def sync_diary(
+    from_user: str,
+    to_user: str,
+    from_date: datetime.datetime,
+    config: Path,
+    to_date: Optional[datetime.datetime] = None,
+    profile_dir: Optional[Path] = None,
+):
     """
     Synchronizes diary of one user to another starting from requested date until (inclusive) end date.
 
@@ -40,8 +58,62 @@ def sync_diary(from_user: str, to_user: str, from_date: str, config: Path, to_da
             Start sync date.
         to_date:
             Inclusive end date.
+        profile_dir:
+            Directory for profiling artifacts, the run is not profiled if not provided.
     """
     if to_date is None:
         now: datetime.datetime = get_now()
         to_date = DateInt(year=now.year, month=now.month, day=now.day)
+    else:
+        to_date = to_date.date()
+    from_date = from_date.date()
     config = ConfigLoader.load(AppConfig, path=config)
+    creds = load_creds(config.user_backend)
+
+    async def _run():
+        async with make_api(config) as api:
+            await sync_range(
+                make_user_api(api, creds, from_user),
+                make_user_api(api, creds, to_user),
+                from_date,
+                to_date,
+                deadline=Deadline.after(config.sync.run_timeout.total_seconds() * ((to_date - from_date).days + 1)),
+                converter=UnitConverter(),
+            )
+
+    with Profiler(profile_dir, name="sync-diary") if profile_dir else contextlib.nullcontext():
+        asyncio.run(_run())
+
+
+@sync_group.command()
+@option_reload
+@option_profile
+@option_config
+def daemon(config: Path, reload: bool = True, profile_dir: Optional[Path] = None):
+    """
+    Runs until interrupted, keeping target diaries of every configured sync pair up to date.
+
+    Origin diaries are polled on an adaptive schedule, see `sync.polling` section of the config.
+    With `--profile` the profile of the whole run is written when the daemon stops.
+    Changes of sync pairs, polling settings and user credentials are applied on the fly, unless `--no-reload`.
+    """
+    config_path = config
+    config: AppConfig = ConfigLoader.load(AppConfig, path=config_path)
+    creds = load_creds(config.user_backend)
+
+    async def _run():
+        async with make_api(config) as api:
+            sync_daemon = SyncDaemon(api, creds, config.sync, converter=UnitConverter())
+            if not reload:
+                await sync_daemon.run()
+                return
+            reloader = HotReloader(config_path, config, creds, listeners=[sync_daemon])
+            reloader_task = asyncio.create_task(reloader.run())
+            try:
+                await sync_daemon.run()
+            finally:
+                reloader.stop()
+                await reloader_task
+
+    with Profiler(profile_dir, name="sync-daemon") if profile_dir else contextlib.nullcontext():
+        asyncio.run(_run())
@@ -0,0 +1,89 @@
+"""
+User commands
+"""
+import asyncio
+from pathlib import Path
+
+import click
+from kily.common.utils.config_loader import ConfigLoader
+from kily.common.utils.dt import get_now
+
+from ..api.models.common import DateInt
+from ..core.client import make_api
+from ..core.health import CredentialHealth, CredentialState
+from ..core.models.config import AppConfig
+from ..core.users import load_creds, make_user_api
+from ..core.weights import WeightStore
+from .common import option_config
+
+
+@click.group()
+def users_group():
+    """
+    Commands related to registered users.
+    """
+
+
+@users_group.command()
+@click.option("--concurrency", default=50, show_default=True, type=int, help="Maximum number of checks at a time")
+@option_config
+def check(concurrency: int, config: Path):
+    """
+    Checks credentials of every registered user with a cheap API call. Fails if any credentials are invalid.
+
+    Args:
+        concurrency:
+            Maximum number of checks at a time.
+    """
+    config: AppConfig = ConfigLoader.load(AppConfig, path=config)
+    creds = load_creds(config.user_backend)
+    health = CredentialHealth()
+
+    async def _check():
+        async with make_api(config) as api:
+            return await health.check_all((make_user_api(api, creds, user_id) for user_id in creds.users), concurrency)
+
+    statuses = asyncio.run(_check())
+    for user_id, status in sorted(statuses.items()):
+        click.echo(f"{user_id}: {status.state.value}" + (f" ({status.error})" if status.error else ""))
+    if any(status.state == CredentialState.INVALID for status in statuses.values()):
+        raise click.exceptions.Exit(1)
+
+
+@users_group.command()
+@click.option("--days", default=30, show_default=True, type=int, help="Period of the weight trend")
+@click.option("--no-refresh", is_flag=True, help="Answer from the stored history only, without fetching profiles")
+@option_config
+def weights(days: int, no_refresh: bool, config: Path):
+    """
+    Refreshes weight history of every registered user from their profiles and prints weight trends
+    and goal progress. Run it regularly (e.g. daily by cron) with `weights.path` configured to keep the history.
+
+    Args:
+        days:
+            Period of the weight trend.
+        no_refresh:
+            Answer from the stored history only.
+    """
+    config: AppConfig = ConfigLoader.load(AppConfig, path=config)
+    creds = load_creds(config.user_backend)
+    store = WeightStore(config.weights.path)
+
+    async def _refresh():
+        async with make_api(config) as api:
+            await store.refresh((make_user_api(api, creds, user_id) for user_id in creds.users), config.weights.concurrency)
+
+    if not no_refresh:
+        asyncio.run(_refresh())
+    today = DateInt.validate(get_now())
+    for user_id in sorted(creds.users):
+        trend = store.trend(user_id, today, days=days)
+        if trend is None:
+            click.echo(f"{user_id}: no weigh-ins in the last {days} days")
+            continue
+        pace = f", {trend.kg_per_week:+.2f}kg/week" if trend.kg_per_week is not None else ""
+        click.echo(f"{user_id}: {trend.last_kg:.1f}kg, {trend.change_kg:+.1f}kg over {trend.points} weigh-ins{pace}")
+        goal = store.goal_progress(user_id)
+        if goal is not None:
+            eta = f", expected by {goal.eta.isoformat()}" if goal.eta else ""
+            click.echo(f"  goal {goal.goal_kg:.1f}kg: {goal.progress:.0%} done, {abs(goal.remaining_kg):.1f}kg to go{eta}")
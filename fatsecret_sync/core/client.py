@@ -0,0 +1,60 @@
+"""
+Construction of the API client from application config.
+"""
+from ..api.breakers import Bulkheads, CircuitBreakers
+from ..api.client import FatSecretAPI
+from ..api.concurrency import AdaptiveConcurrencyLimiter
+from ..api.hedging import HedgingPolicy, LatencyTracker
+from ..api.scheduling import PriorityScheduler
+from .models.config import AppConfig
+
+
+def make_api(config: AppConfig) -> FatSecretAPI:
+    hedging = None
+    if config.client.hedging.enabled:
+        hedging = HedgingPolicy(
+            LatencyTracker(),
+            percentile=config.client.hedging.percentile,
+            min_samples=config.client.hedging.min_samples,
+            default_delay=config.client.hedging.default_delay.total_seconds(),
+            min_delay=config.client.hedging.min_delay.total_seconds(),
+        )
+    scheduler = None
+    if config.client.rate_limit.enabled:
+        scheduler = PriorityScheduler(
+            rate=config.client.rate_limit.rate,
+            burst=config.client.rate_limit.burst,
+            interactive_share=config.client.rate_limit.interactive_share,
+        )
+    concurrency = None
+    if config.client.concurrency.enabled:
+        concurrency = AdaptiveConcurrencyLimiter(
+            initial_limit=config.client.concurrency.initial_limit,
+            min_limit=config.client.concurrency.min_limit,
+            max_limit=config.client.concurrency.max_limit,
+            target_latency=config.client.concurrency.target_latency.total_seconds(),
+            increase=config.client.concurrency.increase,
+            decrease_factor=config.client.concurrency.decrease_factor,
+        )
+    breakers = None
+    if config.client.circuit_breaker.enabled:
+        breakers = CircuitBreakers(
+            failure_threshold=config.client.circuit_breaker.failure_threshold,
+            reset_timeout=config.client.circuit_breaker.reset_timeout.total_seconds(),
+            probes=config.client.circuit_breaker.probes,
+            per_user=config.client.circuit_breaker.per_user,
+        )
+    bulkheads = None
+    if config.client.bulkheads.enabled:
+        bulkheads = Bulkheads(reads=config.client.bulkheads.reads, writes=config.client.bulkheads.writes)
+    return FatSecretAPI(
+        oauth1_creds=config.fatsecret.oauth1,
+        oauth2_creds=config.fatsecret.oauth2,
+        call_timeout=config.client.call_timeout.total_seconds(),
+        hedging=hedging,
+        scheduler=scheduler,
+        concurrency=concurrency,
+        breakers=breakers,
+        bulkheads=bulkheads,
+        throttling_error_codes=config.client.concurrency.throttling_error_codes,
+    )
@@ -0,0 +1,257 @@
+"""
+Long-running sync daemon that keeps target diaries of every sync pair up to date.
+"""
+import asyncio
+import dataclasses
+import datetime
+import logging
+import math
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from kily.common.utils.dt import get_now
+
+from ..api.client import FatSecretAPI, FatSecretUserAPI
+from ..api.deadlines import Deadline
+from ..api.models.common import DateInt
+from .events import SyncListener, SyncListeners
+from .health import CredentialHealth
+from .models.config import PollingConfig, SyncConfig, SyncPairConfig
+from .models.creds import CredsConfig
+from .reload import CredsDiff, ReloadListener
+from .sync import sync_user
+from .units import UnitConverter
+from .users import make_user_api
+from .utils import diary_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class PollSchedule:
+    """
+    Decides how long to wait before polling origin diary for a given date again.
+    """
+
+    def __init__(self, config: PollingConfig):
+        self.config = config
+
+    def is_meal_time(self, now: datetime.datetime) -> bool:
+        return any(start <= now.hour < end for start, end in self.config.meal_hours)
+
+    def next_interval(self, date: datetime.date, now: datetime.datetime, unchanged_polls: int) -> datetime.timedelta:
+        """
+        Args:
+            date:
+                Polled diary date.
+            now:
+                Current time.
+            unchanged_polls:
+                Number of consecutive polls that found origin diary unchanged.
+        Returns:
+            Time to wait until the next poll.
+        """
+        if date >= now.date():
+            base = self.config.today_interval if self.is_meal_time(now) else self.config.today_idle_interval
+            cap = self.config.today_max_interval
+        else:
+            base, cap = self.config.past_interval, self.config.past_max_interval
+        cap = max(base, cap)
+        factor = self.config.backoff_factor
+        if factor > 1 and base:
+            # Beyond the cap the exponent makes no difference, and unbounded it overflows float
+            unchanged_polls = min(unchanged_polls, math.ceil(math.log(cap / base, factor)))
+        return min(base * factor**unchanged_polls, cap)
+
+
+@dataclasses.dataclass
+class DayPollState:
+    origin: str
+    date: DateInt
+    next_poll_at: float = 0.0
+    unchanged_polls: int = 0
+    # Fingerprint of the origin diary that was last successfully synced to each target
+    synced: dict[str, int] = dataclasses.field(default_factory=dict)
+
+
+class SyncDaemon(ReloadListener):
+    """
+    Polls origin diaries of all sync pairs on an adaptive schedule (see `PollSchedule`)
+    and calls `sync_user` only for targets that have not seen the current origin diary yet.
+
+    Every pair sharing the same origin user is served by a single poll.
+    All calls go through one `FatSecretAPI` instance and its pooled session.
+    Users and sync pairs can be changed while running, see `reload.HotReloader`.
+    """
+
+    def __init__(
+        self,
+        api: FatSecretAPI,
+        creds: CredsConfig,
+        config: SyncConfig,
+        listeners: Iterable[SyncListener] = (),
+        health: Optional[CredentialHealth] = None,
+        converter: Optional[UnitConverter] = None,
+        strict: bool = True,
+    ):
+        """
+        Args:
+            strict:
+                Raise on sync pairs that reference unknown users, otherwise skip them.
+        """
+        self.api = api
+        self.creds = creds
+        self.config = config
+        self.listeners = SyncListeners(listeners)
+        self.health = health or CredentialHealth()
+        self.converter = converter
+        self.schedule = PollSchedule(config.polling)
+        self.states: dict[tuple[str, DateInt], DayPollState] = {}
+        self.pairs_by_origin: dict[str, list[SyncPairConfig]] = defaultdict(list)
+        self._set_pairs(config.pairs, strict=strict)
+        self.user_apis: dict[str, FatSecretUserAPI] = {user_id: make_user_api(api, creds, user_id) for user_id in creds.users}
+        self._stop = asyncio.Event()
+
+    def _set_pairs(self, pairs: list[SyncPairConfig], strict: bool):
+        """
+        Args:
+            strict:
+                Raise on pairs that reference unknown users, otherwise skip them.
+        """
+        pairs_by_origin: dict[str, list[SyncPairConfig]] = defaultdict(list)
+        for pair in pairs:
+            missing = {pair.origin, pair.target} - self.creds.users.keys()
+            if missing:
+                message = f"Sync pair {pair.origin} -> {pair.target} references unknown users: {sorted(missing)}"
+                if strict:
+                    raise ValueError(message)
+                logger.warning("%s, skipping it", message)
+                continue
+            pairs_by_origin[pair.origin].append(pair)
+        self.pairs_by_origin = pairs_by_origin
+        # Days of origins that are no longer synced are dropped, the rest keep their schedule
+        for key in [key for key in self.states if key[0] not in pairs_by_origin]:
+            del self.states[key]
+
+    def on_creds_changed(self, creds: CredsConfig, diff: CredsDiff):
+        self.creds = creds
+        for user_id in diff.removed:
+            self.user_apis.pop(user_id, None)
+        for user_id in diff.rebuilt:
+            self.user_apis[user_id] = make_user_api(self.api, creds, user_id)
+            # New tokens deserve a new chance
+            self.health.statuses.pop(user_id, None)
+        self._set_pairs(self.config.pairs, strict=False)
+
+    def on_sync_config_changed(self, config: SyncConfig):
+        self.config = config
+        self.schedule = PollSchedule(config.polling)
+        self._set_pairs(config.pairs, strict=False)
+
+    def _today(self) -> DateInt:
+        now = get_now()
+        return DateInt(year=now.year, month=now.month, day=now.day)
+
+    def _refresh_days(self, loop_time: float):
+        """Tracks today and `lookback_days` past days, drops days that went out of the window."""
+        today = self._today()
+        dates = [DateInt.validate(today - datetime.timedelta(days=i)) for i in range(self.config.polling.lookback_days + 1)]
+        keys = {(origin, date) for origin in self.pairs_by_origin for date in dates}
+        for key in self.states.keys() - keys:
+            del self.states[key]
+        for origin, date in keys - self.states.keys():
+            self.states[(origin, date)] = DayPollState(origin=origin, date=date, next_poll_at=loop_time)
+
+    async def poll(self, state: DayPollState):
+        if not self.health.is_usable(state.origin):
+            logger.debug("[%s %s] Skipping poll: credentials are invalid", state.origin, state.date)
+            return
+        origin_api = self.user_apis[state.origin]
+        entries = await origin_api.get_food_entries_v2(date=state.date)
+        fingerprint = diary_fingerprint(entries.food_entry if entries else [])
+        stale = [
+            pair
+            for pair in self.pairs_by_origin[state.origin]
+            if state.synced.get(pair.target) != fingerprint and self.health.is_usable(pair.target)
+        ]
+        if not stale:
+            # Only changed diaries reach sync_user, report unchanged ones to listeners here
+            self.listeners.on_entries_fetched(state.origin, state.date, entries.food_entry if entries else [])
+            state.unchanged_polls += 1
+            logger.debug("[%s %s] Unchanged for %d polls", state.origin, state.date, state.unchanged_polls)
+            return
+        state.unchanged_polls = 0
+        for pair in stale:
+            logger.info("[%s %s] Origin changed, syncing to %s", state.origin, state.date, pair.target)
+            # noinspection PyBroadException
+            try:
+                applied = await sync_user(
+                    origin_api,
+                    self.user_apis[pair.target],
+                    date=state.date,
+                    origin_entries=entries,
+                    keep_unique_target_food=pair.keep_unique_target_food,
+                    deadline=Deadline.after(self.config.run_timeout.total_seconds()),
+                    listener=self.listeners,
+                    converter=self.converter,
+                )
+            except Exception as e:
+                logger.warning("Failed to sync %s -> %s on %s", pair.origin, pair.target, state.date, exc_info=True)
+                self.health.observe_error(pair.target, e)
+                continue
+            if not applied:
+                # Failed writes are retried on the next poll, not when the origin diary changes again
+                logger.warning("Some operations of %s -> %s on %s failed", pair.origin, pair.target, state.date)
+                continue
+            state.synced[pair.target] = fingerprint
+
+    async def _poll_and_reschedule(self, state: DayPollState):
+        # noinspection PyBroadException
+        try:
+            await self.poll(state)
+        except Exception as e:
+            logger.warning("Failed to poll %s on %s", state.origin, state.date, exc_info=True)
+            self.health.observe_error(state.origin, e)
+        interval = self.schedule.next_interval(state.date, get_now(), state.unchanged_polls)
+        state.next_poll_at = asyncio.get_running_loop().time() + interval.total_seconds()
+
+    async def run_once(self) -> float:
+        """
+        Polls every day that is due.
+
+        Returns:
+            Number of seconds until the next poll is due.
+        """
+        loop = asyncio.get_running_loop()
+        self._refresh_days(loop.time())
+        due = [state for state in self.states.values() if state.next_poll_at <= loop.time()]
+        if due:
+            await asyncio.gather(*(self._poll_and_reschedule(state) for state in due))
+        if not self.states:
+            return self.config.polling.today_interval.total_seconds()
+        return max(0.0, min(state.next_poll_at for state in self.states.values()) - loop.time())
+
+    async def run(self, check_credentials: bool = True):
+        """
+        Args:
+            check_credentials:
+                Check credentials of every user before the first poll, so that users with invalid ones are skipped.
+        """
+        if not self.pairs_by_origin:
+            # Pairs may still come with a config reload
+            logger.warning("No sync pairs configured, waiting for them")
+        logger.info("Starting sync daemon for %d sync pairs", len(self.config.pairs))
+        self._stop.clear()
+        if check_credentials:
+            await self.health.check_all(self.user_apis.values())
+        while not self._stop.is_set():
+            delay = await self.run_once()
+            # Wake up at least every `today_interval` to notice day change
+            delay = min(delay, self.config.polling.today_interval.total_seconds())
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Sync daemon stopped")
+
+    def stop(self):
+        self._stop.set()
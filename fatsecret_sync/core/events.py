@@ -0,0 +1,68 @@
+"""
+Sync events: lets other components (indexes, caches, progress reporters) follow what sync does.
+"""
+from typing import Iterable, Optional
+
+from ..api.models.common import DateInt
+from ..api.models.food import FoodInfoV3
+from ..api.models.food_entry import FoodEntry
+from .models.sync import SyncDelta
+
+
+class SyncListener:
+    """
+    Receives sync events. Every handler is a no-op by default, override the ones you need.
+    Handlers are called synchronously from the sync coroutine, so they must be fast and must not raise.
+    """
+
+    @property
+    def needs_foods(self) -> bool:
+        """
+        Whether fetched diaries must come with factor tables of every food in them (see `units.UnitConverter`),
+        e.g. to convert whole diaries. Loading them costs a `food.get` call per food not seen before.
+        """
+        return False
+
+    def on_entries_fetched(self, user_id: Optional[str], date: DateInt, entries: list[FoodEntry]):
+        """Diary of a user on a date was fetched (or received from the caller)."""
+
+    def on_delta_planned(self, date: DateInt, delta: SyncDelta):
+        """Changes to the target diary were planned."""
+
+    def on_operation_applied(self, date: DateInt, kind: str, error: Optional[BaseException]):
+        """A single planned change (`kind` is one of DEL, ADD, EDT) was applied, `error` is set if it failed."""
+
+    def on_food_loaded(self, food_id: int, food: FoodInfoV3):
+        """Details of a food were fetched, e.g. servings for unit conversion."""
+
+
+class SyncListeners(SyncListener):
+    """
+    Broadcasts every event to all of its listeners.
+    """
+
+    def __init__(self, listeners: Iterable[SyncListener] = ()):
+        self.listeners = list(listeners)
+
+    @property
+    def needs_foods(self) -> bool:
+        return any(listener.needs_foods for listener in self.listeners)
+
+    def add(self, listener: SyncListener):
+        self.listeners.append(listener)
+
+    def on_entries_fetched(self, user_id: Optional[str], date: DateInt, entries: list[FoodEntry]):
+        for listener in self.listeners:
+            listener.on_entries_fetched(user_id, date, entries)
+
+    def on_delta_planned(self, date: DateInt, delta: SyncDelta):
+        for listener in self.listeners:
+            listener.on_delta_planned(date, delta)
+
+    def on_operation_applied(self, date: DateInt, kind: str, error: Optional[BaseException]):
+        for listener in self.listeners:
+            listener.on_operation_applied(date, kind, error)
+
+    def on_food_loaded(self, food_id: int, food: FoodInfoV3):
+        for listener in self.listeners:
+            listener.on_food_loaded(food_id, food)
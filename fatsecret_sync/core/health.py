@@ -0,0 +1,96 @@
+"""
+User credentials health: finds revoked or broken user tokens before sync spends work on them.
+"""
+import asyncio
+import dataclasses
+import datetime
+import logging
+from enum import Enum
+from typing import Iterable, Optional
+
+from kily.common.utils.dt import get_now
+
+from ..api.client import FatSecretUserAPI
+from ..api.errors import APIError
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialState(Enum):
+    OK = "ok"
+    INVALID = "invalid"  # API rejected user credentials, they must be renewed
+    UNKNOWN = "unknown"  # check failed for another reason, e.g. network
+
+
+@dataclasses.dataclass
+class CredentialStatus:
+    user_id: str
+    state: CredentialState
+    checked_at: datetime.datetime
+    error: Optional[str] = None
+
+
+class CredentialHealth:
+    """
+    Latest known state of every user's credentials.
+
+    Only users whose credentials were rejected by the API are considered unusable;
+    a failed check for any other reason does not block the user.
+    """
+
+    def __init__(self):
+        self.statuses: dict[str, CredentialStatus] = {}
+
+    def is_usable(self, user_id: str) -> bool:
+        status = self.statuses.get(user_id)
+        return status is None or status.state != CredentialState.INVALID
+
+    @property
+    def invalid_users(self) -> list[str]:
+        return [user_id for user_id, status in self.statuses.items() if status.state == CredentialState.INVALID]
+
+    def observe_error(self, user_id: Optional[str], error: BaseException) -> bool:
+        """
+        Marks user credentials invalid if `error` says so.
+
+        Returns:
+            Whether credentials were marked invalid.
+        """
+        if user_id is None or not isinstance(error, APIError) or not error.error.is_invalid_user_credentials:
+            return False
+        self.statuses[user_id] = CredentialStatus(user_id, CredentialState.INVALID, get_now(), error.error.message)
+        logger.warning("Credentials of %s are invalid: %s", user_id, error.error.message)
+        return True
+
+    async def check(self, user_api: FatSecretUserAPI) -> CredentialStatus:
+        """
+        Validates credentials with a cheap `profile.get` call, which also fills the user's profile cache.
+        """
+        # noinspection PyBroadException
+        try:
+            await user_api.get_profile()
+        except APIError as e:
+            state = CredentialState.INVALID if e.error.is_invalid_user_credentials else CredentialState.UNKNOWN
+            status = CredentialStatus(user_api.user_id, state, get_now(), e.error.message)
+        except Exception as e:
+            status = CredentialStatus(user_api.user_id, CredentialState.UNKNOWN, get_now(), repr(e))
+        else:
+            status = CredentialStatus(user_api.user_id, CredentialState.OK, get_now())
+        self.statuses[user_api.user_id] = status
+        return status
+
+    async def check_all(self, user_apis: Iterable[FatSecretUserAPI], concurrency: int = 50) -> dict[str, CredentialStatus]:
+        """
+        Checks every user concurrently, at most `concurrency` calls at a time.
+        Opening that many connections at once also warms up the connection pool.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _check(user_api: FatSecretUserAPI) -> CredentialStatus:
+            async with semaphore:
+                return await self.check(user_api)
+
+        statuses = await asyncio.gather(*(_check(user_api) for user_api in user_apis))
+        invalid = [status.user_id for status in statuses if status.state == CredentialState.INVALID]
+        logger.info("Checked credentials of %d users, %d invalid: %s", len(statuses), len(invalid), invalid)
+        return {status.user_id: status for status in statuses}
@@ -0,0 +1,73 @@
+"""
+Diary history: food entries of every user kept in memory for offline analysis.
+"""
+import asyncio
+import datetime
+from collections import defaultdict
+from typing import Iterable, Iterator, Optional
+
+from ..api.client import FatSecretUserAPI
+from ..api.models.common import DateInt
+from ..api.models.food_entry import FoodEntry
+from .events import SyncListener
+from .units import UnitConverter
+
+
+def iter_dates(from_date: datetime.date, to_date: datetime.date) -> Iterator[DateInt]:
+    """Dates from `from_date` until (inclusive) `to_date`."""
+    for offset in range((to_date - from_date).days + 1):
+        yield DateInt.validate(from_date + datetime.timedelta(days=offset))
+
+
+class DiaryHistory(SyncListener):
+    """
+    Latest known diary of every user on every date. Kept up to date by sync events.
+    """
+
+    def __init__(self):
+        self._diaries: dict[str, dict[DateInt, list[FoodEntry]]] = defaultdict(dict)
+
+    @property
+    def users(self) -> list[str]:
+        return list(self._diaries)
+
+    def set_diary(self, user_id: str, date: DateInt, entries: list[FoodEntry]):
+        self._diaries[user_id][date] = list(entries)
+
+    def get_diary(self, user_id: str, date: DateInt) -> Optional[list[FoodEntry]]:
+        return self._diaries.get(user_id, {}).get(date)
+
+    def entries(self, user_id: str) -> list[FoodEntry]:
+        return [entry for _, entries in sorted(self._diaries.get(user_id, {}).items()) for entry in entries]
+
+    def on_entries_fetched(self, user_id: Optional[str], date: DateInt, entries: list[FoodEntry]):
+        if user_id is not None:
+            self.set_diary(user_id, date, entries)
+
+    async def fetch(self, user_api: FatSecretUserAPI, dates: Iterable[DateInt], concurrency: int = 8):
+        await fetch_diaries(user_api, dates, self, concurrency=concurrency)
+
+
+async def fetch_diaries(
+    user_api: FatSecretUserAPI,
+    dates: Iterable[DateInt],
+    listener: SyncListener,
+    concurrency: int = 8,
+    converter: Optional[UnitConverter] = None,
+):
+    """
+    Loads diaries of the user on every date concurrently, at most `concurrency` calls at a time,
+    and reports every one of them to the listener. With a converter, factor tables of every food
+    in a diary are loaded before it is reported.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _fetch(date: DateInt):
+        async with semaphore:
+            entries = await user_api.get_food_entries_v2(date=date)
+        food_entries = entries.food_entry if entries else []
+        if converter is not None:
+            await converter.ensure_foods(user_api, {entry.food_id for entry in food_entries})
+        listener.on_entries_fetched(user_api.user_id, date, food_entries)
+
+    await asyncio.gather(*(_fetch(date) for date in dates))
@@ -0,0 +1,196 @@
+"""
+Frequent meals: mining meal templates from diary history and logging them in one batch.
+"""
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from ..api.client import FatSecretUserAPI
+from ..api.models.common import DateInt
+from ..api.models.food_entry import CreateFoodEntryRequest, FoodEntry
+from .models.meals import MealTemplate, MealTemplateItem
+
+logger = logging.getLogger(__name__)
+
+
+class MealItem(NamedTuple):
+    food_id: int
+    serving_id: int
+    number_of_units: float
+
+
+class _FPNode:
+    __slots__ = ("item", "count", "parent", "children")
+
+    def __init__(self, item: Optional[MealItem], parent: Optional["_FPNode"]):
+        self.item = item
+        self.count = 0
+        self.parent = parent
+        self.children: dict[MealItem, "_FPNode"] = {}
+
+
+def fp_growth(
+    transactions: Iterable[tuple[Iterable[MealItem], int]],
+    min_support: int,
+    max_size: Optional[int] = None,
+    _suffix: frozenset[MealItem] = frozenset(),
+) -> Iterator[tuple[frozenset[MealItem], int]]:
+    """
+    FP-growth frequent itemset mining.
+
+    Args:
+        transactions:
+            Pairs of (items, count), e.g. items of a single logged meal and 1.
+        min_support:
+            Minimum number of transactions an itemset must be found in.
+        max_size:
+            Maximum itemset size, unlimited by default.
+    Returns:
+        Iterator over every frequent itemset and its support.
+    """
+    transactions = [(frozenset(items), count) for items, count in transactions]
+    supports: Counter[MealItem] = Counter()
+    for items, count in transactions:
+        for item in items:
+            supports[item] += count
+    order = sorted((item for item, support in supports.items() if support >= min_support), key=lambda i: (-supports[i], i))
+    rank = {item: idx for idx, item in enumerate(order)}
+
+    # Build FP-tree: transactions share prefixes of their items sorted by descending support
+    root = _FPNode(None, None)
+    header: dict[MealItem, list[_FPNode]] = defaultdict(list)
+    for items, count in transactions:
+        node = root
+        for item in sorted((i for i in items if i in rank), key=rank.__getitem__):
+            child = node.children.get(item)
+            if child is None:
+                child = node.children[item] = _FPNode(item, node)
+                header[item].append(child)
+            child.count += count
+            node = child
+
+    # Grow itemsets from the least frequent item, mining conditional trees of its prefix paths
+    for item in reversed(order):
+        itemset = _suffix | {item}
+        yield itemset, supports[item]
+        if max_size is not None and len(itemset) >= max_size:
+            continue
+        conditional = []
+        for node in header[item]:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            if path:
+                conditional.append((path, node.count))
+        yield from fp_growth(conditional, min_support, max_size, _suffix=itemset)
+
+
+def make_meal_transactions(entries: Iterable[FoodEntry]) -> dict[str, list[frozenset[MealItem]]]:
+    """
+    Groups diary entries of a single user into logged meals.
+
+    Returns:
+        Sets of items of every logged meal, by meal name.
+    """
+    meals: dict[tuple[DateInt, str], set[MealItem]] = defaultdict(set)
+    for entry in entries:
+        meals[(entry.date_int, entry.meal)].add(MealItem(entry.food_id, entry.serving_id, round(entry.number_of_units, 3)))
+    transactions: dict[str, list[frozenset[MealItem]]] = defaultdict(list)
+    for (_, meal), items in meals.items():
+        transactions[meal].append(frozenset(items))
+    return transactions
+
+
+def mine_meal_templates(
+    histories: Iterable[Iterable[FoodEntry]],
+    min_support: int = 3,
+    min_size: int = 2,
+    max_size: Optional[int] = 8,
+) -> list[MealTemplate]:
+    """
+    Finds sets of foods (with the same serving and amount) that are often logged together in the same meal.
+
+    Args:
+        histories:
+            Diary entries of every user, one iterable per user.
+        min_support:
+            Minimum number of logged meals a template must be found in.
+        min_size:
+            Minimum number of items in a template.
+        max_size:
+            Maximum number of items in a template.
+    Returns:
+        Closed frequent item sets (no bigger template is logged as often) sorted by support and size.
+    """
+    transactions: dict[str, list[frozenset[MealItem]]] = defaultdict(list)
+    names: dict[tuple[int, int], str] = {}
+    for entries in histories:
+        entries = list(entries)
+        for entry in entries:
+            names[(entry.food_id, entry.serving_id)] = entry.food_entry_name
+        for meal, meal_transactions in make_meal_transactions(entries).items():
+            transactions[meal].extend(meal_transactions)
+
+    templates = []
+    for meal, meal_transactions in transactions.items():
+        itemsets = {
+            itemset: support
+            for itemset, support in fp_growth(Counter(meal_transactions).items(), min_support, max_size)
+            if len(itemset) >= min_size
+        }
+        for itemset, support in itemsets.items():
+            if any(support == other_support and itemset < other for other, other_support in itemsets.items()):
+                continue
+            items = [
+                MealTemplateItem(
+                    food_id=item.food_id,
+                    serving_id=item.serving_id,
+                    number_of_units=item.number_of_units,
+                    food_entry_name=names[(item.food_id, item.serving_id)],
+                )
+                for item in sorted(itemset)
+            ]
+            templates.append(MealTemplate(meal=meal, items=items, support=support))
+    templates.sort(key=lambda t: (-t.support, -len(t.items), t.meal))
+    return templates
+
+
+class LoggedFoodEntry(NamedTuple):
+    user_id: Optional[str]
+    request: CreateFoodEntryRequest
+    food_entry_id: Optional[int]
+    error: Optional[BaseException]
+
+
+async def log_meal_template(
+    template: MealTemplate,
+    user_apis: Iterable[FatSecretUserAPI],
+    dates: Iterable[DateInt],
+    concurrency: int = 8,
+) -> list[LoggedFoodEntry]:
+    """
+    Logs every item of the template for every user on every date. All `food_entry.create` calls
+    are pipelined, at most `concurrency` at a time. A failed item does not stop the others.
+
+    Returns:
+        Outcome of every created entry.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    dates = list(dates)
+
+    async def _create(user_api: FatSecretUserAPI, request: CreateFoodEntryRequest) -> LoggedFoodEntry:
+        async with semaphore:
+            # noinspection PyBroadException
+            try:
+                food_entry_id = await user_api.create_entry(request)
+            except Exception as e:
+                logger.warning("Failed to ADD food entry for %s", user_api.user_id, exc_info=True)
+                return LoggedFoodEntry(user_api.user_id, request, None, e)
+        return LoggedFoodEntry(user_api.user_id, request, food_entry_id, None)
+
+    return await asyncio.gather(
+        *(_create(user_api, request) for user_api in user_apis for date in dates for request in template.make_requests(date))
+    )
@@ -1,6 +1,8 @@
+import datetime
 import pathlib
+from typing import Optional
 
-from pydantic import BaseModel, Extra
+from pydantic import BaseModel, Extra, Field, HttpUrl
 
 from fatsecret_sync.api.models.auth import OAuth1Credentials, OAuth2Credentials
 
@@ -15,9 +17,97 @@ class FatSecretConfig(BaseModel):
     oauth2: OAuth2Credentials
 
 
+class HedgingConfig(BaseModel):
+    """
+    Hedged requests for read calls: if a call takes longer than `percentile` of its recent latencies,
+    a second copy is sent and whichever answers first wins. Writes are never hedged.
+    """
+
+    enabled: bool = False
+    percentile: float = Field(default=0.95, gt=0.0, lt=1.0)
+    min_samples: int = Field(default=20, ge=1, description="Observed latencies required before trusting the percentile")
+    default_delay: datetime.timedelta = datetime.timedelta(seconds=1)
+    min_delay: datetime.timedelta = datetime.timedelta(milliseconds=50)
+
+
+class RateLimitConfig(BaseModel):
+    """
+    API rate budget shared by interactive (bot commands) and bulk (background sync) requests.
+    Interactive requests skip the bulk queue and are guaranteed `interactive_share` of the budget.
+    """
+
+    enabled: bool = False
+    rate: float = Field(default=10.0, gt=0.0, description="Requests per second")
+    burst: float = Field(default=10.0, ge=1.0, description="Requests sent at once after idle time")
+    interactive_share: float = Field(default=0.8, gt=0.0, lt=1.0)
+
+
+class ConcurrencyConfig(BaseModel):
+    """
+    Adaptive limit of API calls in flight: grows while calls answer under `target_latency`,
+    shrinks by `decrease_factor` on timeouts, 5xx responses and throttling errors.
+    """
+
+    enabled: bool = False
+    initial_limit: float = Field(default=10.0, ge=1.0)
+    min_limit: float = Field(default=1.0, ge=1.0)
+    max_limit: float = Field(default=100.0, ge=1.0)
+    target_latency: datetime.timedelta = datetime.timedelta(seconds=1)
+    increase: float = Field(default=1.0, gt=0.0, description="Limit growth per round trip")
+    decrease_factor: float = Field(default=0.5, gt=0.0, lt=1.0)
+    throttling_error_codes: list[int] = Field(
+        default=[], description="API error codes that mean too many requests, besides HTTP 429 responses"
+    )
+
+
+class CircuitBreakerConfig(BaseModel):
+    """
+    Circuit breaker per API method: after `failure_threshold` overload failures in a row (timeouts, 5xx, throttling)
+    calls fail immediately for `reset_timeout`, then `probes` calls decide whether the method works again.
+    """
+
+    enabled: bool = False
+    failure_threshold: int = Field(default=5, ge=1)
+    reset_timeout: datetime.timedelta = datetime.timedelta(seconds=30)
+    probes: int = Field(default=1, ge=1)
+    per_user: bool = Field(default=False, description="Keep a separate circuit for every user")
+
+
+class BulkheadConfig(BaseModel):
+    """
+    Separate limits of reads and writes in flight, so that degraded write methods cannot take every connection.
+    """
+
+    enabled: bool = False
+    reads: int = Field(default=20, ge=1)
+    writes: int = Field(default=5, ge=1)
+
+
+class ClientConfig(BaseModel):
+    call_timeout: datetime.timedelta = Field(default=datetime.timedelta(seconds=30), description="Timeout of a single API call")
+    hedging: HedgingConfig = HedgingConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    concurrency: ConcurrencyConfig = ConcurrencyConfig()
+    circuit_breaker: CircuitBreakerConfig = CircuitBreakerConfig()
+    bulkheads: BulkheadConfig = BulkheadConfig()
+
+
+class WebhookConfig(BaseModel):
+    url: Optional[HttpUrl] = Field(default=None, description="Public URL Telegram sends updates to")
+    host: str = "0.0.0.0"
+    port: int = 8080
+    path: str = "/telegram/webhook"
+    secret_token: Optional[str] = Field(default=None, description="Telegram must send this token with every update")
+
+
 class TelegramConfig(BaseModel):
     admin_id: int | str
     bot_token: str
+    webhook: WebhookConfig = WebhookConfig()
+    summary_max_age: datetime.timedelta = Field(
+        default=datetime.timedelta(minutes=10),
+        description="A day summary older than this is fetched again when asked for, e.g. for users outside sync pairs",
+    )
 
 
 class FilesUserBackendConfig(BaseModel):
@@ -31,10 +121,60 @@ class UserBackendConfig(BaseModel):
     files: FilesUserBackendConfig
 
 
+class SyncPairConfig(BaseModel):
+    origin: str = Field(description="ID of the user with entries to sync from")
+    target: str = Field(description="ID of the user to sync entries to")
+    keep_unique_target_food: bool = True
+
+
+class PollingConfig(BaseModel):
+    """
+    Adaptive polling schedule of the sync daemon.
+
+    Today's diary is polled often during meal hours and less often outside of them,
+    past days are checked rarely. Every poll that finds origin diary unchanged multiplies
+    the interval by `backoff_factor`, up to the corresponding maximum. Any change resets it.
+    """
+
+    meal_hours: list[tuple[int, int]] = Field(
+        default=[(7, 11), (12, 16), (18, 23)], description="Hour ranges [start, end) when people usually log food"
+    )
+    today_interval: datetime.timedelta = datetime.timedelta(minutes=5)
+    today_idle_interval: datetime.timedelta = datetime.timedelta(minutes=30)
+    today_max_interval: datetime.timedelta = datetime.timedelta(hours=1)
+    past_interval: datetime.timedelta = datetime.timedelta(hours=3)
+    past_max_interval: datetime.timedelta = datetime.timedelta(hours=24)
+    backoff_factor: float = Field(default=2.0, ge=1.0)
+    lookback_days: int = Field(default=2, ge=0, description="Number of past days to keep in sync besides today")
+
+
+class SyncConfig(BaseModel):
+    pairs: list[SyncPairConfig] = []
+    run_timeout: datetime.timedelta = Field(
+        default=datetime.timedelta(minutes=5), description="Deadline for syncing a single pair on a single day"
+    )
+    polling: PollingConfig = PollingConfig()
+
+
+class WeightsConfig(BaseModel):
+    """
+    Weight history collected from user profiles: all profiles are fetched in one sweep every `refresh_interval`
+    (and on bot start, by the credentials check), and weight trend and goal queries are answered from the history.
+    """
+
+    enabled: bool = True
+    path: Optional[pathlib.Path] = Field(default=None, description="JSON file to keep the history in, in memory only if not set")
+    refresh_interval: datetime.timedelta = datetime.timedelta(hours=6)
+    concurrency: int = Field(default=20, ge=1, description="Profiles fetched at a time")
+
+
 class AppConfig(BaseModel):
     class Meta:
         extra = Extra.forbid
 
     fatsecret: FatSecretConfig
+    client: ClientConfig = ClientConfig()
     telegram: TelegramConfig
     user_backend: UserBackendConfig
+    sync: SyncConfig = SyncConfig()
+    weights: WeightsConfig = WeightsConfig()
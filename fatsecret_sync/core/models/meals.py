@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+
+from fatsecret_sync.api.models.common import DateInt
+from fatsecret_sync.api.models.food_entry import CreateFoodEntryRequest
+
+
+class MealTemplateItem(BaseModel):
+    food_id: int
+    serving_id: int
+    number_of_units: float
+    food_entry_name: str
+
+
+class MealTemplate(BaseModel):
+    meal: str
+    items: list[MealTemplateItem]
+    support: int = Field(default=0, description="Number of logged meals that contain every item of the template")
+
+    def make_requests(self, date: DateInt) -> list[CreateFoodEntryRequest]:
+        return [
+            CreateFoodEntryRequest(
+                food_entry_name=item.food_entry_name,
+                serving_id=item.serving_id,
+                number_of_units=item.number_of_units,
+                meal=self.meal,
+                food_id=item.food_id,
+                date=date,
+            )
+            for item in self.items
+        ]
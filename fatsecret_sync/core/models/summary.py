@@ -0,0 +1,30 @@
+import datetime
+
+from kily.common.utils.dt import get_now
+from pydantic import BaseModel, Field
+
+from fatsecret_sync.api.models.common import BasicNutritionalInfoMixin, DateInt
+
+
+class DailySummary(BasicNutritionalInfoMixin):
+    user_id: str
+    date: DateInt
+    entries: int
+    meals: dict[str, int] = Field(default_factory=dict, description="Calories by meal")
+    food_grams: dict[int, float] = Field(default_factory=dict, description="Grams of every food with known servings")
+    # noinspection Pydantic
+    updated_at: datetime.datetime = Field(default_factory=get_now)
+
+
+class PeriodSummary(BasicNutritionalInfoMixin):
+    user_id: str
+    from_date: DateInt
+    to_date: DateInt
+    days: list[DailySummary]
+    missing_days: list[DateInt] = []
+    food_grams: dict[int, float] = Field(default_factory=dict, description="Grams of every food with known servings")
+
+    @property
+    def average_calories(self) -> float:
+        logged = [day for day in self.days if day.entries]
+        return self.calories / len(logged) if logged else 0.0
@@ -0,0 +1,43 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from fatsecret_sync.api.models.common import DateInt
+
+
+class WeightTrend(BaseModel):
+    user_id: str
+    from_date: DateInt
+    to_date: DateInt
+    points: int = Field(description="Weigh-ins in the period")
+    first_kg: float
+    last_kg: float
+    kg_per_week: Optional[float] = Field(default=None, description="Least squares slope, None with less than two weigh-ins")
+
+    @property
+    def change_kg(self) -> float:
+        return self.last_kg - self.first_kg
+
+
+class GoalProgress(BaseModel):
+    user_id: str
+    start_date: DateInt
+    start_kg: float
+    current_date: DateInt
+    current_kg: float
+    goal_kg: float
+    eta: Optional[DateInt] = Field(default=None, description="When the goal is reached at the recent pace, if it leads there")
+
+    @property
+    def remaining_kg(self) -> float:
+        return self.goal_kg - self.current_kg
+
+    @property
+    def progress(self) -> float:
+        """
+        Share of the way from the start weight to the goal, may be negative or above 1.
+        """
+        total = self.goal_kg - self.start_kg
+        if total == 0:
+            return 1.0
+        return (self.current_kg - self.start_kg) / total
@@ -0,0 +1,172 @@
+"""
+Hot reload of the config and user credentials: long-running processes pick up changed files without a restart,
+keeping in-flight syncs, caches and pooled connections.
+"""
+import asyncio
+import dataclasses
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+
+from kily.common.utils.config_loader import ConfigLoader
+
+from .models.config import AppConfig, SyncConfig
+from .models.creds import CredsConfig
+from .users import get_creds_path, load_creds
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class CredsDiff:
+    added: set[str] = dataclasses.field(default_factory=set)
+    removed: set[str] = dataclasses.field(default_factory=set)
+    changed: set[str] = dataclasses.field(default_factory=set)  # same user, other OAuth tokens
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    @property
+    def rebuilt(self) -> set[str]:
+        """Users whose API instances must be (re)built."""
+        return self.added | self.changed
+
+
+def diff_creds(old: CredsConfig, new: CredsConfig) -> CredsDiff:
+    return CredsDiff(
+        added=new.users.keys() - old.users.keys(),
+        removed=old.users.keys() - new.users.keys(),
+        changed={
+            user_id for user_id in old.users.keys() & new.users.keys() if old.users[user_id].auth != new.users[user_id].auth
+        },
+    )
+
+
+class ReloadListener:
+    """
+    Receives reloaded settings. Every handler is a no-op by default, override the ones you need.
+    """
+
+    def on_creds_changed(self, creds: CredsConfig, diff: CredsDiff):
+        """User credentials changed, only users in `diff` are affected."""
+
+    def on_sync_config_changed(self, config: SyncConfig):
+        """`sync` section of the config changed."""
+
+
+def _file_version(path: Path) -> Optional[tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # Inode catches atomic replace, see `users.save_creds`
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class HotReloader:
+    """
+    Polls the config and credentials files for changes and passes new settings to the listeners.
+
+    Credentials are diffed against the last loaded ones, so listeners rebuild only affected users.
+    Of the config, only the `sync` section and the user backend location are applied;
+    other sections are only reported, since they are baked into the API client and its connection pool.
+    A file that fails to load is skipped until it changes again.
+    """
+
+    def __init__(
+        self,
+        config_path: Path,
+        config: AppConfig,
+        creds: CredsConfig,
+        listeners: Iterable[ReloadListener] = (),
+        interval: float = 2.0,
+    ):
+        self.config_path = Path(config_path)
+        self.config = config
+        self.creds = creds.copy(deep=True)
+        self.listeners = list(listeners)
+        self.interval = interval
+        self._versions = {path: _file_version(path) for path in self._watched()}
+        self._stop = asyncio.Event()
+
+    def _watched(self) -> list[Path]:
+        return [self.config_path, get_creds_path(self.config.user_backend)]
+
+    def _changed(self, path: Path) -> bool:
+        version = _file_version(path)
+        if version == self._versions.get(path):
+            return False
+        self._versions[path] = version
+        return True
+
+    def reload_config(self) -> bool:
+        """
+        Returns:
+            Whether the user backend location changed, so credentials must be reloaded.
+        """
+        try:
+            config: AppConfig = ConfigLoader.load(AppConfig, path=self.config_path)
+        except Exception:
+            logger.warning("Failed to reload config from %s, keeping the current one", self.config_path, exc_info=True)
+            return False
+        old, self.config = self.config, config
+        if config.sync != old.sync:
+            logger.info("Sync config changed, applying")
+            for listener in self.listeners:
+                listener.on_sync_config_changed(config.sync)
+        restart_required = [
+            name for name in ("fatsecret", "client", "telegram", "weights") if getattr(config, name) != getattr(old, name)
+        ]
+        if restart_required:
+            logger.warning("Changes to %s config take effect after restart", ", ".join(restart_required))
+        return config.user_backend != old.user_backend
+
+    def reload_creds(self):
+        try:
+            creds = load_creds(self.config.user_backend)
+        except Exception:
+            logger.warning("Failed to reload user credentials, keeping the current ones", exc_info=True)
+            return
+        diff = diff_creds(self.creds, creds)
+        self.creds = creds
+        if not diff:
+            return
+        logger.info(
+            "User credentials changed: added %s, removed %s, changed %s",
+            sorted(diff.added),
+            sorted(diff.removed),
+            sorted(diff.changed),
+        )
+        for listener in self.listeners:
+            listener.on_creds_changed(creds, diff)
+
+    def check(self):
+        """
+        Reloads files that changed since the last check.
+        """
+        creds_path = get_creds_path(self.config.user_backend)
+        reload_creds = self._changed(creds_path)
+        if self._changed(self.config_path) and self.reload_config():
+            new_creds_path = get_creds_path(self.config.user_backend)
+            self._versions[new_creds_path] = _file_version(new_creds_path)
+            reload_creds = True
+        if reload_creds:
+            self.reload_creds()
+
+    async def run(self):
+        logger.info("Watching %s for changes", ", ".join(str(path) for path in self._watched()))
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                # noinspection PyBroadException
+                try:
+                    self.check()
+                except Exception:
+                    # A bad file or a failing listener must not stop watching for the next change
+                    logger.warning("Failed to apply reloaded config or credentials", exc_info=True)
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,164 @@
+"""
+Local food search index built from diary history, answers autocomplete queries without API calls.
+"""
+import bisect
+import dataclasses
+import heapq
+import math
+import re
+from collections import Counter, OrderedDict, defaultdict
+from typing import Iterable, Optional
+
+from ..api.models.common import DateInt
+from ..api.models.food import FoodInfoV3
+from ..api.models.food_entry import FoodEntry
+from .events import SyncListener
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_words(text: str) -> list[str]:
+    return _WORD_RE.findall(text.casefold())
+
+
+def make_trigrams(text: str) -> set[str]:
+    padded = f"  {' '.join(normalize_words(text))} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclasses.dataclass(frozen=True)
+class FoodSearchResult:
+    food_id: int
+    name: str
+    frequency: int
+    score: float
+
+
+class FoodSearchIndex(SyncListener):
+    """
+    In-memory index of every food seen in diaries (`FoodEntry.food_entry_name`) or
+    food information (`FoodInfoV3.food_name`).
+
+    Words of every name are kept in a sorted list for prefix lookups, and every name is split
+    into trigrams for typo-tolerant and infix matching. Results are ranked by how often
+    the user (or, if not given, everybody) logged the food.
+
+    The index is updated incrementally: the same food entry is never counted twice, so it is
+    safe to feed the same diary on every sync. Only the latest `max_seen_entries` entries are remembered,
+    which covers the days a sync keeps refreshing.
+    """
+
+    def __init__(self, min_trigram_similarity: float = 0.5, max_seen_entries: int = 100_000):
+        self.min_trigram_similarity = min_trigram_similarity
+        self.max_seen_entries = max_seen_entries
+        self.names: dict[int, str] = {}
+        self._name_variants: dict[int, set[str]] = defaultdict(set)
+        self._words: list[str] = []
+        self._foods_by_word: dict[str, set[int]] = defaultdict(set)
+        self._foods_by_trigram: dict[str, set[int]] = defaultdict(set)
+        self._frequency: Counter[int] = Counter()
+        self._user_frequency: dict[str, Counter[int]] = defaultdict(Counter)
+        self._seen_entries: OrderedDict[tuple[Optional[str], int], None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _add_name(self, food_id: int, name: str, canonical: bool = False):
+        if canonical or food_id not in self.names:
+            self.names[food_id] = name
+        variant = " ".join(normalize_words(name))
+        if variant in self._name_variants[food_id]:
+            return
+        self._name_variants[food_id].add(variant)
+        for word in normalize_words(name):
+            if word not in self._foods_by_word:
+                bisect.insort(self._words, word)
+            self._foods_by_word[word].add(food_id)
+        for trigram in make_trigrams(variant):
+            self._foods_by_trigram[trigram].add(food_id)
+
+    def add_entries(self, entries: Iterable[FoodEntry], user_id: Optional[str] = None):
+        for entry in entries:
+            key = (user_id, entry.food_entry_id)
+            if key in self._seen_entries:
+                self._seen_entries.move_to_end(key)
+                continue
+            self._seen_entries[key] = None
+            if len(self._seen_entries) > self.max_seen_entries:
+                self._seen_entries.popitem(last=False)
+            self._add_name(entry.food_id, entry.food_entry_name)
+            self._frequency[entry.food_id] += 1
+            if user_id is not None:
+                self._user_frequency[user_id][entry.food_id] += 1
+
+    def add_food(self, food_id: int, food: FoodInfoV3):
+        self._add_name(food_id, food.food_name, canonical=True)
+
+    def on_entries_fetched(self, user_id: Optional[str], date: DateInt, entries: list[FoodEntry]):
+        self.add_entries(entries, user_id=user_id)
+
+    def on_food_loaded(self, food_id: int, food: FoodInfoV3):
+        self.add_food(food_id, food)
+
+    def _prefix_matches(self, words: list[str]) -> set[int]:
+        matches: Optional[set[int]] = None
+        for word in words:
+            word_matches = set()
+            idx = bisect.bisect_left(self._words, word)
+            while idx < len(self._words) and self._words[idx].startswith(word):
+                word_matches |= self._foods_by_word[self._words[idx]]
+                idx += 1
+            matches = word_matches if matches is None else matches & word_matches
+            if not matches:
+                break
+        return matches or set()
+
+    def _trigram_matches(self, query: str) -> dict[int, float]:
+        # Rarest first: common trigrams ("  s", " sa") are shared by a good part of the index
+        postings = sorted((self._foods_by_trigram.get(trigram, set()) for trigram in make_trigrams(query)), key=len)
+        # Share of query trigrams found in the name: query is usually a part of the name, not the whole name
+        required = max(1, math.ceil(self.min_trigram_similarity * len(postings)))
+        # A food with `required` of the query trigrams has at least one of the rarest `len - required + 1`,
+        # so only those lists are scanned, and the common ones are only probed for the candidates found there
+        rare, common = postings[: len(postings) - required + 1], postings[len(postings) - required + 1 :]
+        shared: Counter[int] = Counter()
+        for foods in rare:
+            shared.update(foods)
+        similar = {}
+        for food_id, count in shared.items():
+            if count + len(common) < required:
+                continue
+            count += sum(1 for foods in common if food_id in foods)
+            if count >= required:
+                similar[food_id] = count / len(postings)
+        return similar
+
+    def search(self, query: str, user_id: Optional[str] = None, limit: int = 10) -> list[FoodSearchResult]:
+        """
+        Args:
+            query:
+                Beginning of the food name (every word may be incomplete).
+            user_id:
+                Rank by foods of this user first.
+            limit:
+                Maximum number of results.
+        Returns:
+            Foods that have every query word as a word prefix, followed by similar names (if there are not enough).
+        """
+        words = normalize_words(query)
+        if not words or limit <= 0:
+            return []
+        user_frequency = self._user_frequency.get(user_id, Counter()) if user_id is not None else Counter()
+
+        def _rank(food_id: int) -> tuple:
+            return -user_frequency[food_id], -self._frequency[food_id], len(self.names[food_id])
+
+        prefix = heapq.nsmallest(limit, self._prefix_matches(words), key=_rank)
+        results = [FoodSearchResult(f, self.names[f], self._frequency[f], 1.0) for f in prefix]
+        if len(results) < limit and len(query) >= 3:
+            similar = self._trigram_matches(query)
+            for food_id in prefix:
+                similar.pop(food_id, None)
+            ranked = heapq.nsmallest(limit - len(results), similar, key=lambda f: (-similar[f],) + _rank(f))
+            results.extend(FoodSearchResult(f, self.names[f], self._frequency[f], similar[f]) for f in ranked)
+        return results
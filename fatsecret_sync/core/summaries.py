@@ -0,0 +1,116 @@
+"""
+Precomputed daily summaries, so that summary requests are answered from memory.
+"""
+import datetime
+from collections import defaultdict
+from typing import Optional
+
+from ..api.models.common import NUTRIENT_FIELDS, DateInt
+from ..api.models.food import ServingMetricUnitType
+from ..api.models.food_entry import FoodEntry
+from .events import SyncListener
+from .models.summary import DailySummary, PeriodSummary
+from .units import UnitConverter
+
+
+def make_daily_summary(
+    user_id: str, date: DateInt, entries: list[FoodEntry], converter: Optional[UnitConverter] = None
+) -> DailySummary:
+    """
+    With a converter, totals are computed from factor tables in one pass per serving, see `UnitConverter.nutrient_totals`,
+    and every food with known servings is summed in grams.
+    """
+    meals: dict[str, int] = defaultdict(int)
+    for entry in entries:
+        meals[entry.meal] += entry.calories
+    if converter is None:
+        return DailySummary(
+            user_id=user_id,
+            date=date,
+            entries=len(entries),
+            meals=dict(meals),
+            calories=sum(e.calories for e in entries),
+            protein=sum(e.protein for e in entries),
+            carbohydrate=sum(e.carbohydrate for e in entries),
+            fat=sum(e.fat for e in entries),
+        )
+    totals = dict(zip(NUTRIENT_FIELDS, converter.nutrient_totals(entries)))
+    return DailySummary(
+        user_id=user_id,
+        date=date,
+        entries=len(entries),
+        meals=dict(meals),
+        calories=round(totals["calories"]),
+        protein=totals["protein"],
+        carbohydrate=totals["carbohydrate"],
+        fat=totals["fat"],
+        food_grams=converter.food_amounts(entries, ServingMetricUnitType.GRAMS),
+    )
+
+
+class SummaryCache(SyncListener):
+    """
+    Daily summary of every user on every day seen by sync. A day is recomputed whenever
+    its diary is fetched again, so the cache is as fresh as the last sync of that day.
+    """
+
+    def __init__(self, keep_days: int = 35, converter: Optional[UnitConverter] = None):
+        """
+        Args:
+            keep_days:
+                Summaries older than this number of days (relative to the newest one) are dropped.
+            converter:
+                Factor tables used to sum every food in grams across servings.
+        """
+        self.keep_days = keep_days
+        self.converter = converter
+        self._summaries: dict[str, dict[DateInt, DailySummary]] = defaultdict(dict)
+
+    @property
+    def needs_foods(self) -> bool:
+        return self.converter is not None
+
+    def update(self, user_id: str, date: DateInt, entries: list[FoodEntry]) -> DailySummary:
+        summary = make_daily_summary(user_id, date, entries, self.converter)
+        days = self._summaries[user_id]
+        days[date] = summary
+        oldest = max(days) - datetime.timedelta(days=self.keep_days)
+        for old_date in [d for d in days if d < oldest]:
+            del days[old_date]
+        return summary
+
+    def on_entries_fetched(self, user_id: Optional[str], date: DateInt, entries: list[FoodEntry]):
+        if user_id is not None:
+            self.update(user_id, date, entries)
+
+    def get_day(self, user_id: str, date: DateInt) -> Optional[DailySummary]:
+        return self._summaries.get(user_id, {}).get(date)
+
+    def get_period(self, user_id: str, to_date: DateInt, days: int = 7) -> PeriodSummary:
+        """
+        Summary of `days` days ending with (inclusive) `to_date`. Days that were never synced are listed as missing.
+        """
+        summaries, missing = [], []
+        for offset in range(days - 1, -1, -1):
+            date = DateInt.validate(to_date - datetime.timedelta(days=offset))
+            summary = self.get_day(user_id, date)
+            if summary is None:
+                missing.append(date)
+            else:
+                summaries.append(summary)
+        food_grams: dict[int, float] = defaultdict(float)
+        for summary in summaries:
+            for food_id, grams in summary.food_grams.items():
+                food_grams[food_id] += grams
+        return PeriodSummary(
+            user_id=user_id,
+            from_date=DateInt.validate(to_date - datetime.timedelta(days=days - 1)),
+            to_date=to_date,
+            days=summaries,
+            missing_days=missing,
+            calories=sum(s.calories for s in summaries),
+            protein=sum(s.protein for s in summaries),
+            carbohydrate=sum(s.carbohydrate for s in summaries),
+            fat=sum(s.fat for s in summaries),
+            food_grams=dict(food_grams),
+        )
@@ -1,22 +1,34 @@
+import datetime
 import logging
 from collections import defaultdict
-from typing import Iterable, Optional, TypeVar
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar
 
 from kily.common.utils.dt import get_now
 
 from ..api.client import FatSecretUserAPI
+from ..api.deadlines import Deadline, deadline_scope
+from ..api.errors import CircuitOpenError
 from ..api.models.common import DateInt
 from ..api.models.food_entry import CreateFoodEntryRequest, EditFoodEntryRequest, FoodEntries, FoodEntry
+from ..utils.log import Lazy, log_context
+from ..utils.profiling import phase
+from .events import SyncListener
+from .history import iter_dates
 from .models.sync import SyncDelta
+from .units import UnitConverter
 from .utils import make_diary_print
 
 logger = logging.getLogger(__name__)
 
 KT = TypeVar("KT")
+OpT = TypeVar("OpT")
 
 
 def merge_food_entries(
-    origin_entries: Iterable[FoodEntry], target_entries: Iterable[FoodEntry], keep_unique_target_food: bool = True
+    origin_entries: Iterable[FoodEntry],
+    target_entries: Iterable[FoodEntry],
+    keep_unique_target_food: bool = True,
+    converter: Optional[UnitConverter] = None,
 ) -> SyncDelta:
     origin_entries = list(origin_entries)
     target_entries = list(target_entries)
@@ -42,7 +54,7 @@ def merge_food_entries(
             if food_id not in origin_by_food_id:
                 for entry in target_food_id_entries:
                     to_delete.remove(entry.food_entry_id)
-                    logger.debug(f"KEEP '{entry.food_entry_description}': not present in origin")
+                    logger.debug("KEEP '%s': not present in origin", entry.food_entry_description)
     delta.delete = list(to_delete)
     # Process creates
     origin_by_cat = _map_reduce_foods(origin_entries, field=("food_id", "serving_id"), key_type=tuple[int, int])
@@ -51,7 +63,7 @@ def merge_food_entries(
     for cat_key, origin_cat_entries in origin_by_cat.items():
         if cat_key not in target_by_cat:  # Add all: food and serving not present in target
             for entry in origin_cat_entries:
-                logger.debug(f"ADD '{entry.food_entry_description}': not present in target")
+                logger.debug("ADD '%s': not present in target", entry.food_entry_description)
                 delta.create.append(
                     CreateFoodEntryRequest(
                         serving_id=entry.serving_id,
@@ -66,7 +78,7 @@ def merge_food_entries(
             target_cat_entries = target_by_cat[cat_key]
             for idx, entry in enumerate(origin_cat_entries):
                 if idx >= len(target_cat_entries):
-                    logger.debug(f"ADD '{entry.food_entry_description}': not present in target")
+                    logger.debug("ADD '%s': not present in target", entry.food_entry_description)
                     delta.create.append(
                         CreateFoodEntryRequest(
                             serving_id=entry.serving_id,
@@ -94,54 +106,209 @@ def merge_food_entries(
                                 meal=entry.meal,
                             )
                         )
+    if converter is not None:
+        _match_across_servings(delta, target_entries, converter)
     return delta
 
 
-async def sync_user(origin_api: FatSecretUserAPI, target_api: FatSecretUserAPI, date: Optional[DateInt] = None):
+def _cross_serving_foods(delta: SyncDelta, target_entries: list[FoodEntry]) -> set[int]:
+    """
+    Returns:
+        Foods that are both created and deleted in the same meal, the only ones `_match_across_servings`
+        needs factor tables of.
+    """
+    to_delete = set(delta.delete)
+    deleted = {(entry.food_id, entry.meal) for entry in target_entries if entry.food_entry_id in to_delete}
+    return {request.food_id for request in delta.create if (request.food_id, request.meal) in deleted}
+
+
+def _match_across_servings(delta: SyncDelta, target_entries: list[FoodEntry], converter: UnitConverter):
+    """
+    Drops a create and a delete of the same food and meal when both are the same amount in different servings:
+    the target entry already has what the origin one has.
+    """
+    to_delete = set(delta.delete)
+    deleted = {entry.food_entry_id: entry for entry in target_entries if entry.food_entry_id in to_delete}
+    for request in list(delta.create):
+        for entry_id, entry in deleted.items():
+            if entry.meal == request.meal and converter.same_amount(request, entry):
+                logger.debug("KEEP '%s': same amount as origin in another serving", entry.food_entry_description)
+                delta.create.remove(request)
+                delta.delete.remove(entry_id)
+                del deleted[entry_id]
+                break
+
+
+async def _apply_operations(
+    kind: str, operations: list[OpT], apply: Callable[[OpT], Awaitable], date: DateInt, listener: SyncListener
+) -> bool:
+    """
+    Returns:
+        Whether every operation was applied.
+    """
+    if not operations:
+        return True
+    applied = True
+    logger.info("%s %d food entries %s target", kind, len(operations), "from" if kind == "DEL" else "to")
+    for i, operation in enumerate(operations):
+        # noinspection PyBroadException
+        try:
+            with phase(f"apply {kind}"):
+                await apply(operation)
+        except CircuitOpenError as e:
+            # Every remaining operation would fail the same way
+            for _ in operations[i:]:
+                listener.on_operation_applied(date, kind, e)
+            logger.warning("Skipped %d %s operations: %s, retry in %.0fs", len(operations) - i, kind, e.message, e.retry_after)
+            return False
+        except Exception as e:
+            listener.on_operation_applied(date, kind, e)
+            deadline = Deadline.current()
+            if deadline is not None and deadline.expired:
+                raise
+            logger.warning("Failed to %s food entry", kind, exc_info=True)
+            applied = False
+        else:
+            listener.on_operation_applied(date, kind, None)
+    return applied
+
+
+async def sync_user(
+    origin_api: FatSecretUserAPI,
+    target_api: FatSecretUserAPI,
+    date: Optional[DateInt] = None,
+    *,
+    origin_entries: Optional[FoodEntries] = None,
+    keep_unique_target_food: bool = True,
+    deadline: Optional[Deadline] = None,
+    listener: Optional[SyncListener] = None,
+    converter: Optional[UnitConverter] = None,
+) -> bool:
+    """
+    Synchronizes food diary of origin user to target user on a given date.
+
+    Args:
+        origin_api:
+            API of the user with entries to sync from.
+        target_api:
+            API of the user to sync entries to.
+        date:
+            Date to synchronize (default value is the current day).
+        origin_entries:
+            Already fetched origin diary for the date, saves one API call when the caller has it at hand.
+        keep_unique_target_food:
+            Do not delete target entries with food that is absent from the origin diary.
+        deadline:
+            Deadline for the whole run, every API call made by the run is bounded by it.
+        listener:
+            Receives sync events, see `SyncListener`.
+        converter:
+            If provided, a target entry with the same amount of food as an origin one, but in another serving,
+            is kept instead of being replaced. Missing factor tables are fetched on demand: of the foods the merge
+            would replace with another serving, and of every food in both diaries if the listener `needs_foods`.
+    Returns:
+        Whether every planned operation was applied. Failed operations are logged and reported to the listener.
+    Raises:
+        DeadlineExceededError: the run did not finish before the deadline.
+    """
     if date is None:
         now = get_now()
         date = DateInt(year=now.year, month=now.month, day=now.day)
-    logger.info(f"Synchronizing users on {date.isoformat()}")
+    with (
+        deadline_scope(deadline),
+        log_context(user=f"{origin_api.user_id}->{target_api.user_id}", date=date),
+        phase("sync_user"),
+    ):
+        return await _sync_user(
+            origin_api,
+            target_api,
+            date,
+            origin_entries,
+            keep_unique_target_food,
+            listener if listener is not None else SyncListener(),
+            converter,
+        )
+
+
+async def _sync_user(
+    origin_api: FatSecretUserAPI,
+    target_api: FatSecretUserAPI,
+    date: DateInt,
+    origin_entries: Optional[FoodEntries],
+    keep_unique_target_food: bool,
+    listener: SyncListener,
+    converter: Optional[UnitConverter],
+) -> bool:
+    logger.info("Synchronizing users on %s", date)
 
-    origin_entries = await origin_api.get_food_entries_v2(date=date)
+    if origin_entries is None:
+        with phase("fetch origin"):
+            origin_entries = await origin_api.get_food_entries_v2(date=date)
     if origin_entries is None or not origin_entries.food_entry:
+        listener.on_entries_fetched(origin_api.user_id, date, [])
         logger.warning("No origin entries, nothing to sync")
-        return
-    logger.info(f"Found {len(origin_entries.food_entry)} origin food entries:\n{make_diary_print(origin_entries.food_entry)}")
-    target_entries = await target_api.get_food_entries_v2(date=date)
+        return True
+    logger.info("Found %d origin food entries", len(origin_entries.food_entry))
+    logger.debug("Origin food entries:\n%s", Lazy(make_diary_print, origin_entries.food_entry))
+    with phase("fetch target"):
+        target_entries = await target_api.get_food_entries_v2(date=date)
     if target_entries is None:
         target_entries = FoodEntries(food_entry=[])
-    logger.info(f"Found {len(target_entries.food_entry)} target food entries:\n{make_diary_print(target_entries.food_entry)}")
-    delta = merge_food_entries(
-        origin_entries=origin_entries.food_entry, target_entries=target_entries.food_entry, keep_unique_target_food=True
-    )
+    logger.info("Found %d target food entries", len(target_entries.food_entry))
+    logger.debug("Target food entries:\n%s", Lazy(make_diary_print, target_entries.food_entry))
+    if converter is not None and listener.needs_foods:
+        # Listeners (summaries) convert whole diaries. A food is fetched once and then kept by the converter.
+        with phase("load servings"):
+            await converter.ensure_foods(
+                origin_api, {entry.food_id for entry in origin_entries.food_entry + target_entries.food_entry}
+            )
+    listener.on_entries_fetched(origin_api.user_id, date, origin_entries.food_entry)
+    listener.on_entries_fetched(target_api.user_id, date, target_entries.food_entry)
+    with phase("merge"):
+        delta = merge_food_entries(
+            origin_entries=origin_entries.food_entry,
+            target_entries=target_entries.food_entry,
+            keep_unique_target_food=keep_unique_target_food,
+        )
+    if converter is not None and (foods := _cross_serving_foods(delta, target_entries.food_entry)):
+        # Only foods that the merge would replace with another serving of the same food
+        with phase("load servings"):
+            await converter.ensure_foods(origin_api, foods)
+        with phase("merge"):
+            _match_across_servings(delta, target_entries.food_entry, converter)
+    listener.on_delta_planned(date, delta)
     if not delta:
         logger.info("Nothing to sync, everything is the same")
-        return
-
-    if delta.delete:
-        logger.info(f"DEL {len(delta.delete)} food entries from target")
-        for entry_id in delta.delete:
-            # noinspection PyBroadException
-            try:
-                await target_api.delete_entry(entry_id)
-            except Exception:
-                logger.warning(f"Failed to DEL food entry", exc_info=True)
-
-    if delta.create:
-        logger.info(f"ADD {len(delta.create)} food entries to target")
-        for req in delta.create:
-            # noinspection PyBroadException
-            try:
-                await target_api.create_entry(req)
-            except Exception:
-                logger.warning("Failed to ADD food entry", exc_info=True)
-
-    if delta.edit:
-        logger.info(f"EDT {len(delta.edit)} food entries to target")
-        for req in delta.edit:
-            # noinspection PyBroadException
-            try:
-                await target_api.edit_entry(req)
-            except Exception:
-                logger.warning("Failed to EDT food entry", exc_info=True)
+        return True
+
+    applied = await _apply_operations("DEL", delta.delete, target_api.delete_entry, date, listener)
+    applied &= await _apply_operations("ADD", delta.create, target_api.create_entry, date, listener)
+    applied &= await _apply_operations("EDT", delta.edit, target_api.edit_entry, date, listener)
+    return applied
+
+
+async def sync_range(
+    origin_api: FatSecretUserAPI,
+    target_api: FatSecretUserAPI,
+    from_date: datetime.date,
+    to_date: datetime.date,
+    *,
+    keep_unique_target_food: bool = True,
+    deadline: Optional[Deadline] = None,
+    listener: Optional[SyncListener] = None,
+    converter: Optional[UnitConverter] = None,
+):
+    """
+    Synchronizes food diary of origin user to target user on every date from `from_date` until (inclusive) `to_date`.
+    See `sync_user` for arguments.
+    """
+    with deadline_scope(deadline):
+        for date in iter_dates(from_date, to_date):
+            await sync_user(
+                origin_api,
+                target_api,
+                date,
+                keep_unique_target_food=keep_unique_target_food,
+                listener=listener,
+                converter=converter,
+            )
@@ -0,0 +1,195 @@
+"""
+Unit conversion across servings of the same food.
+
+A factor table is computed once per food from all of its servings: metric amount of one unit of every serving
+and nutrients per gram and per milliliter. Then any entry of the food can be converted to g, oz or ml,
+compared with an entry of another serving, and diaries are converted in batches: entries are grouped by serving,
+so each group costs one multiplication of a precomputed vector.
+"""
+import asyncio
+import dataclasses
+import logging
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from ..api.client import FatSecretUserAPI
+from ..api.models.common import NUTRIENT_FIELDS
+from ..api.models.food import FoodInfoV3, ServingMetricUnitType
+from ..api.models.food_entry import BaseFoodEntryRequest, FoodEntry
+from .events import SyncListener
+
+logger = logging.getLogger(__name__)
+
+NutrientVector = tuple[float, ...]
+
+ZERO_NUTRIENTS: NutrientVector = (0.0,) * len(NUTRIENT_FIELDS)
+
+
+def scale_nutrients(vector: NutrientVector, factor: float) -> NutrientVector:
+    return tuple(value * factor for value in vector)
+
+
+def add_nutrients(a: NutrientVector, b: NutrientVector) -> NutrientVector:
+    return tuple(x + y for x, y in zip(a, b))
+
+
+@dataclasses.dataclass(frozen=True)
+class ServingFactors:
+    serving_id: int
+    unit: ServingMetricUnitType  # base unit: g or ml
+    amount_per_unit: float  # base unit amount in one unit of the serving
+    nutrients_per_unit: NutrientVector
+
+
+@dataclasses.dataclass
+class FoodFactorTable:
+    food_id: int
+    servings: dict[int, ServingFactors]
+    grams_per_ml: Optional[float] = None  # density, known if the food has both mass and volume servings
+
+    @classmethod
+    def from_food(cls, food_id: int, food: FoodInfoV3) -> "FoodFactorTable":
+        servings = {}
+        energy_density: dict[ServingMetricUnitType, float] = {}  # calories per base unit
+        for serving in food.servings:
+            if not serving.number_of_units or not serving.metric_serving_amount:
+                continue
+            unit = serving.metric_serving_unit.base
+            amount = serving.metric_serving_amount * serving.metric_serving_unit.base_factor
+            servings[serving.serving_id] = ServingFactors(
+                serving_id=serving.serving_id,
+                unit=unit,
+                amount_per_unit=amount / serving.number_of_units,
+                nutrients_per_unit=scale_nutrients(serving.nutrient_vector(), 1.0 / serving.number_of_units),
+            )
+            if serving.calories:
+                energy_density.setdefault(unit, serving.calories / amount)
+        grams_per_ml = None
+        if ServingMetricUnitType.GRAMS in energy_density and ServingMetricUnitType.MILLILITERS in energy_density:
+            # Same food, so energy density tells how many grams are in a milliliter
+            grams_per_ml = energy_density[ServingMetricUnitType.MILLILITERS] / energy_density[ServingMetricUnitType.GRAMS]
+        return cls(food_id=food_id, servings=servings, grams_per_ml=grams_per_ml)
+
+    def amount(self, serving_id: int, number_of_units: float, unit: ServingMetricUnitType) -> Optional[float]:
+        """
+        Returns:
+            Amount of `number_of_units` of the serving in `unit`, None if the serving is unknown
+            or mass and volume cannot be converted for this food.
+        """
+        serving = self.servings.get(serving_id)
+        if serving is None:
+            return None
+        amount = serving.amount_per_unit * number_of_units
+        if serving.unit != unit.base:
+            if self.grams_per_ml is None:
+                return None
+            amount = amount * self.grams_per_ml if unit.base == ServingMetricUnitType.GRAMS else amount / self.grams_per_ml
+        return amount / unit.base_factor
+
+    def units_factor(self, from_serving_id: int, to_serving_id: int) -> Optional[float]:
+        """
+        Returns:
+            Number of units of `to_serving_id` in one unit of `from_serving_id`.
+        """
+        to_serving = self.servings.get(to_serving_id)
+        if to_serving is None:
+            return None
+        amount = self.amount(from_serving_id, 1.0, to_serving.unit)
+        return amount / to_serving.amount_per_unit if amount is not None else None
+
+
+class UnitConverter:
+    """
+    Factor tables of every food seen so far, filled with `ensure_foods`.
+    """
+
+    def __init__(self, listener: Optional[SyncListener] = None):
+        """
+        Args:
+            listener:
+                Receives details of every fetched food, e.g. to index food names.
+        """
+        self.tables: dict[int, FoodFactorTable] = {}
+        self.listener = listener if listener is not None else SyncListener()
+
+    def add_food(self, food_id: int, food: FoodInfoV3) -> FoodFactorTable:
+        table = self.tables[food_id] = FoodFactorTable.from_food(food_id, food)
+        self.listener.on_food_loaded(food_id, food)
+        return table
+
+    async def ensure_foods(self, user_api: FatSecretUserAPI, food_ids: Iterable[int], concurrency: int = 8):
+        """
+        Fetches foods without factor tables, at most `concurrency` at a time. Foods that fail to load are skipped.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _load(food_id: int):
+            async with semaphore:
+                # noinspection PyBroadException
+                try:
+                    self.add_food(food_id, await user_api.get_food_v3(food_id))
+                except Exception:
+                    logger.warning("Failed to load servings of food %s", food_id, exc_info=True)
+
+        await asyncio.gather(*(_load(food_id) for food_id in set(food_ids) - self.tables.keys()))
+
+    def amount(self, entry: FoodEntry, unit: ServingMetricUnitType) -> Optional[float]:
+        table = self.tables.get(entry.food_id)
+        return table.amount(entry.serving_id, entry.number_of_units, unit) if table is not None else None
+
+    def same_amount(self, a: FoodEntry | BaseFoodEntryRequest, b: FoodEntry, tolerance: float = 0.01) -> bool:
+        """
+        Whether two entries of the same food are the same amount, even if logged with different servings.
+        """
+        if getattr(a, "food_id", b.food_id) != b.food_id:
+            return False
+        if a.serving_id == b.serving_id:
+            return abs(a.number_of_units - b.number_of_units) <= tolerance * max(abs(a.number_of_units), 1e-9)
+        table = self.tables.get(b.food_id)
+        factor = table.units_factor(a.serving_id, b.serving_id) if table is not None else None
+        if factor is None:
+            return False
+        converted = a.number_of_units * factor
+        return abs(converted - b.number_of_units) <= tolerance * max(abs(b.number_of_units), 1e-9)
+
+    def _per_unit(self, entry: FoodEntry) -> Optional[NutrientVector]:
+        table = self.tables.get(entry.food_id)
+        serving = table.servings.get(entry.serving_id) if table is not None else None
+        return serving.nutrients_per_unit if serving is not None else None
+
+    def nutrient_totals(self, entries: Iterable[FoodEntry]) -> NutrientVector:
+        """
+        Total nutrients of the entries, in `NUTRIENT_FIELDS` order.
+
+        Units are summed per serving first, so every serving costs a single vector multiplication.
+        Entries of unknown foods contribute their own nutrients.
+        """
+        units: dict[tuple[int, int], float] = defaultdict(float)
+        total = ZERO_NUTRIENTS
+        for entry in entries:
+            if self._per_unit(entry) is None:
+                total = add_nutrients(total, entry.nutrient_vector())
+            else:
+                units[entry.food_id, entry.serving_id] += entry.number_of_units
+        for (food_id, serving_id), number_of_units in units.items():
+            per_unit = self.tables[food_id].servings[serving_id].nutrients_per_unit
+            total = add_nutrients(total, scale_nutrients(per_unit, number_of_units))
+        return total
+
+    def food_amounts(self, entries: Iterable[FoodEntry], unit: ServingMetricUnitType) -> dict[int, float]:
+        """
+        Total amount of every food in `unit` across all of its servings. Foods that cannot be converted are omitted.
+        """
+        units: dict[tuple[int, int], float] = defaultdict(float)
+        for entry in entries:
+            units[entry.food_id, entry.serving_id] += entry.number_of_units
+        amounts: dict[int, float] = defaultdict(float)
+        skipped = set()
+        for (food_id, serving_id), number_of_units in units.items():
+            table = self.tables.get(food_id)
+            amount = table.amount(serving_id, number_of_units, unit) if table is not None else None
+            if amount is None:
+                skipped.add(food_id)
+            else:
+                amounts[food_id] += amount
+        return {food_id: amount for food_id, amount in amounts.items() if food_id not in skipped}
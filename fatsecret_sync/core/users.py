@@ -0,0 +1,47 @@
+"""
+User backends: where registered users' credentials are stored.
+"""
+import pathlib
+
+from kily.common.utils.config_loader import ConfigLoader
+
+from ..api.client import FatSecretAPI, FatSecretUserAPI
+from ..api.models.auth import OAuth2Credentials
+from .models.config import UserBackendConfig
+from .models.creds import CredsConfig, UserCreds
+
+
+def get_creds_path(config: UserBackendConfig) -> pathlib.Path:
+    if config.active != "files":
+        raise ValueError(f"Unsupported user backend: {config.active}")
+    if config.files.user_isolation:
+        raise NotImplementedError("User isolation is not supported by files user backend yet")
+    return pathlib.Path(config.files.root) / config.files.name
+
+
+def load_creds(config: UserBackendConfig) -> CredsConfig:
+    path = get_creds_path(config)
+    if not path.exists():
+        return CredsConfig(users={})
+    return ConfigLoader.load(CredsConfig, path=path)
+
+
+def make_user_credentials(creds: UserCreds) -> OAuth2Credentials:
+    return OAuth2Credentials(client_id=creds.auth.oauth_token, client_secret=creds.auth.oauth_token_secret)
+
+
+def make_user_api(api: FatSecretAPI, creds: CredsConfig, user_id: str) -> FatSecretUserAPI:
+    if user_id not in creds.users:
+        raise KeyError(f"Unknown user: {user_id}")
+    return api.get_user_api(make_user_credentials(creds.users[user_id]), user_id=user_id)
+
+
+def save_creds(config: UserBackendConfig, creds: CredsConfig):
+    """
+    Writes credentials of all users. JSON is a subset of YAML, so the file stays readable by `load_creds`.
+    """
+    path = get_creds_path(config)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(creds.json(indent=2))
+    tmp_path.replace(path)
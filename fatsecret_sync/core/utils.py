@@ -27,3 +27,15 @@ def make_diary_print(food_entries: Iterable[FoodEntry], include_total_calories:
         )
         detailed_print = f"Total: {tl.calories}kCal (P={tl.protein}g, F={tl.fat}g, C={tl.carbohydrate}g)" + "\n" + detailed_print
     return detailed_print
+
+
+def diary_fingerprint(food_entries: Iterable[FoodEntry]) -> int:
+    """
+    Cheap order-independent fingerprint of a diary: changes whenever any sync-relevant field
+    of any entry changes, or when entries are added or removed.
+    """
+    return hash(
+        tuple(
+            sorted((e.food_entry_id, e.food_id, e.serving_id, e.number_of_units, e.meal, e.food_entry_name) for e in food_entries)
+        )
+    )
@@ -0,0 +1,260 @@
+"""
+Time series of user weights, collected from profile snapshots.
+
+Every user's history is kept in columns (dates, weights, goals) of machine numbers sorted by date,
+so years of daily weigh-ins take a few dozen kilobytes and range queries are a bisect away.
+A snapshot is stored only if it brings a new weigh-in or a new goal, so refreshing often costs nothing.
+"""
+import asyncio
+import dataclasses
+import datetime
+import json
+import logging
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterable, Optional
+
+from kily.common.utils.dt import get_now
+
+from ..api.client import FatSecretUserAPI
+from ..api.models.common import DateInt
+from ..api.models.profile import ProfileStatus
+from .models.weights import GoalProgress, WeightTrend
+
+logger = logging.getLogger(__name__)
+
+NO_GOAL = math.nan
+
+
+def _same(a: float, b: float) -> bool:
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+@dataclasses.dataclass
+class WeightSeries:
+    dates: array = dataclasses.field(default_factory=lambda: array("l"))  # `DateInt.to_int()` values
+    weights_kg: array = dataclasses.field(default_factory=lambda: array("d"))
+    goals_kg: array = dataclasses.field(default_factory=lambda: array("d"))  # NO_GOAL if unknown
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def add(self, date: int, weight_kg: float, goal_kg: float = NO_GOAL) -> bool:
+        """
+        Returns:
+            Whether the series changed: a new date, or another weight or goal on a known one.
+        """
+        i = bisect_left(self.dates, date)
+        if i < len(self.dates) and self.dates[i] == date:
+            if _same(self.weights_kg[i], weight_kg) and _same(self.goals_kg[i], goal_kg):
+                return False
+            self.weights_kg[i], self.goals_kg[i] = weight_kg, goal_kg
+            return True
+        self.dates.insert(i, date)
+        self.weights_kg.insert(i, weight_kg)
+        self.goals_kg.insert(i, goal_kg)
+        return True
+
+    def window(self, from_date: int, to_date: int) -> range:
+        """
+        Returns:
+            Indices of points from `from_date` until (inclusive) `to_date`.
+        """
+        return range(bisect_left(self.dates, from_date), bisect_right(self.dates, to_date))
+
+    def slope(self, indices: range) -> Optional[float]:
+        """
+        Returns:
+            Least squares slope (kg per day) of the points, None if there are less than two distinct dates.
+        """
+        n = len(indices)
+        if n < 2:
+            return None
+        dates = [self.dates[i] for i in indices]
+        mean_date = sum(dates) / n
+        mean_weight = sum(self.weights_kg[i] for i in indices) / n
+        variance = sum((date - mean_date) ** 2 for date in dates)
+        if variance == 0:
+            return None
+        covariance = sum((date - mean_date) * (self.weights_kg[i] - mean_weight) for date, i in zip(dates, indices))
+        return covariance / variance
+
+    def last_goal(self) -> Optional[float]:
+        for goal in reversed(self.goals_kg):
+            if not math.isnan(goal):
+                return goal
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "dates": self.dates.tolist(),
+            "weights_kg": self.weights_kg.tolist(),
+            "goals_kg": [None if math.isnan(goal) else goal for goal in self.goals_kg],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WeightSeries":
+        return cls(
+            dates=array("l", data["dates"]),
+            weights_kg=array("d", data["weights_kg"]),
+            goals_kg=array("d", (NO_GOAL if goal is None else goal for goal in data["goals_kg"])),
+        )
+
+
+class WeightStore:
+    """
+    Weight history of every user. Filled by `refresh` (one `profile.get` per user) or from profiles
+    already fetched by other calls with `record_profiles`; trend and goal queries never call the API.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path:
+                JSON file the history is loaded from and saved to after every change. In memory only if not set.
+        """
+        self.path = Path(path) if path is not None else None
+        self.series: dict[str, WeightSeries] = {}
+        self.refreshed_at: Optional[datetime.datetime] = None
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def load(self):
+        data = json.loads(self.path.read_text())
+        self.series = {user_id: WeightSeries.from_dict(series) for user_id, series in data["users"].items()}
+        logger.info("Loaded %d weigh-ins of %d users from %s", sum(map(len, self.series.values())), len(self.series), self.path)
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps({"users": {user_id: series.to_dict() for user_id, series in self.series.items()}}))
+        tmp_path.replace(self.path)
+
+    def record(self, user_id: str, profile: ProfileStatus) -> bool:
+        """
+        Returns:
+            Whether the snapshot brought anything new. Profiles without a weigh-in are ignored.
+        """
+        if profile.last_weight_kg is None or profile.last_weight_date_int is None:
+            return False
+        series = self.series.setdefault(user_id, WeightSeries())
+        goal = profile.goal_weight_kg if profile.goal_weight_kg is not None else NO_GOAL
+        return series.add(profile.last_weight_date_int.to_int(), profile.last_weight_kg, goal)
+
+    def record_profiles(self, user_apis: Iterable[FatSecretUserAPI]) -> list[str]:
+        """
+        Records profiles the user APIs already hold, e.g. after a credentials check of every user,
+        so it counts as a refresh. Saves if anything changed.
+
+        Returns:
+            Users whose series changed.
+        """
+        changed = [
+            user_api.user_id
+            for user_api in user_apis
+            if user_api.profile is not None and self.record(user_api.user_id, user_api.profile)
+        ]
+        self.refreshed_at = get_now()
+        if changed:
+            self.save()
+        return changed
+
+    async def refresh(self, user_apis: Iterable[FatSecretUserAPI], concurrency: int = 20) -> list[str]:
+        """
+        Fetches profiles of all users concurrently, at most `concurrency` calls at a time, and records them.
+        Users whose profile failed to load are skipped. Saves once at the end, if anything changed.
+
+        Returns:
+            Users whose series changed.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _fetch(user_api: FatSecretUserAPI) -> Optional[ProfileStatus]:
+            async with semaphore:
+                # noinspection PyBroadException
+                try:
+                    return await user_api.get_profile()
+                except Exception:
+                    logger.warning("Failed to refresh profile of %s", user_api.user_id, exc_info=True)
+                    return None
+
+        user_apis = list(user_apis)
+        profiles = await asyncio.gather(*(_fetch(user_api) for user_api in user_apis))
+        changed = [
+            user_api.user_id
+            for user_api, profile in zip(user_apis, profiles)
+            if profile is not None and self.record(user_api.user_id, profile)
+        ]
+        self.refreshed_at = get_now()
+        if changed:
+            self.save()
+        logger.info("Refreshed profiles of %d users, weight changed for %s", len(user_apis), changed)
+        return changed
+
+    def is_stale(self, max_age: datetime.timedelta) -> bool:
+        return self.refreshed_at is None or get_now() - self.refreshed_at > max_age
+
+    def trend(self, user_id: str, to_date: DateInt, days: int = 30) -> Optional[WeightTrend]:
+        """
+        Weight trend over `days` days ending with (inclusive) `to_date`.
+
+        Returns:
+            None if there were no weigh-ins in the period.
+        """
+        series = self.series.get(user_id)
+        if series is None:
+            return None
+        end = to_date.to_int()
+        indices = series.window(end - days + 1, end)
+        if not indices:
+            return None
+        slope = series.slope(indices)
+        return WeightTrend(
+            user_id=user_id,
+            from_date=DateInt.validate(end - days + 1),
+            to_date=to_date,
+            points=len(indices),
+            first_kg=series.weights_kg[indices[0]],
+            last_kg=series.weights_kg[indices[-1]],
+            kg_per_week=slope * 7 if slope is not None else None,
+        )
+
+    def goal_progress(self, user_id: str, since: Optional[DateInt] = None, pace_days: int = 30) -> Optional[GoalProgress]:
+        """
+        Progress towards the latest known goal.
+
+        Args:
+            user_id:
+                User ID.
+            since:
+                Progress is measured from the first weigh-in on or after this date, from the first one ever if not set.
+            pace_days:
+                Period of the trend used to estimate when the goal is reached.
+        Returns:
+            None if the user has no weigh-ins since `since` or no goal.
+        """
+        series = self.series.get(user_id)
+        goal = series.last_goal() if series is not None else None
+        if goal is None:
+            return None
+        start = bisect_left(series.dates, since.to_int()) if since is not None else 0
+        if start >= len(series):
+            return None
+        current_date, current_kg = series.dates[-1], series.weights_kg[-1]
+        eta = None
+        slope = series.slope(series.window(current_date - pace_days + 1, current_date))
+        if slope and (goal - current_kg) / slope > 0:
+            eta = DateInt.validate(current_date + math.ceil((goal - current_kg) / slope))
+        return GoalProgress(
+            user_id=user_id,
+            start_date=DateInt.validate(series.dates[start]),
+            start_kg=series.weights_kg[start],
+            current_date=DateInt.validate(current_date),
+            current_kg=current_kg,
+            goal_kg=goal,
+            eta=eta,
+        )
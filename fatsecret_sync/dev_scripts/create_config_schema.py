@@ -21,7 +21,7 @@ DEFAULT_SCHEMA_DESTINATION = pathlib.Path("../../schemas/config.schema.json")
 def create_config_schema(schema_class: Type[BaseModel] = AppConfig, destination: PathLike = DEFAULT_SCHEMA_DESTINATION):
     destination = pathlib.Path(destination)
     destination.parent.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Writing config schema to {destination}...")
+    logger.info("Writing config schema to %s...", destination)
     destination.write_text(schema_class.schema_json(indent=2))
 
 
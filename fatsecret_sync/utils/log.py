@@ -0,0 +1,139 @@
+"""
+Non-blocking logging: records are put on a queue by the event loop thread and formatted and written
+by a background thread. Messages are built lazily, so a disabled level costs nothing.
+
+Usage:
+    logger.debug("[%s] Response code=%s", call_name, res.status, extra=log_fields(call_name=call_name))
+    logger.debug("Diary:\n%s", Lazy(make_diary_print, entries))
+
+    with log_context(user=user_id, date=date):
+        ...  # every record gets `user` and `date` fields
+"""
+import atexit
+import contextlib
+import contextvars
+import copy
+import logging
+import logging.handlers
+import queue
+from typing import Any, Callable, Iterator, Optional
+
+# Structured fields attached to records and printed by `StructuredFormatter`, in this order
+FIELDS = ("user", "date", "call_name", "duration")
+
+_context: contextvars.ContextVar[dict[str, Any]] = contextvars.ContextVar("log_context", default={})
+
+
+class Lazy:
+    """
+    Log argument rendered only when the record is actually formatted.
+    """
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func: Callable[..., Any], *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args))
+
+
+def log_fields(**fields) -> dict[str, Any]:
+    """
+    Returns:
+        `extra` for a logging call, with fields that are not None.
+    """
+    return {name: value for name, value in fields.items() if value is not None}
+
+
+@contextlib.contextmanager
+def log_context(**fields) -> Iterator[dict[str, Any]]:
+    """
+    Adds fields to every record logged inside the scope (including tasks spawned from it).
+    Fields passed with `extra` take precedence.
+    """
+    merged = {**_context.get(), **log_fields(**fields)}
+    token = _context.set(merged)
+    try:
+        yield merged
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copies `log_context` fields to the record. Runs in the thread that logs, where the context is known.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, value in _context.get().items():
+            if not hasattr(record, name):
+                setattr(record, name, value)
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Appends structured fields present in the record as `name=value` to the message formatted by `formatter`.
+    """
+
+    def __init__(self, formatter: Optional[logging.Formatter] = None):
+        super().__init__()
+        self.formatter = formatter or logging.Formatter()
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = self.formatter.format(record)
+        fields = []
+        for name in FIELDS:
+            value = getattr(record, name, None)
+            if value is None:
+                continue
+            if name == "duration":
+                value = f"{value:.3f}s"
+            elif hasattr(value, "isoformat"):
+                value = value.isoformat()
+            fields.append(f"{name}={value}")
+        return f"{message} [{' '.join(fields)}]" if fields else message
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Unlike the standard handler, does not format the message before putting it on the queue,
+    so that lazy arguments are rendered by the listener thread. Only the traceback is rendered here,
+    while frames are still alive.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_queue_logging(logger: Optional[logging.Logger] = None) -> logging.handlers.QueueListener:
+    """
+    Moves handlers of `logger` (root by default) behind a queue served by a background thread.
+    Handlers keep their levels; their formatters are wrapped to print structured fields.
+
+    Returns:
+        Started listener. It is stopped (and the queue flushed) at exit.
+    """
+    logger = logger or logging.getLogger()
+    handlers = list(logger.handlers) or [logging.StreamHandler()]
+    for handler in handlers:
+        logger.removeHandler(handler)
+        if not isinstance(handler.formatter, StructuredFormatter):
+            handler.setFormatter(StructuredFormatter(handler.formatter))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
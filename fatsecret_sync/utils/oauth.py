@@ -6,16 +6,21 @@ import oauthlib.common
 import oauthlib.oauth1
 import yarl
 
+from .profiling import phase
 
-async def oauth1_request(
+
+def sign_oauth1_url(
     method: str,
     url: yarl.URL | str,
     data: Optional[dict] = None,
     headers: Optional[dict] = None,
     *,
     oauth_client: oauthlib.oauth1.Client,
-    session: aiohttp.ClientSession,
-) -> tuple[bytes, aiohttp.ClientResponse]:
+) -> yarl.URL:
+    """
+    Returns:
+        `url` with OAuth1 parameters and signature in the query.
+    """
     request = oauthlib.common.Request(
         uri=str(url),
         http_method=method,
@@ -25,10 +30,23 @@ async def oauth1_request(
     )
     request.uri = str(yarl.URL(request.uri).update_query(dict(oauth_client.get_oauth_params(request))))
     signature = oauth_client.get_oauth_signature(request)
-    async with session.request(
-        method, yarl.URL(request.uri).update_query(oauth_signature=signature), data=data, headers=headers
-    ) as res:
-        return await res.read(), res
+    return yarl.URL(request.uri).update_query(oauth_signature=signature)
+
+
+async def oauth1_request(
+    method: str,
+    url: yarl.URL | str,
+    data: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    *,
+    oauth_client: oauthlib.oauth1.Client,
+    session: aiohttp.ClientSession,
+) -> tuple[bytes, aiohttp.ClientResponse]:
+    with phase("sign"):
+        signed_url = sign_oauth1_url(method, url, data, headers, oauth_client=oauth_client)
+    with phase("http"):
+        async with session.request(method, signed_url, data=data, headers=headers) as res:
+            return await res.read(), res
 
 
 async def oauth1_token_request(
@@ -45,3 +63,25 @@ async def oauth1_token_request(
         method=method, url=url, data=data, headers=headers, oauth_client=oauth_client, session=session
     )
     return dict(parse_qsl(content.decode()))
+
+
+async def oauth2_client_credentials_request(
+    url: yarl.URL | str,
+    client_id: str,
+    client_secret: str,
+    scope: Optional[str] = None,
+    *,
+    session: aiohttp.ClientSession,
+) -> dict:
+    """
+    Obtains an access token using OAuth2 client credentials grant.
+
+    Returns:
+        Token response, contains at least `access_token` and `expires_in` fields.
+    """
+    data = {"grant_type": "client_credentials"}
+    if scope:
+        data["scope"] = scope
+    async with session.post(url, data=data, auth=aiohttp.BasicAuth(client_id, client_secret)) as res:
+        res.raise_for_status()
+        return await res.json()
@@ -0,0 +1,175 @@
+"""
+Opt-in profiling of sync runs: a cProfile trace plus a timeline of named phases of every asyncio task.
+
+Phases are marked with `phase(name)` all over the sync path (signing, waiting in the queue, network, parsing,
+merging, applying operations). Outside of a `Profiler` scope marking a phase costs a context variable lookup.
+
+Usage:
+    with Profiler(Path("profiles"), name="nightly"):
+        await sync_user(...)
+    # profiles/nightly.pstats       - open with `python -m pstats` or snakeviz
+    # profiles/nightly.speedscope.json - open at https://www.speedscope.app, one lane per task
+"""
+import asyncio
+import contextlib
+import contextvars
+import cProfile
+import dataclasses
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_current_profiler: contextvars.ContextVar[Optional["Profiler"]] = contextvars.ContextVar("profiler", default=None)
+
+
+@dataclasses.dataclass(frozen=True)
+class Span:
+    task: str
+    name: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def _task_name() -> str:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task.get_name() if task is not None else threading.current_thread().name
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Records the scope as a phase of the current task, if a profiler is active.
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.spans.append(Span(_task_name(), name, start, time.perf_counter()))
+
+
+class Profiler:
+    """
+    Records a cProfile trace of the thread that enters it and phases of every task started inside the scope.
+    Artifacts are written to `output_dir` on exit, even if the profiled code fails.
+    """
+
+    def __init__(self, output_dir: Path, name: str = "sync", cprofile: bool = True):
+        """
+        Args:
+            output_dir:
+                Directory for artifacts, created if missing.
+            name:
+                Artifact file name prefix.
+            cprofile:
+                Whether to record a cProfile trace besides the phase timeline. cProfile slows pure Python code down.
+        """
+        self.output_dir = Path(output_dir)
+        self.name = name
+        self.spans: list[Span] = []
+        self._profile = cProfile.Profile() if cprofile else None
+        self._token: Optional[contextvars.Token] = None
+        self._started_at = 0.0
+        self._finished_at = 0.0
+
+    def __enter__(self) -> "Profiler":
+        self._token = _current_profiler.set(self)
+        self._started_at = time.perf_counter()
+        if self._profile is not None:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._profile is not None:
+            self._profile.disable()
+        self._finished_at = time.perf_counter()
+        _current_profiler.reset(self._token)
+        paths = self.write()
+        logger.info("Profile written to %s", ", ".join(str(path) for path in paths))
+
+    def phase_totals(self) -> dict[str, float]:
+        """
+        Returns:
+            Total time (seconds) spent in every phase, summed over all tasks, longest first.
+        """
+        totals: dict[str, float] = defaultdict(float)
+        for span in self.spans:
+            totals[span.name] += span.duration
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    def to_speedscope(self) -> dict:
+        """
+        Timeline in speedscope "evented" format, a profile (lane) per task.
+        """
+        frames: dict[str, int] = {}
+        by_task: dict[str, list[Span]] = defaultdict(list)
+        for span in self.spans:
+            frames.setdefault(span.name, len(frames))
+            by_task[span.task].append(span)
+
+        profiles = []
+        for task, spans in by_task.items():
+            events, stack = [], []
+            for span in sorted(spans, key=lambda s: (s.start, -s.end)):
+                while stack and stack[-1].end <= span.start:
+                    closed = stack.pop()
+                    events.append({"type": "C", "frame": frames[closed.name], "at": closed.end - self._started_at})
+                events.append({"type": "O", "frame": frames[span.name], "at": span.start - self._started_at})
+                stack.append(span)
+            while stack:
+                closed = stack.pop()
+                events.append({"type": "C", "frame": frames[closed.name], "at": closed.end - self._started_at})
+            profiles.append(
+                {
+                    "type": "evented",
+                    "name": task,
+                    "unit": "seconds",
+                    "startValue": 0.0,
+                    "endValue": self._finished_at - self._started_at,
+                    "events": events,
+                }
+            )
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.name,
+            "exporter": "fatsecret-sync",
+            "shared": {"frames": [{"name": name} for name in frames]},
+            "profiles": profiles,
+        }
+
+    def write(self) -> list[Path]:
+        """
+        Returns:
+            Paths of written artifacts.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        if self._profile is not None:
+            path = self.output_dir / f"{self.name}.pstats"
+            self._profile.dump_stats(path)
+            paths.append(path)
+        path = self.output_dir / f"{self.name}.speedscope.json"
+        path.write_text(json.dumps(self.to_speedscope()))
+        paths.append(path)
+        path = self.output_dir / f"{self.name}.phases.json"
+        path.write_text(json.dumps(self.phase_totals(), indent=2))
+        paths.append(path)
+        return paths
@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Classic token bucket: allows bursts of up to `capacity` events and `rate` events per second on average.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        self._refill()
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+    def time_until(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` are available."""
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    async def acquire(self, tokens: float = 1.0):
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.time_until(tokens))
@@ -0,0 +1,62 @@
+import datetime
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from fatsecret_sync.bench.models import BenchmarkComparison, BenchmarkReport, BenchmarkResult
+from fatsecret_sync.bench.suite import compare_reports
+from fatsecret_sync.cli.bench import bench_group
+
+
+def make_report(**throughputs: float) -> BenchmarkReport:
+    return BenchmarkReport(
+        created_at=datetime.datetime(2023, 5, 10, 12, 0),
+        python="3.11.0",
+        platform="test",
+        results={
+            name: BenchmarkResult(name=name, operations=1000, seconds=1000 / throughput, throughput=throughput)
+            for name, throughput in throughputs.items()
+        },
+    )
+
+
+def test_comparison_change_and_regression():
+    comparison = BenchmarkComparison(name="sign", baseline=1000.0, current=850.0, threshold=0.1)
+    assert comparison.change == pytest.approx(-0.15)
+    assert comparison.regressed
+    assert not BenchmarkComparison(name="sign", baseline=1000.0, current=950.0, threshold=0.1).regressed
+    assert not BenchmarkComparison(name="sign", baseline=1000.0, current=2000.0, threshold=0.1).regressed
+
+
+def test_new_and_removed_benchmarks_never_regress():
+    comparisons = {comparison.name: comparison for comparison in compare_reports(make_report(old=100.0), make_report(new=100.0))}
+    assert list(comparisons) == ["old", "new"]
+    assert comparisons["old"].current is None and comparisons["old"].change is None
+    assert comparisons["new"].baseline is None and comparisons["new"].change is None
+    assert not any(comparison.regressed for comparison in comparisons.values())
+
+
+def test_compare_reports_applies_threshold():
+    comparisons = compare_reports(make_report(a=100.0, b=100.0), make_report(a=70.0, b=95.0), threshold=0.2)
+    assert [comparison.regressed for comparison in comparisons] == [True, False]
+
+
+def _write(path: Path, report: BenchmarkReport) -> str:
+    path.write_text(report.json())
+    return str(path)
+
+
+def test_compare_command_fails_on_regression(tmp_path: Path):
+    baseline = _write(tmp_path / "baseline.json", make_report(sign=1000.0, parse=500.0))
+    slower = _write(tmp_path / "slower.json", make_report(sign=1000.0, parse=300.0))
+    result = CliRunner().invoke(bench_group, ["compare", baseline, slower])
+    assert result.exit_code == 1
+    assert "REGRESSION" in result.output
+
+
+def test_compare_command_passes_within_threshold(tmp_path: Path):
+    baseline = _write(tmp_path / "baseline.json", make_report(sign=1000.0))
+    current = _write(tmp_path / "current.json", make_report(sign=920.0))
+    assert CliRunner().invoke(bench_group, ["compare", baseline, current]).exit_code == 0
+    assert CliRunner().invoke(bench_group, ["compare", baseline, current, "--threshold", "0.05"]).exit_code == 1
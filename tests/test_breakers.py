@@ -0,0 +1,119 @@
+import asyncio
+import socket
+
+import aiohttp
+import pytest
+
+from fatsecret_sync.api import breakers
+from fatsecret_sync.api.breakers import CircuitBreaker, CircuitBreakers, CircuitState, is_endpoint_failure
+from fatsecret_sync.api.client import FatSecretAPI
+from fatsecret_sync.api.errors import CircuitOpenError, DeadlineExceededError
+from fatsecret_sync.api.models.auth import OAuth1Credentials
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(breakers.time, "monotonic", clock)
+    return clock
+
+
+def fail(breaker: CircuitBreaker, times: int = 1):
+    for _ in range(times):
+        breaker.check()
+        breaker.record(False)
+
+
+def test_opens_after_threshold_failures_in_a_row(clock):
+    breaker = CircuitBreaker("food.get", failure_threshold=3, reset_timeout=10)
+    fail(breaker, 2)
+    breaker.check()
+    breaker.record(True)
+    fail(breaker, 2)
+    assert breaker.state == CircuitState.CLOSED
+    fail(breaker)
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.check()
+    assert error.value.retry_after == pytest.approx(10)
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker("food.get", failure_threshold=1, reset_timeout=10)
+    fail(breaker)
+    clock.now += 10
+    breaker.check()
+    assert breaker.state == CircuitState.HALF_OPEN
+    # The only probe is in flight
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record(True)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.failures == 0
+    breaker.check()
+
+
+def test_half_open_probe_failure_opens_again(clock):
+    breaker = CircuitBreaker("food.get", failure_threshold=5, reset_timeout=10)
+    fail(breaker, 5)
+    clock.now += 11
+    fail(breaker)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.retry_after == pytest.approx(10)
+
+
+def test_probe_without_verdict_frees_the_probe_slot(clock):
+    breaker = CircuitBreaker("food.get", failure_threshold=1, reset_timeout=10, probes=1)
+    fail(breaker)
+    clock.now += 10
+    breaker.check()
+    breaker.record(None)
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.check()
+
+
+def test_transport_errors_are_endpoint_failures():
+    assert is_endpoint_failure(ConnectionRefusedError())
+    assert is_endpoint_failure(aiohttp.ClientConnectionError())
+    assert is_endpoint_failure(DeadlineExceededError("late", call_name="food.get", timeout=1.0))
+    assert not is_endpoint_failure(DeadlineExceededError("late", call_name="food.get", timeout=1.0, run_deadline=True))
+    assert not is_endpoint_failure(ValueError("bad request"))
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_unreachable_endpoint_opens_the_circuit():
+    url = f"http://127.0.0.1:{_closed_port()}/"
+
+    async def _run():
+        api = FatSecretAPI(
+            OAuth1Credentials(consumer_key="key", consumer_secret="secret"),
+            None,
+            breakers=CircuitBreakers(failure_threshold=2, reset_timeout=60),
+        )
+
+        async def _send():
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url) as response:
+                    return response.status
+
+        for _ in range(2):
+            with pytest.raises(aiohttp.ClientConnectionError):
+                await api.perform_call("food.get", _send)
+        with pytest.raises(CircuitOpenError):
+            await api.perform_call("food.get", _send)
+        return api
+
+    assert asyncio.run(_run()).breakers.get("food.get").state == CircuitState.OPEN
@@ -0,0 +1,122 @@
+import asyncio
+import types
+
+import aiohttp
+import pytest
+
+from fatsecret_sync.api.client import FatSecretAPI
+from fatsecret_sync.api.concurrency import AdaptiveConcurrencyLimiter, is_overload_error
+from fatsecret_sync.api.deadlines import Deadline, deadline_scope
+from fatsecret_sync.api.errors import APIError, DeadlineExceededError, RequestError
+from fatsecret_sync.api.models.auth import OAuth1Credentials
+from fatsecret_sync.api.models.errors import APIErrorResponse
+from fatsecret_sync.api.scheduling import Priority
+
+
+def _response(status: int):
+    return types.SimpleNamespace(status=status)
+
+
+def test_overload_errors():
+    assert is_overload_error(TimeoutError())
+    assert is_overload_error(aiohttp.ServerDisconnectedError())
+    assert is_overload_error(RequestError("Bad gateway", "GET", "food.get", _response(502), "<html>"))
+    assert is_overload_error(RequestError("Too many requests", "GET", "food.get", _response(429), {}))
+    assert is_overload_error(DeadlineExceededError("late", call_name="food.get", timeout=1.0))
+
+
+def test_errors_of_the_request_itself_are_not_overload():
+    assert not is_overload_error(ValueError())
+    assert not is_overload_error(RequestError("Bad request", "GET", "food.get", _response(400), {}))
+    assert not is_overload_error(DeadlineExceededError("late", call_name="food.get", timeout=1.0, run_deadline=True))
+    error = APIError("Throttled", "GET", "food.get", _response(200), APIErrorResponse(code=22, message="Too many calls"))
+    assert not is_overload_error(error)
+    assert is_overload_error(error, throttling_error_codes={22})
+
+
+def _fill(limiter: AdaptiveConcurrencyLimiter) -> list[float]:
+    slots = []
+    while (started_at := limiter.try_acquire()) is not None:
+        slots.append(started_at)
+    return slots
+
+
+def test_limit_grows_only_when_saturated_and_fast():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, target_latency=1.0, increase=1.0)
+    started_at = limiter.try_acquire()
+    limiter.release(started_at, 0.1, False)
+    assert limiter.limit == 2
+    slots = _fill(limiter)
+    limiter.release(slots[0], 0.1, False)
+    assert limiter.limit == pytest.approx(2.5)
+    # Slow answers say the API is at capacity
+    limiter.release(slots[1], 5.0, False)
+    assert limiter.limit == pytest.approx(2.5)
+
+
+def test_limit_grows_by_about_increase_per_round_trip():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, increase=1.0)
+    for started_at in _fill(limiter):
+        # Keep the limit reached, as a busy client does
+        limiter.release(started_at, 0.1, False)
+        limiter.try_acquire()
+    assert limiter.limit == pytest.approx(11.0, abs=0.1)
+
+
+def test_overload_halves_the_limit_once_per_wave():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=2, decrease_factor=0.5)
+    slots = _fill(limiter)
+    for started_at in slots[:3]:
+        limiter.release(started_at, None, True)
+    assert limiter.limit == 4
+    assert limiter.stats().decreases == 1
+    started_at = limiter.try_acquire()
+    assert started_at is None
+    for started_at in slots[3:]:
+        limiter.release(started_at, None, False)
+    limiter.release(limiter.try_acquire(), None, True)
+    limiter.release(limiter.try_acquire(), None, True)
+    assert limiter.limit == 2
+
+
+def test_interactive_waiters_are_served_first():
+    async def _run() -> list[Priority]:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        first = await limiter.acquire()
+        order = []
+
+        async def _wait(priority: Priority):
+            started_at = await limiter.acquire(priority)
+            order.append(priority)
+            limiter.release(started_at, None, False)
+
+        waiters = [asyncio.create_task(_wait(priority)) for priority in (Priority.BULK, Priority.BULK, Priority.INTERACTIVE)]
+        await asyncio.sleep(0)
+        assert limiter.try_acquire() is None
+        limiter.release(first, None, False)
+        await asyncio.gather(*waiters)
+        return order
+
+    assert asyncio.run(_run()) == [Priority.INTERACTIVE, Priority.BULK, Priority.BULK]
+
+
+def test_deadline_in_the_queue_is_a_run_deadline():
+    async def _run() -> DeadlineExceededError:
+        api = FatSecretAPI(
+            OAuth1Credentials(consumer_key="key", consumer_secret="secret"),
+            None,
+            concurrency=AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1),
+        )
+        holder = api.concurrency.try_acquire()
+
+        async def _send():
+            return "never sent"
+
+        with deadline_scope(Deadline.after(0.05)):
+            with pytest.raises(DeadlineExceededError) as error:
+                await api.perform_call("food.get", _send)
+        api.concurrency.release(holder, None, False)
+        assert api.concurrency.stats().decreases == 0
+        return error.value
+
+    assert asyncio.run(_run()).run_deadline
@@ -0,0 +1,167 @@
+import asyncio
+
+import pytest
+
+from fatsecret_sync.api.breakers import Bulkheads, CircuitBreakers, CircuitState
+from fatsecret_sync.api.client import FatSecretAPI
+from fatsecret_sync.api.concurrency import AdaptiveConcurrencyLimiter
+from fatsecret_sync.api.deadlines import Deadline, deadline_scope, effective_timeout
+from fatsecret_sync.api.errors import DeadlineExceededError
+from fatsecret_sync.api.hedging import HedgeSkipped, HedgingPolicy, LatencyTracker
+from fatsecret_sync.api.models.auth import OAuth1Credentials
+
+
+def make_api(**kwargs) -> FatSecretAPI:
+    kwargs.setdefault("hedging", HedgingPolicy(LatencyTracker(), default_delay=0.05))
+    return FatSecretAPI(OAuth1Credentials(consumer_key="key", consumer_secret="secret"), None, **kwargs)
+
+
+class FakeCall:
+    """
+    Answers `results` in turn, each after its delay. An exception result is raised.
+    """
+
+    def __init__(self, *results: tuple[float, object]):
+        self.results = list(results)
+        self.sent = 0
+
+    async def __call__(self):
+        delay, result = self.results[min(self.sent, len(self.results) - 1)]
+        self.sent += 1
+        await asyncio.sleep(delay)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+def test_delay_uses_default_until_enough_samples():
+    latencies = LatencyTracker()
+    policy = HedgingPolicy(latencies, min_samples=10, default_delay=1.0, min_delay=0.05)
+    for _ in range(9):
+        latencies.observe("food.get", 0.2)
+    assert policy.delay_for("food.get") == 1.0
+    latencies.observe("food.get", 0.2)
+    assert policy.delay_for("food.get") == pytest.approx(0.2)
+    # The window forgets the slow calls
+    for _ in range(latencies.window):
+        latencies.observe("food.get", 0.001)
+    assert policy.delay_for("food.get") == 0.05
+
+
+def test_fast_call_is_not_hedged():
+    call = FakeCall((0.0, "first"))
+    assert asyncio.run(HedgingPolicy(LatencyTracker(), default_delay=0.05).run("x", call)) == "first"
+    assert call.sent == 1
+
+
+def test_slow_call_is_hedged_and_the_faster_copy_wins():
+    call = FakeCall((1.0, "first"), (0.0, "hedged"))
+    assert asyncio.run(HedgingPolicy(LatencyTracker(), default_delay=0.05).run("x", call)) == "hedged"
+    assert call.sent == 2
+
+
+def test_skipped_hedge_leaves_the_first_attempt_alone():
+    async def _skip():
+        raise HedgeSkipped("no room")
+
+    async def _run():
+        with pytest.raises(ValueError):
+            await HedgingPolicy(LatencyTracker(), default_delay=0.01).run("x", FakeCall((0.05, ValueError())), hedge=_skip)
+        return await HedgingPolicy(LatencyTracker(), default_delay=0.01).run("x", FakeCall((0.05, "first")), hedge=_skip)
+
+    assert asyncio.run(_run()) == "first"
+
+
+def test_hedge_is_skipped_when_the_concurrency_limit_is_reached():
+    # The first attempt holds the only slot: the hedge must not wait for it
+    async def _run():
+        api = make_api(
+            call_timeout=2.0,
+            concurrency=AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1),
+            breakers=CircuitBreakers(failure_threshold=1),
+        )
+        call = FakeCall((0.1, ValueError("bad request")))
+        started_at = asyncio.get_running_loop().time()
+        with pytest.raises(ValueError):
+            await api.perform_call("food.get", call, idempotent=True)
+        return api, call, asyncio.get_running_loop().time() - started_at
+
+    api, call, duration = asyncio.run(_run())
+    assert duration < 0.5
+    assert call.sent == 1
+    assert api.concurrency.stats().decreases == 0
+    assert api.concurrency.in_flight == 0
+    assert api.breakers.get("food.get").state == CircuitState.CLOSED
+
+
+def test_hedge_is_skipped_when_the_bulkhead_is_full():
+    async def _run():
+        api = make_api(bulkheads=Bulkheads(reads=1, writes=1))
+        call = FakeCall((0.2, "first"), (0.0, "hedged"))
+        return api, call, await api.perform_call("food.get", call, idempotent=True)
+
+    api, call, result = asyncio.run(_run())
+    assert (result, call.sent) == ("first", 1)
+    assert not api.bulkheads.reads.locked()
+
+
+def test_hedge_takes_and_returns_its_own_slots():
+    async def _run():
+        api = make_api(bulkheads=Bulkheads(reads=2, writes=1), concurrency=AdaptiveConcurrencyLimiter(initial_limit=2))
+        call = FakeCall((0.5, "first"), (0.0, "hedged"))
+        result = await api.perform_call("food.get", call, idempotent=True)
+        # Let the cancelled first attempt give its slots back
+        await asyncio.sleep(0)
+        return api, call, result
+
+    api, call, result = asyncio.run(_run())
+    assert (result, call.sent) == ("hedged", 2)
+    assert api.concurrency.in_flight == 0
+    assert not api.bulkheads.reads.locked()
+
+
+def test_writes_are_never_hedged():
+    call = FakeCall((0.2, "first"), (0.0, "hedged"))
+    assert asyncio.run(make_api().perform_call("food_entry.create", call)) == "first"
+    assert call.sent == 1
+
+
+def test_nested_deadline_only_shortens():
+    async def _run():
+        with deadline_scope(Deadline.after(1.0)):
+            with deadline_scope(Deadline.after(10.0)):
+                outer = effective_timeout(None)
+            with deadline_scope(Deadline.after(0.1)):
+                inner = effective_timeout(5.0)
+        return outer, inner, effective_timeout(5.0)
+
+    outer, inner, outside = asyncio.run(_run())
+    assert outer <= 1.0
+    assert inner <= 0.1
+    assert outside == 5.0
+
+
+def test_call_timeout_is_not_a_run_deadline():
+    async def _run():
+        with pytest.raises(DeadlineExceededError) as error:
+            await make_api(call_timeout=0.05, hedging=None).perform_call("food.get", FakeCall((1.0, "late")))
+        return error.value
+
+    error = asyncio.run(_run())
+    assert not error.run_deadline
+    assert error.timeout == pytest.approx(0.05)
+
+
+def test_run_deadline_cuts_the_call_short():
+    async def _run():
+        api = make_api(call_timeout=5.0, hedging=None)
+        with deadline_scope(Deadline.after(0.05)):
+            with pytest.raises(DeadlineExceededError) as cut:
+                await api.perform_call("food.get", FakeCall((1.0, "late")))
+            with pytest.raises(DeadlineExceededError) as expired:
+                await api.perform_call("food.get", FakeCall((0.0, "never sent")))
+        return cut.value, expired.value
+
+    cut, expired = asyncio.run(_run())
+    assert cut.run_deadline and cut.timeout < 0.1
+    assert expired.run_deadline
@@ -0,0 +1,67 @@
+import datetime
+import itertools
+import random
+from collections import Counter
+
+from fatsecret_sync.api.models.common import DateInt
+from fatsecret_sync.api.models.food_entry import FoodEntry
+from fatsecret_sync.bench.fake_server import make_food_entry_data
+from fatsecret_sync.core.meals import MealItem, fp_growth, mine_meal_templates
+
+DATE = DateInt.validate(datetime.date(2023, 5, 10))
+
+
+def brute_force(transactions: list[frozenset[MealItem]], min_support: int, max_size: int) -> dict[frozenset[MealItem], int]:
+    items = sorted(set().union(*transactions))
+    itemsets = {}
+    for size in range(1, max_size + 1):
+        for combination in itertools.combinations(items, size):
+            itemset = frozenset(combination)
+            support = sum(1 for transaction in transactions if itemset <= transaction)
+            if support >= min_support:
+                itemsets[itemset] = support
+    return itemsets
+
+
+def make_entry(food_entry_id: int, day: int, meal: str, food_id: int) -> FoodEntry:
+    data = make_food_entry_data(random.Random(food_id), food_entry_id, DATE.to_int() + day, food_id)
+    return FoodEntry.parse_obj({**data, "meal": meal})
+
+
+def test_fp_growth_matches_brute_force():
+    rnd = random.Random(42)
+    universe = [MealItem(food_id, food_id * 10, 1.0) for food_id in range(1, 9)]
+    transactions = [frozenset(rnd.sample(universe, rnd.randint(1, 5))) for _ in range(60)]
+    for min_support, max_size in [(3, 8), (8, 3), (15, 2)]:
+        mined = dict(fp_growth(Counter(transactions).items(), min_support, max_size))
+        assert mined == brute_force(transactions, min_support, max_size)
+
+
+def test_fp_growth_counts_weighted_transactions():
+    a, b, c = (MealItem(food_id, food_id * 10, 1.0) for food_id in (1, 2, 3))
+    mined = dict(fp_growth([({a, b}, 3), ({a, c}, 2), ({b}, 1)], min_support=3))
+    assert mined == {frozenset({a}): 5, frozenset({b}): 4, frozenset({a, b}): 3}
+
+
+def test_mine_meal_templates_keeps_closed_itemsets():
+    histories = []
+    food_entry_id = 0
+    for user in range(2):
+        entries = []
+        for day in range(user * 3, user * 3 + 3):
+            # Breakfast 1+2+3 on 6 days, lunch 4+5 on 2 days only
+            for food_id in (1, 2, 3):
+                food_entry_id += 1
+                entries.append(make_entry(food_entry_id, day, "Breakfast", food_id))
+            if day < 2:
+                for food_id in (4, 5):
+                    food_entry_id += 1
+                    entries.append(make_entry(food_entry_id, day, "Lunch", food_id))
+        histories.append(entries)
+
+    templates = mine_meal_templates(histories, min_support=3)
+    assert len(templates) == 1
+    assert templates[0].meal == "Breakfast"
+    assert templates[0].support == 6
+    assert [item.food_id for item in templates[0].items] == [1, 2, 3]
+    assert templates[0].items[0].food_entry_name == "Food 1"
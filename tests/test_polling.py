@@ -0,0 +1,45 @@
+import datetime
+
+from fatsecret_sync.core.daemon import PollSchedule
+from fatsecret_sync.core.models.config import PollingConfig
+
+TODAY = datetime.date(2023, 5, 10)
+MEAL_TIME = datetime.datetime(2023, 5, 10, 8, 30)
+NIGHT = datetime.datetime(2023, 5, 10, 3, 0)
+
+
+def make_schedule(**kwargs) -> PollSchedule:
+    return PollSchedule(PollingConfig(**kwargs))
+
+
+def test_today_interval_depends_on_meal_hours():
+    schedule = make_schedule()
+    assert schedule.next_interval(TODAY, MEAL_TIME, 0) == datetime.timedelta(minutes=5)
+    assert schedule.next_interval(TODAY, NIGHT, 0) == datetime.timedelta(minutes=30)
+
+
+def test_past_days_use_past_interval():
+    schedule = make_schedule()
+    assert schedule.next_interval(TODAY - datetime.timedelta(days=1), MEAL_TIME, 0) == datetime.timedelta(hours=3)
+
+
+def test_unchanged_polls_back_off_up_to_the_cap():
+    schedule = make_schedule()
+    intervals = [schedule.next_interval(TODAY, MEAL_TIME, polls) for polls in range(6)]
+    assert intervals == [datetime.timedelta(minutes=minutes) for minutes in (5, 10, 20, 40, 60, 60)]
+
+
+def test_many_unchanged_polls_do_not_overflow():
+    schedule = make_schedule()
+    assert schedule.next_interval(TODAY, MEAL_TIME, 10_000) == datetime.timedelta(hours=1)
+    assert schedule.next_interval(TODAY - datetime.timedelta(days=1), MEAL_TIME, 10**9) == datetime.timedelta(hours=24)
+
+
+def test_cap_below_base_keeps_base():
+    schedule = make_schedule(today_interval=datetime.timedelta(hours=2), today_max_interval=datetime.timedelta(hours=1))
+    assert schedule.next_interval(TODAY, MEAL_TIME, 5) == datetime.timedelta(hours=2)
+
+
+def test_no_backoff_with_factor_one():
+    schedule = make_schedule(backoff_factor=1.0)
+    assert schedule.next_interval(TODAY, MEAL_TIME, 100) == datetime.timedelta(minutes=5)
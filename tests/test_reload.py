@@ -0,0 +1,83 @@
+import asyncio
+import datetime
+from pathlib import Path
+
+from fatsecret_sync.core import reload
+from fatsecret_sync.core.models.config import AppConfig
+from fatsecret_sync.core.models.creds import CredsConfig, UserAuthInfo, UserBasicInfo, UserCreds
+from fatsecret_sync.core.reload import CredsDiff, HotReloader, ReloadListener, diff_creds
+
+
+def make_user(user_id: str, token: str = "token") -> UserCreds:
+    return UserCreds(
+        info=UserBasicInfo(id=user_id, name=user_id, created_at=datetime.datetime(2023, 1, 1)),
+        auth=UserAuthInfo(obtained_at=datetime.datetime(2023, 1, 1), oauth_token=token, oauth_token_secret="secret"),
+    )
+
+
+def make_creds(**tokens: str) -> CredsConfig:
+    return CredsConfig(users={user_id: make_user(user_id, token) for user_id, token in tokens.items()})
+
+
+def make_config(root: Path) -> AppConfig:
+    return AppConfig.parse_obj(
+        {
+            "fatsecret": {
+                "oauth1": {"consumer_key": "key", "consumer_secret": "secret"},
+                "oauth2": {"client_id": "id", "client_secret": "secret"},
+            },
+            "telegram": {"admin_id": 1, "bot_token": "token"},
+            "user_backend": {"files": {"root": str(root)}},
+        }
+    )
+
+
+class RecordingListener(ReloadListener):
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.diffs: list[CredsDiff] = []
+
+    def on_creds_changed(self, creds: CredsConfig, diff: CredsDiff):
+        self.diffs.append(diff)
+        if self.fail:
+            raise RuntimeError("listener failed")
+
+
+def test_diff_creds():
+    diff = diff_creds(make_creds(alice="a", bob="b", carol="c"), make_creds(alice="a", bob="b2", dave="d"))
+    assert diff.added == {"dave"}
+    assert diff.removed == {"carol"}
+    assert diff.changed == {"bob"}
+    assert diff.rebuilt == {"bob", "dave"}
+    assert diff
+
+
+def test_same_creds_make_an_empty_diff():
+    assert not diff_creds(make_creds(alice="a"), make_creds(alice="a"))
+
+
+def test_changed_creds_reach_listeners(tmp_path: Path, monkeypatch):
+    listener = RecordingListener()
+    reloader = HotReloader(tmp_path / "config.yaml", make_config(tmp_path), make_creds(alice="a"), [listener])
+    monkeypatch.setattr(reload, "load_creds", lambda config: make_creds(alice="a2"))
+    reloader.reload_creds()
+    reloader.reload_creds()
+    assert [diff.changed for diff in listener.diffs] == [{"alice"}]
+
+
+def test_watching_survives_failures(tmp_path: Path, monkeypatch):
+    listener = RecordingListener(fail=True)
+    reloader = HotReloader(tmp_path / "config.yaml", make_config(tmp_path), make_creds(alice="a"), [listener], interval=0.01)
+    versions = iter(range(1000))
+    monkeypatch.setattr(reload, "_file_version", lambda path: (next(versions), 0, 0))
+    monkeypatch.setattr(reload, "load_creds", lambda config: make_creds(alice=f"token-{len(listener.diffs)}"))
+
+    async def _run():
+        task = asyncio.create_task(reloader.run())
+        await asyncio.sleep(0.1)
+        reloader.stop()
+        await task
+
+    asyncio.run(_run())
+    # Every check saw a changed file, and the failing listener did not stop the polling
+    assert len(listener.diffs) > 2
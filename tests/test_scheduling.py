@@ -0,0 +1,54 @@
+import asyncio
+
+from fatsecret_sync.api.scheduling import Priority, PriorityScheduler
+
+
+async def _grant_order(scheduler: PriorityScheduler, requests: list[Priority]) -> list[Priority]:
+    order = []
+
+    async def _request(priority: Priority):
+        await scheduler.acquire(priority)
+        order.append(priority)
+
+    await asyncio.gather(*(_request(priority) for priority in requests))
+    return order
+
+
+def test_busy_lanes_get_their_share():
+    scheduler = PriorityScheduler(rate=200, burst=1, interactive_share=0.8)
+    requests = [Priority.BULK] * 20 + [Priority.INTERACTIVE] * 20
+    order = asyncio.run(_grant_order(scheduler, requests))
+    # Both lanes stay busy for the first 20 grants
+    assert order[:20].count(Priority.INTERACTIVE) in (15, 16, 17)
+    assert order[-1] == Priority.BULK
+
+
+def test_idle_lane_budget_goes_to_the_other():
+    scheduler = PriorityScheduler(rate=200, burst=1, interactive_share=0.8)
+    order = asyncio.run(_grant_order(scheduler, [Priority.BULK] * 10))
+    assert order == [Priority.BULK] * 10
+    stats = scheduler.stats()
+    assert stats[Priority.BULK].granted == 10
+    assert stats[Priority.INTERACTIVE].granted == 0
+
+
+def test_new_interactive_request_skips_the_bulk_backlog():
+    async def _run() -> list[Priority]:
+        scheduler = PriorityScheduler(rate=100, burst=1, interactive_share=0.8)
+        order = []
+
+        async def _request(priority: Priority):
+            await scheduler.acquire(priority)
+            order.append(priority)
+
+        bulk = [asyncio.create_task(_request(Priority.BULK)) for _ in range(20)]
+        await asyncio.sleep(0.05)
+        await _request(Priority.INTERACTIVE)
+        for task in bulk:
+            task.cancel()
+        await asyncio.gather(*bulk, return_exceptions=True)
+        return order
+
+    order = asyncio.run(_run())
+    assert order[-1] == Priority.INTERACTIVE
+    assert len(order) < 12
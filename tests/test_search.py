@@ -0,0 +1,90 @@
+import random
+import types
+
+from fatsecret_sync.api.models.food_entry import FoodEntry
+from fatsecret_sync.bench.fake_server import make_food_entry_data
+from fatsecret_sync.bot.handlers import _split_food_args
+from fatsecret_sync.core.search import FoodSearchIndex, make_trigrams
+
+DATE_INT = 19000
+
+
+def make_entry(food_entry_id: int, food_id: int, name: str) -> FoodEntry:
+    data = make_food_entry_data(random.Random(food_entry_id), food_entry_id, DATE_INT, food_id)
+    return FoodEntry.parse_obj({**data, "food_entry_name": name})
+
+
+def make_index(*foods: tuple[int, str, int], user_id: str = "alice") -> FoodSearchIndex:
+    """
+    Index where food `food_id` named `name` was logged `times` times by the user.
+    """
+    index = FoodSearchIndex()
+    entry_id = 0
+    for food_id, name, times in foods:
+        for _ in range(times):
+            entry_id += 1
+            index.add_entries([make_entry(entry_id, food_id, name)], user_id=user_id)
+    return index
+
+
+def test_every_word_is_a_prefix():
+    index = make_index((1, "Chicken Breast", 1), (2, "Chicken Soup", 1), (3, "Breaded Fish", 1))
+    assert [(result.food_id, result.score) for result in index.search("chick bre")][0] == (1, 1.0)
+    # Similar names only fill up the results after the prefix matches
+    assert all(result.score < 1.0 for result in index.search("chick bre")[1:])
+    assert {result.food_id for result in index.search("bre") if result.score == 1.0} == {1, 3}
+
+
+def test_ranked_by_user_then_overall_frequency():
+    index = make_index((1, "Greek Yogurt", 5), (2, "Yogurt Plain", 2))
+    index.add_entries([make_entry(100 + i, 3, "Yogurt Drink") for i in range(3)], user_id="bob")
+    assert [result.food_id for result in index.search("yog")] == [1, 3, 2]
+    assert [result.food_id for result in index.search("yog", user_id="bob")] == [3, 1, 2]
+
+
+def test_typos_are_matched_by_trigrams():
+    index = make_index((1, "Greek Yogurt", 1), (2, "Salmon", 1))
+    results = index.search("yogrt")
+    assert [result.food_id for result in results] == [1]
+    assert 0.5 <= results[0].score < 1.0
+
+
+def test_same_entries_are_counted_once():
+    index = FoodSearchIndex()
+    entries = [make_entry(1, 1, "Apple"), make_entry(2, 1, "Apple")]
+    index.add_entries(entries, user_id="alice")
+    index.add_entries(entries, user_id="alice")
+    assert index.search("apple")[0].frequency == 2
+
+
+def test_seen_entries_are_bounded():
+    index = FoodSearchIndex(max_seen_entries=3)
+    index.add_entries([make_entry(entry_id, 1, "Apple") for entry_id in range(10)])
+    assert len(index._seen_entries) == 3
+    assert index.search("apple")[0].frequency == 10
+
+
+def test_trigram_pruning_finds_every_similar_name():
+    rnd = random.Random(7)
+    words = ["chicken", "breast", "salad", "yogurt", "greek", "salmon", "salsa", "cheese", "chocolate", "milk"]
+    index = FoodSearchIndex(min_trigram_similarity=0.4)
+    names = {food_id: " ".join(rnd.sample(words, rnd.randint(1, 3))) for food_id in range(300)}
+    for food_id, name in names.items():
+        index.add_entries([make_entry(food_id, food_id, name)])
+    for query in ["yogrt", "sal", "chiken brest", "chese", "xyz"]:
+        trigrams = make_trigrams(query)
+        expected = {}
+        for food_id, name in names.items():
+            share = len(trigrams & make_trigrams(name)) / len(trigrams)
+            if share >= 0.4:
+                expected[food_id] = share
+        assert index._trigram_matches(query) == expected
+
+
+def test_food_command_picks_the_user():
+    services = types.SimpleNamespace(user_apis={"alice": None, "bob": None})
+    assert _split_food_args(services, "bob chick bre") == ("bob", "chick bre")
+    assert _split_food_args(services, "chick bre") == (None, "chick bre")
+    # A lone word is the query, even if it names a user
+    assert _split_food_args(services, "bob") == (None, "bob")
+    assert _split_food_args(types.SimpleNamespace(user_apis={"alice": None}), "apple") == ("alice", "apple")
@@ -0,0 +1,59 @@
+import asyncio
+import datetime
+import types
+
+from fatsecret_sync.api.models.common import DateInt
+from fatsecret_sync.bot import services as bot_services
+from fatsecret_sync.bot.services import BotServices
+from fatsecret_sync.core.models.summary import DailySummary
+from fatsecret_sync.core.summaries import SummaryCache
+
+DATE = DateInt.validate(datetime.date(2023, 5, 10))
+NOW = datetime.datetime(2023, 5, 10, 20, 0)
+
+
+def make_services(summaries: SummaryCache, fetched: list[DateInt]):
+    async def _fetch_diaries(user_api, dates, listener, converter=None):
+        for date in dates:
+            fetched.append(date)
+            summaries.update("alice", date, [])
+
+    return (
+        types.SimpleNamespace(
+            summaries=summaries,
+            user_apis={"alice": None},
+            listeners=summaries,
+            converter=None,
+            config=types.SimpleNamespace(telegram=types.SimpleNamespace(summary_max_age=datetime.timedelta(minutes=10))),
+        ),
+        _fetch_diaries,
+    )
+
+
+def _cache_summary(summaries: SummaryCache, updated_at: datetime.datetime):
+    summaries._summaries["alice"][DATE] = DailySummary(
+        user_id="alice", date=DATE, entries=1, calories=100, protein=1, carbohydrate=1, fat=1, updated_at=updated_at
+    )
+
+
+def test_fresh_summary_is_served_from_cache(monkeypatch):
+    summaries, fetched = SummaryCache(), []
+    services, fetch_diaries = make_services(summaries, fetched)
+    monkeypatch.setattr(bot_services, "fetch_diaries", fetch_diaries)
+    monkeypatch.setattr(bot_services, "get_now", lambda: NOW)
+    _cache_summary(summaries, NOW - datetime.timedelta(minutes=5))
+    summary = asyncio.run(BotServices.get_day_summary(services, "alice", DATE))
+    assert summary.calories == 100
+    assert fetched == []
+
+
+def test_stale_or_missing_summary_is_fetched_again(monkeypatch):
+    summaries, fetched = SummaryCache(), []
+    services, fetch_diaries = make_services(summaries, fetched)
+    monkeypatch.setattr(bot_services, "fetch_diaries", fetch_diaries)
+    monkeypatch.setattr(bot_services, "get_now", lambda: NOW)
+    asyncio.run(BotServices.get_day_summary(services, "alice", DATE))
+    _cache_summary(summaries, NOW - datetime.timedelta(hours=3))
+    summary = asyncio.run(BotServices.get_day_summary(services, "alice", DATE))
+    assert summary.calories == 0
+    assert fetched == [DATE, DATE]
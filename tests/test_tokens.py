@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from fatsecret_sync.api import tokens
+from fatsecret_sync.api.errors import DeadlineExceededError
+from fatsecret_sync.api.models.auth import OAuth2Credentials
+from fatsecret_sync.api.tokens import OAuth2TokenManager
+
+
+class FakeTokenEndpoint:
+    def __init__(self, expires_in: int = 3600, delay: float = 0.01):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, url, client_id, client_secret, scope=None, *, session) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"access_token": f"token-{self.calls}", "expires_in": self.expires_in}
+
+
+@pytest.fixture
+def endpoint(monkeypatch) -> FakeTokenEndpoint:
+    endpoint = FakeTokenEndpoint()
+    monkeypatch.setattr(tokens, "oauth2_client_credentials_request", endpoint)
+    return endpoint
+
+
+def make_manager(refresh_margin: float = 300.0) -> OAuth2TokenManager:
+    return OAuth2TokenManager(
+        OAuth2Credentials(client_id="id", client_secret="secret"), lambda: None, refresh_margin=refresh_margin
+    )
+
+
+def test_concurrent_callers_share_one_request(endpoint):
+    async def _run():
+        manager = make_manager()
+        return await asyncio.gather(*(manager.get_token() for _ in range(10)))
+
+    assert asyncio.run(_run()) == ["token-1"] * 10
+    assert endpoint.calls == 1
+
+
+def test_valid_token_is_cached(endpoint):
+    async def _run():
+        manager = make_manager()
+        return [await manager.get_token() for _ in range(3)]
+
+    assert asyncio.run(_run()) == ["token-1"] * 3
+    assert endpoint.calls == 1
+
+
+def test_token_near_expiration_is_refreshed_in_background(endpoint):
+    endpoint.expires_in = 100
+
+    async def _run():
+        manager = make_manager(refresh_margin=300)
+        first = await manager.get_token()
+        # Still valid: returned at once while the refresh runs
+        second = await manager.get_token()
+        await asyncio.sleep(endpoint.delay * 5)
+        return first, second, await manager.get_token()
+
+    first, second, third = asyncio.run(_run())
+    assert (first, second) == ("token-1", "token-1")
+    assert third == "token-2"
+
+
+def test_invalidated_token_is_fetched_again(endpoint):
+    async def _run():
+        manager = make_manager()
+        first = await manager.get_token()
+        manager.invalidate()
+        return first, await manager.get_token()
+
+    assert asyncio.run(_run()) == ("token-1", "token-2")
+    assert endpoint.calls == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_refresh(endpoint):
+    async def _run():
+        manager = make_manager()
+        waiter = asyncio.create_task(manager.get_token())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        return await manager.get_token()
+
+    assert asyncio.run(_run()) == "token-1"
+    assert endpoint.calls == 1
+
+
+def test_hung_token_endpoint_times_out(endpoint):
+    endpoint.delay = 10.0
+
+    async def _run():
+        manager = OAuth2TokenManager(OAuth2Credentials(client_id="id", client_secret="secret"), lambda: None, timeout=0.05)
+        with pytest.raises(DeadlineExceededError):
+            await manager.get_token()
+        endpoint.delay = 0.0
+        return await manager.get_token()
+
+    assert asyncio.run(_run()) == "token-2"
@@ -0,0 +1,154 @@
+import asyncio
+import datetime
+import random
+
+import pytest
+
+from fatsecret_sync.api.models.common import DateInt
+from fatsecret_sync.api.models.food import FoodInfoV3, ServingMetricUnitType
+from fatsecret_sync.api.models.food_entry import FoodEntries, FoodEntry
+from fatsecret_sync.bench.fake_server import make_food_entry_data
+from fatsecret_sync.core.summaries import SummaryCache
+from fatsecret_sync.core.sync import merge_food_entries, sync_user
+from fatsecret_sync.core.units import FoodFactorTable, UnitConverter
+
+DATE = DateInt.validate(datetime.date(2023, 5, 10))
+MILK, BREAD = 1, 2
+
+
+def make_serving(serving_id: int, amount: float, unit: str, calories: int, number_of_units: float = 1.0) -> dict:
+    return {
+        "serving_id": serving_id,
+        "serving_description": f"{amount}{unit}",
+        "serving_url": "https://example.com/serving",
+        "metric_serving_amount": amount,
+        "metric_serving_unit": unit,
+        "number_of_units": number_of_units,
+        "measurement_description": "serving",
+        "calories": calories,
+        "carbohydrate": calories / 20,
+        "protein": calories / 40,
+        "fat": calories / 80,
+    }
+
+
+FOODS = {
+    # 1 cup is 250ml, 100ml is 100g
+    MILK: FoodInfoV3.parse_obj(
+        {
+            "food_url": "https://example.com/milk",
+            "food_name": "Milk",
+            "food_type": "Generic",
+            "servings": [make_serving(10, 250, "ml", 150), make_serving(11, 100, "ml", 60), make_serving(12, 100, "g", 60)],
+        }
+    ),
+    BREAD: FoodInfoV3.parse_obj(
+        {
+            "food_url": "https://example.com/bread",
+            "food_name": "Bread",
+            "food_type": "Generic",
+            "servings": [make_serving(20, 30, "g", 80), make_serving(21, 4, "oz", 300, number_of_units=2)],
+        }
+    ),
+}
+
+
+def make_entry(food_entry_id: int, food_id: int, serving_id: int, number_of_units: float, meal: str = "Breakfast") -> FoodEntry:
+    data = make_food_entry_data(random.Random(food_entry_id), food_entry_id, DATE.to_int(), food_id)
+    return FoodEntry.parse_obj({**data, "serving_id": serving_id, "number_of_units": number_of_units, "meal": meal})
+
+
+def make_converter(*food_ids: int) -> UnitConverter:
+    converter = UnitConverter()
+    for food_id in food_ids:
+        converter.add_food(food_id, FOODS[food_id])
+    return converter
+
+
+def test_factor_table_converts_across_servings():
+    table = FoodFactorTable.from_food(MILK, FOODS[MILK])
+    assert table.grams_per_ml == pytest.approx(1.0)
+    assert table.units_factor(10, 11) == pytest.approx(2.5)
+    assert table.amount(10, 2, ServingMetricUnitType.MILLILITERS) == pytest.approx(500)
+    assert table.amount(10, 1, ServingMetricUnitType.GRAMS) == pytest.approx(250)
+    assert table.units_factor(10, 99) is None
+
+
+def test_amount_per_unit_of_multi_unit_servings():
+    table = FoodFactorTable.from_food(BREAD, FOODS[BREAD])
+    # "4oz" serving counts 2 units: one unit is 2oz
+    assert table.amount(21, 1, ServingMetricUnitType.OUNCES) == pytest.approx(2)
+    assert table.amount(21, 1, ServingMetricUnitType.MILLILITERS) is None
+
+
+def test_same_amount_in_another_serving():
+    converter = make_converter(MILK)
+    assert converter.same_amount(make_entry(1, MILK, 10, 1), make_entry(2, MILK, 11, 2.5))
+    assert not converter.same_amount(make_entry(1, MILK, 10, 1), make_entry(2, MILK, 11, 2))
+    assert not converter.same_amount(make_entry(1, MILK, 10, 1), make_entry(2, BREAD, 20, 1))
+
+
+def test_totals_and_amounts():
+    converter = make_converter(MILK)
+    entries = [make_entry(1, MILK, 10, 1), make_entry(2, MILK, 12, 1.5), make_entry(3, BREAD, 20, 2)]
+    totals = converter.nutrient_totals(entries)
+    # Unknown bread contributes its own nutrients
+    assert totals[0] == pytest.approx(150 + 90 + entries[2].calories)
+    assert converter.food_amounts(entries, ServingMetricUnitType.GRAMS) == {MILK: pytest.approx(400)}
+
+
+def test_merge_keeps_the_same_amount_in_another_serving():
+    origin = [make_entry(1, MILK, 10, 1)]
+    target = [make_entry(2, MILK, 11, 2.5), make_entry(3, MILK, 11, 1, meal="Dinner")]
+    delta = merge_food_entries(origin, target, converter=make_converter(MILK))
+    assert not delta.create
+    assert delta.delete == [3]
+    plain = merge_food_entries(origin, target)
+    assert len(plain.create) == 1 and sorted(plain.delete) == [2, 3]
+
+
+class FakeUserAPI:
+    def __init__(self, user_id: str, entries: list[FoodEntry]):
+        self.user_id = user_id
+        self.entries = entries
+        self.loaded_foods: list[int] = []
+        self.operations: list[str] = []
+
+    async def get_food_entries_v2(self, date: DateInt) -> FoodEntries:
+        return FoodEntries(food_entry=self.entries)
+
+    async def get_food_v3(self, food_id: int) -> FoodInfoV3:
+        self.loaded_foods.append(food_id)
+        return FOODS[food_id]
+
+    async def delete_entry(self, food_entry_id: int):
+        self.operations.append(f"DEL {food_entry_id}")
+
+    async def create_entry(self, request):
+        self.operations.append(f"ADD {request.food_id}")
+
+    async def edit_entry(self, request):
+        self.operations.append(f"EDT {request.food_entry_id}")
+
+
+def _sync(listener=None) -> tuple[FakeUserAPI, FakeUserAPI]:
+    origin = FakeUserAPI("alice", [make_entry(1, MILK, 10, 1), make_entry(2, BREAD, 20, 2)])
+    target = FakeUserAPI("bob", [make_entry(3, MILK, 11, 2.5)])
+    assert asyncio.run(sync_user(origin, target, DATE, listener=listener, converter=UnitConverter()))
+    return origin, target
+
+
+def test_sync_loads_only_foods_the_merge_compares():
+    origin, target = _sync()
+    assert origin.loaded_foods == [MILK]
+    assert target.operations == [f"ADD {BREAD}"]
+
+
+def test_sync_loads_every_food_for_summaries():
+    converter = UnitConverter()
+    summaries = SummaryCache(converter=converter)
+    origin = FakeUserAPI("alice", [make_entry(1, MILK, 10, 1), make_entry(2, BREAD, 20, 2)])
+    target = FakeUserAPI("bob", [make_entry(3, MILK, 11, 2.5)])
+    asyncio.run(sync_user(origin, target, DATE, listener=summaries, converter=converter))
+    assert sorted(origin.loaded_foods) == [MILK, BREAD]
+    assert summaries.get_day("alice", DATE).food_grams == {MILK: pytest.approx(250), BREAD: pytest.approx(60)}
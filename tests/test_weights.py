@@ -0,0 +1,76 @@
+import datetime
+
+import pytest
+
+from fatsecret_sync.api.models.common import DateInt
+from fatsecret_sync.core.weights import WeightSeries, WeightStore
+
+START = DateInt.validate(datetime.date(2023, 1, 1))
+
+
+def make_series(weights: list[float], goal: float = 70.0) -> WeightSeries:
+    series = WeightSeries()
+    for offset, weight in enumerate(weights):
+        series.add(START.to_int() + offset, weight, goal)
+    return series
+
+
+def make_store(series: WeightSeries) -> WeightStore:
+    store = WeightStore()
+    store.series["user"] = series
+    return store
+
+
+def test_add_keeps_dates_sorted_and_skips_duplicates():
+    series = WeightSeries()
+    assert series.add(10, 80.0)
+    assert series.add(5, 81.0)
+    assert not series.add(10, 80.0)
+    assert series.add(10, 79.5)
+    assert list(series.dates) == [5, 10]
+    assert list(series.weights_kg) == [81.0, 79.5]
+
+
+def test_slope_of_linear_series():
+    series = make_series([80.0 - 0.5 * day for day in range(10)])
+    assert series.slope(range(len(series))) == pytest.approx(-0.5)
+    assert series.slope(series.window(START.to_int() + 3, START.to_int() + 5)) == pytest.approx(-0.5)
+
+
+def test_slope_needs_two_points():
+    series = make_series([80.0])
+    assert series.slope(range(1)) is None
+    assert series.slope(range(0)) is None
+
+
+def test_trend_over_window():
+    store = make_store(make_series([80.0 - 0.5 * day for day in range(10)]))
+    to_date = DateInt.validate(START + datetime.timedelta(days=9))
+    trend = store.trend("user", to_date, days=5)
+    assert trend.points == 5
+    assert trend.change_kg == pytest.approx(-2.0)
+    assert trend.kg_per_week == pytest.approx(-3.5)
+    assert store.trend("user", START - datetime.timedelta(days=10), days=5) is None
+
+
+def test_goal_eta_at_recent_pace():
+    # 75.5kg on day 9, losing 0.5kg a day: 70kg is 11 days away
+    store = make_store(make_series([80.0 - 0.5 * day for day in range(10)]))
+    progress = store.goal_progress("user")
+    assert progress.current_kg == 75.5
+    assert progress.start_kg == 80.0
+    assert progress.progress == pytest.approx(0.45)
+    assert progress.eta == START + datetime.timedelta(days=20)
+
+
+def test_no_eta_when_moving_away_from_goal():
+    store = make_store(make_series([80.0 + 0.5 * day for day in range(10)]))
+    progress = store.goal_progress("user")
+    assert progress.eta is None
+    assert progress.progress < 0
+
+
+def test_no_progress_without_goal():
+    series = WeightSeries()
+    series.add(START.to_int(), 80.0)
+    assert make_store(series).goal_progress("user") is None